@@ -0,0 +1,157 @@
+"""
+Almacenamiento de media por contenido (content-addressed) con deduplicación.
+
+Cada archivo subido se guarda una sola vez bajo el hash SHA-256 de su contenido:
+
+    media/contenido/3f/3fa9...c1.jpg
+
+El hash se calcula mientras el archivo se copia por bloques a un temporal (sin leerlo
+dos veces ni cargarlo entero en memoria); si ya existe un archivo con ese hash, el
+temporal se descarta y la entrada reutiliza el existente. Así la misma imagen de
+publicidad subida para varias entradas del índice y del blog ocupa disco (y copias de
+seguridad) una sola vez. La carpeta de upload_to de cada campo se ignora: todas las
+imágenes comparten el mismo espacio de nombres para poder deduplicarse entre modelos.
+
+Como el nombre depende del contenido, la URL de un archivo nunca cambia de contenido
+y puede cachearse para siempre (Cache-Control: immutable). En producción nginx debe
+servir media/contenido/ con esa cabecera; en desarrollo lo hace servir_contenido().
+
+ArchivoMedia lleva la cuenta de cuántas filas usan cada archivo (las señales la
+actualizan al guardar o eliminar entradas). Los archivos que quedan sin referencias no
+se borran al instante, porque una subida simultánea del mismo contenido podría estar
+reutilizándolos: los elimina el comando deduplicar_media pasado GRACIA_HUERFANOS.
+"""
+
+import hashlib
+import os
+import posixpath
+import tempfile
+from datetime import timedelta
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+from .models import ArchivoMedia
+
+CARPETA_CONTENIDO = 'contenido'
+CARPETA_TEMPORAL = '.subidas'  # Dentro de MEDIA_ROOT, para que el paso final sea un rename atómico
+GRACIA_HUERFANOS = timedelta(hours=1)
+CONTENIDO_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def es_de_contenido(nombre):
+    return bool(nombre) and nombre.startswith(f'{CARPETA_CONTENIDO}/')
+
+
+def nombre_por_contenido(digest, nombre_original):
+    """
+    contenido/<2 primeros caracteres del hash>/<hash><extensión en minúsculas>.
+    """
+    extension = os.path.splitext(nombre_original)[1].lower()
+    return posixpath.join(CARPETA_CONTENIDO, digest[:2], f'{digest}{extension}')
+
+
+class AlmacenamientoPorContenido(FileSystemStorage):
+    """
+    FileSystemStorage que nombra cada archivo por el SHA-256 de su contenido.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre definitivo se decide en _save() a partir del contenido
+        return name
+
+    def _save(self, name, content):
+        if es_de_contenido(name):
+            # Ya viene nombrado por contenido (p. ej. al restaurar una copia): mismo nombre, mismo archivo
+            return name if self.exists(name) else super()._save(name, content)
+
+        carpeta_temporal = self.path(CARPETA_TEMPORAL)
+        os.makedirs(carpeta_temporal, exist_ok=True)
+        digest = hashlib.sha256()
+        tamano = 0
+        descriptor, temporal = tempfile.mkstemp(dir=carpeta_temporal)
+        try:
+            with os.fdopen(descriptor, 'wb') as destino:
+                for bloque in content.chunks():
+                    digest.update(bloque)
+                    destino.write(bloque)
+                    tamano += len(bloque)
+
+            final = nombre_por_contenido(digest.hexdigest(), name)
+            if self.exists(final):
+                os.remove(temporal)
+            else:
+                os.makedirs(os.path.dirname(self.path(final)), exist_ok=True)
+                os.replace(temporal, self.path(final))
+                if self.file_permissions_mode is not None:
+                    os.chmod(self.path(final), self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+
+        registrar_archivo(final, tamano)
+        return final
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# REFERENCIAS
+
+def registrar_archivo(nombre, tamano):
+    """
+    Anota un archivo recién subido (o vuelto a subir) con la hora de uso actual.
+    """
+    if not ArchivoMedia.objects.filter(nombre=nombre).update(ultimo_uso=timezone.now()):
+        try:
+            with transaction.atomic():
+                ArchivoMedia.objects.create(nombre=nombre, tamano=tamano)
+        except IntegrityError:
+            pass  # Otra subida del mismo contenido lo registró al mismo tiempo
+
+
+def sumar_referencia(nombre):
+    if not es_de_contenido(nombre):
+        return
+    cambios = {'referencias': F('referencias') + 1, 'ultimo_uso': timezone.now()}
+    if not ArchivoMedia.objects.filter(nombre=nombre).update(**cambios):
+        registrar_archivo(nombre, default_storage.size(nombre) if default_storage.exists(nombre) else 0)
+        ArchivoMedia.objects.filter(nombre=nombre).update(**cambios)
+
+
+def restar_referencia(nombre):
+    if not es_de_contenido(nombre):
+        return
+    ArchivoMedia.objects.filter(nombre=nombre, referencias__gt=0).update(
+        referencias=F('referencias') - 1, ultimo_uso=timezone.now()
+    )
+
+
+def borrar_huerfanos(gracia=GRACIA_HUERFANOS):
+    """
+    Elimina los archivos sin referencias cuyo último uso es anterior a `gracia`.
+    Devuelve (archivos, bytes liberados).
+    """
+    limite = timezone.now() - gracia
+    archivos, liberados = 0, 0
+    for archivo in ArchivoMedia.objects.filter(referencias=0, ultimo_uso__lt=limite):
+        # Se vuelve a comprobar fila por fila por si recibió una referencia mientras tanto
+        if ArchivoMedia.objects.filter(nombre=archivo.nombre, referencias=0, ultimo_uso__lt=limite).delete()[0]:
+            default_storage.delete(archivo.nombre)
+            archivos += 1
+            liberados += archivo.tamano
+    return archivos, liberados
+
+
+def servir_contenido(request, path, document_root=None):
+    """
+    django.views.static.serve con caché permanente para los archivos nombrados por contenido
+    (solo en desarrollo; en producción los sirve nginx).
+    """
+    response = serve(request, path, document_root=document_root)
+    if es_de_contenido(path):
+        patch_cache_control(response, public=True, max_age=CONTENIDO_MAX_AGE, immutable=True)
+    return response
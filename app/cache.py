@@ -0,0 +1,253 @@
+"""
+Utilidades de caché compartidas por las vistas de Radio Hits.
+
+Cada grupo de contenido (por ejemplo 'blog') tiene una "generación": un número que
+se incrementa cada vez que cambia alguno de sus registros. Las claves de caché que
+dependen de ese contenido incluyen la generación, por lo que al incrementarla todas
+las entradas anteriores quedan obsoletas sin necesidad de borrarlas una por una.
+
+La generación es una marca de tiempo en milisegundos, así que también sirve como
+fecha de última modificación para las cabeceras ETag / Last-Modified.
+
+Los valores costosos se calculan con protección contra estampidas (single-flight):
+un candado en la caché garantiza que solo una petición recalcula una clave mientras
+las demás esperan o reciben el valor anterior, y la expiración temprana probabilística
+(XFetch) reparte los recálculos antes de que el valor llegue a expirar.
+"""
+
+import functools
+import logging
+import math
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+
+# Las generaciones no expiran: si se pierden (caché vaciada) se regeneran con la hora actual
+GENERACION_TIMEOUT = None
+
+# Tiempo máximo de vida de los resultados cacheados; normalmente se invalidan antes por generación
+CONSULTA_TIMEOUT = 60 * 60
+
+# Copia "última buena" de cada consulta cacheada, independiente de la generación: se sirve
+# si la base de datos falla y no queda ningún valor de la generación actual (modo degradado)
+RESPALDO_TIMEOUT = 60 * 60 * 24 * 7
+
+# Parámetros de single-flight / XFetch
+XFETCH_BETA = 1.0  # > 1 adelanta los recálculos, < 1 los retrasa
+CANDADO_TIMEOUT = 30  # Segundos máximos que se reserva el recálculo de una clave
+ESPERA_MAXIMA = 5  # Segundos que espera una petición sin valor antes de calcular por su cuenta
+INTERVALO_ESPERA = 0.05
+
+_AUSENTE = object()
+
+logger = logging.getLogger(__name__)
+
+
+def _clave_generacion(nombre):
+    return f'radiohits:generacion:{nombre}'
+
+
+def obtener_generacion(nombre):
+    """
+    Devuelve la generación actual del grupo de contenido `nombre`.
+    Si todavía no existe, la inicializa con la hora actual.
+    """
+    clave = _clave_generacion(nombre)
+    generacion = cache.get(clave)
+    if generacion is None:
+        cache.add(clave, int(time.time() * 1000), GENERACION_TIMEOUT)
+        generacion = cache.get(clave)
+    return generacion
+
+
+def incrementar_generacion(nombre):
+    """
+    Invalida todo el contenido cacheado del grupo `nombre` avanzando su generación.
+    La nueva generación siempre es mayor que la anterior, aunque el reloj no haya avanzado.
+    """
+    clave = _clave_generacion(nombre)
+    actual = cache.get(clave) or 0
+    nueva = max(int(time.time() * 1000), actual + 1)
+    cache.set(clave, nueva, GENERACION_TIMEOUT)
+    return nueva
+
+
+def fecha_generacion(nombre):
+    """
+    Fecha (UTC) correspondiente a la generación actual, útil como Last-Modified.
+    """
+    return datetime.fromtimestamp(obtener_generacion(nombre) / 1000, tz=timezone.utc)
+
+
+def clave_generacional(grupo, nombre):
+    """
+    Construye una clave de caché ligada a la generación actual del grupo.
+    """
+    return f'radiohits:{grupo}:{obtener_generacion(grupo)}:{nombre}'
+
+
+def obtener_o_calcular(grupo, nombre, calcular, timeout=CONSULTA_TIMEOUT):
+    """
+    Patrón cache-aside: devuelve el valor cacheado para (grupo, nombre) en la generación
+    actual o, si no existe, lo calcula con `calcular()` y lo guarda.
+    """
+    return obtener_single_flight(clave_generacional(grupo, nombre), calcular, timeout)
+
+
+def obtener_con_respaldo(grupo, nombre, calcular, timeout=CONSULTA_TIMEOUT):
+    """
+    Como obtener_o_calcular(), pero cada cálculo exitoso se copia también fuera de la
+    generación. Si la base de datos falla al recalcular (por ejemplo, tras una edición
+    que cambió la generación justo antes de la caída) se devuelve esa última copia.
+    """
+    clave_respaldo = f'radiohits:respaldo:{grupo}:{nombre}'
+
+    def calcular_y_respaldar():
+        valor = calcular()
+        cache.set(clave_respaldo, valor, RESPALDO_TIMEOUT)
+        return valor
+
+    try:
+        return obtener_o_calcular(grupo, nombre, calcular_y_respaldar, timeout)
+    except DatabaseError:
+        respaldo = cache.get(clave_respaldo, _AUSENTE)
+        if respaldo is _AUSENTE:
+            raise
+        logger.warning('La base de datos falló al calcular %s; se sirve la última copia', nombre, exc_info=True)
+        return respaldo
+
+
+def acumular_al_confirmar(clave, crear, aplicar):
+    """
+    Programa `aplicar(estado)` para cuando se confirme la transacción en curso, una sola
+    vez por `clave`: la primera llamada crea el estado con `crear()` y las siguientes de la
+    misma transacción devuelven ese mismo estado para que lo amplíen. Fuera de una
+    transacción `aplicar` se ejecuta antes de volver, así que `crear()` ya debe incluirlo todo.
+
+    Los pendientes se guardan en la conexión junto con su lista de callbacks. Django la
+    reemplaza al confirmar y al revertir (también al revertir un savepoint), así que si ya
+    no es la misma los pendientes son de una transacción anterior y se descartan; en el
+    peor caso se programa de nuevo algo que sigue pendiente, nunca se pierde.
+    """
+    conexion = transaction.get_connection()
+    lista, pendientes = getattr(conexion, 'radiohits_pendientes', (None, None))
+    if lista is not conexion.run_on_commit:
+        pendientes = {}
+        conexion.radiohits_pendientes = (conexion.run_on_commit, pendientes)
+    if clave in pendientes:
+        return pendientes[clave]
+
+    estado = pendientes[clave] = crear()
+
+    def ejecutar():
+        pendientes.pop(clave, None)
+        aplicar(estado)
+
+    transaction.on_commit(ejecutar)
+    return estado
+
+
+def invalidar(grupo):
+    """
+    Invalida el grupo cuando la transacción en curso se confirma (o de inmediato si no hay
+    transacción), para que ninguna petición vuelva a cachear datos que aún no son visibles.
+
+    Dentro de una transacción, cada grupo se invalida una sola vez aunque se modifiquen
+    muchas filas (p. ej. una acción masiva que elimina 200 entradas y emite 200 señales).
+    """
+    acumular_al_confirmar(('invalidar', grupo), lambda: grupo, incrementar_generacion)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# PROTECCIÓN CONTRA ESTAMPIDAS (SINGLE-FLIGHT + XFETCH)
+
+def _recalcular(clave, calcular, timeout, respaldo=_AUSENTE):
+    """
+    Ejecuta `calcular()` y guarda (valor, duración, expiración lógica).
+    El valor se conserva físicamente el doble de tiempo para poder servirlo obsoleto
+    mientras otra petición lo recalcula. Si el cálculo falla y hay un valor anterior,
+    se devuelve ese valor en lugar de propagar el error.
+    """
+    inicio = time.monotonic()
+    try:
+        valor = calcular()
+    except Exception:
+        if respaldo is _AUSENTE:
+            raise
+        logger.warning('Falló el recálculo de %s; se sirve el valor anterior', clave, exc_info=True)
+        return respaldo
+    delta = time.monotonic() - inicio
+    cache.set(clave, (valor, delta, time.time() + timeout), timeout * 2)
+    return valor
+
+
+def obtener_single_flight(clave, calcular, timeout=CONSULTA_TIMEOUT, beta=XFETCH_BETA):
+    """
+    Devuelve el valor cacheado en `clave` y lo recalcula con `calcular()` evitando estampidas.
+
+    - XFetch: cada lectura decide recalcular antes de la expiración con una probabilidad que
+      crece a medida que esta se acerca y con lo costoso que fue el último cálculo.
+    - Single-flight: solo quien obtiene el candado recalcula; el resto sigue sirviendo el valor
+      anterior o, si no existe ninguno, espera a que el cálculo termine.
+    """
+    guardado = cache.get(clave)
+    valor = _AUSENTE
+    if guardado is not None:
+        valor, delta, expira = guardado
+        if time.time() - delta * beta * math.log(1.0 - random.random()) < expira:
+            return valor
+
+    candado = f'{clave}:candado'
+    token = uuid.uuid4().hex
+    if cache.add(candado, token, CANDADO_TIMEOUT):
+        try:
+            return _recalcular(clave, calcular, timeout, respaldo=valor)
+        finally:
+            if cache.get(candado) == token:
+                cache.delete(candado)
+
+    if valor is not _AUSENTE:
+        # Otra petición ya está recalculando: se sirve el valor vigente (u obsoleto)
+        return valor
+
+    limite = time.monotonic() + ESPERA_MAXIMA
+    while time.monotonic() < limite:
+        time.sleep(INTERVALO_ESPERA)
+        guardado = cache.get(clave)
+        if guardado is not None:
+            return guardado[0]
+    # Quien tenía el candado no terminó a tiempo: se calcula sin compartir el resultado en espera
+    return _recalcular(clave, calcular, timeout)
+
+
+def ultimo_valor(clave, defecto=None):
+    """
+    Devuelve el último valor guardado por obtener_single_flight en `clave`, aunque esté
+    lógicamente expirado, sin recalcular nada. Sirve como respaldo cuando el cálculo no
+    puede esperar (por ejemplo, una API externa que no respondió a tiempo).
+    """
+    guardado = cache.get(clave)
+    return defecto if guardado is None else guardado[0]
+
+
+def single_flight(clave, timeout=CONSULTA_TIMEOUT, beta=XFETCH_BETA):
+    """
+    Decorador para constructores de contexto costosos (consultas, llamadas a APIs externas).
+    `clave` puede ser un texto fijo o una función que recibe los mismos argumentos que la
+    función decorada y devuelve la clave de caché.
+
+        @single_flight('radiohits:indicadores', timeout=900)
+        def obtener_indicadores():
+            ...
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            nombre = clave(*args, **kwargs) if callable(clave) else clave
+            return obtener_single_flight(nombre, lambda: funcion(*args, **kwargs), timeout, beta)
+        return envoltura
+    return decorador
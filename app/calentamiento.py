@@ -0,0 +1,142 @@
+"""
+Calentamiento de un worker antes de recibir tráfico (ver el comando warmup).
+
+Sin calentar, la primera petición de cada worker paga la importación de app/views.py
+y sus dependencias (al cargar las URLs), la compilación de cada plantilla que usa y,
+si la caché compartida está vacía, las consultas y la llamada a mindicador.cl.
+
+  - calentar_proceso(): resuelve las URLs y compila las plantillas del proyecto. Es
+    trabajo de cada proceso (con el loader cacheado de producción las plantillas
+    compiladas quedan en memoria), así que core/wsgi.py y core/asgi.py lo ejecutan al
+    cargar la aplicación cuando DEBUG está desactivado.
+  - cebar_caches(): llena la caché compartida con los indicadores, la programación
+    semanal y el carrusel. Basta hacerlo una vez por despliegue (comando warmup).
+
+Los módulos pesados que no se usan en cada petición (NumPy, Pillow) se importan al
+usarse (app/importaciones.py), así que ninguno de los dos pasos los carga.
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.urls import NoReverseMatch, get_resolver, resolve, reverse
+
+# Segundos que puede tardar el arranque de un worker (django.setup() e importar las URLs,
+# sin contar el intérprete); lo comprueban las pruebas, con margen de sobra para máquinas
+# lentas, y el informe de importaciones (warmup --importaciones)
+PRESUPUESTO_ARRANQUE = 1.5
+
+logger = logging.getLogger(__name__)
+
+
+def resolver_urls():
+    """
+    Importa todas las vistas y precalcula las tablas del resolvedor. Devuelve las rutas resueltas.
+    """
+    resolver = get_resolver()
+    nombres = [nombre for nombre in resolver.reverse_dict if isinstance(nombre, str)]
+    resueltas = 0
+    for nombre in nombres:
+        try:
+            resolve(reverse(nombre))
+        except NoReverseMatch:
+            continue  # Rutas con parámetros (<int:pk>...): ya quedaron importadas con el resolvedor
+        resueltas += 1
+    return resueltas
+
+
+def compilar_plantillas():
+    """
+    Compila las plantillas de TEMPLATES['DIRS']. Devuelve (compiladas, errores).
+    """
+    compiladas, errores = 0, 0
+    for motor in engines.all():
+        for carpeta in getattr(motor, 'dirs', []):
+            for raiz, _, archivos in os.walk(carpeta):
+                for archivo in archivos:
+                    if not archivo.endswith(('.html', '.txt', '.xml')):
+                        continue
+                    nombre = os.path.relpath(os.path.join(raiz, archivo), carpeta).replace(os.sep, '/')
+                    try:
+                        motor.get_template(nombre)
+                    except (TemplateDoesNotExist, TemplateSyntaxError):
+                        logger.warning('No se pudo compilar la plantilla %s', nombre, exc_info=True)
+                        errores += 1
+                    else:
+                        compiladas += 1
+    return compiladas, errores
+
+
+def cebar_caches():
+    """
+    Llena la caché compartida con los datos del índice. Un fallo (API o base de datos
+    caída) se registra y no impide el resto. Devuelve {nombre: segundos o None si falló}.
+    """
+    from requests.exceptions import RequestException
+
+    from .models import EntradaIndex, programacion_semanal
+    from .tendencias import tendencias
+    from .views import obtener_indicadores
+
+    pasos = {
+        'indicadores': obtener_indicadores,
+        'programacion': programacion_semanal,
+        'carrusel': lambda: EntradaIndex.objects.recientes(3),
+        'tendencias': tendencias,
+    }
+    resultados = {}
+    for nombre, cebar in pasos.items():
+        inicio = time.perf_counter()
+        try:
+            cebar()
+        except (RequestException, DatabaseError, KeyError, ValueError):
+            logger.warning('No se pudo cebar la caché de %s', nombre, exc_info=True)
+            resultados[nombre] = None
+        else:
+            resultados[nombre] = time.perf_counter() - inicio
+    return resultados
+
+
+def calentar_proceso():
+    """
+    URLs y plantillas de este proceso. Devuelve los segundos empleados.
+    """
+    inicio = time.perf_counter()
+    rutas = resolver_urls()
+    compiladas, errores = compilar_plantillas()
+    duracion = time.perf_counter() - inicio
+    logger.info('Worker calentado en %.2f s: %s rutas, %s plantillas (%s errores)', duracion, rutas, compiladas, errores)
+    return duracion
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# INFORME DE IMPORTACIONES
+
+def medir_importaciones():
+    """
+    Arranca un intérprete nuevo con -X importtime que hace lo mismo que un worker al
+    iniciar (django.setup() e importar ROOT_URLCONF). Devuelve (segundos del arranque,
+    [(microsegundos acumulados, microsegundos propios, módulo)] ordenada de mayor a menor).
+    """
+    codigo = (
+        'import time; inicio = time.perf_counter(); import django; django.setup(); '
+        f'import {settings.ROOT_URLCONF}; print(time.perf_counter() - inicio)'
+    )
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        capture_output=True, text=True, check=True,
+    )
+    modulos = []
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        propio, acumulado, modulo = linea[len('import time:'):].split('|')
+        modulos.append((int(acumulado), int(propio), modulo.strip()))
+    modulos.sort(reverse=True)
+    return float(resultado.stdout.strip().splitlines()[-1]), modulos
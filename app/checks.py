@@ -0,0 +1,42 @@
+"""
+Comprobaciones de configuración del proyecto (python manage.py check).
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+from .limites import BACKENDS_ATOMICOS
+
+MENSAJE_LIMITES = 'LIMITES_PETICIONES necesita una caché con add() atómico; {} no lo es.'
+SUGERENCIA_LIMITES = 'Configura Redis o memcached en CACHES (ver core/settings_produccion.py).'
+
+
+def _backend_no_atomico():
+    """
+    El backend de la caché si el límite de peticiones está activo y su add() no es atómico.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if getattr(settings, 'LIMITES_PETICIONES', None) and backend not in BACKENDS_ATOMICOS:
+        return backend
+    return None
+
+
+@register(Tags.caches)
+def limites_con_cache_atomica(app_configs, **kwargs):
+    """
+    El límite de peticiones necesita una caché cuyo cache.add() sea atómico entre
+    procesos (ver app/limites.py). Con una caché en archivos basta un aviso en
+    desarrollo, donde hay un solo proceso; check --deploy lo trata como error.
+    """
+    backend = _backend_no_atomico()
+    if backend is None:
+        return []
+    return [Warning(MENSAJE_LIMITES.format(backend), hint=SUGERENCIA_LIMITES, id='app.W001')]
+
+
+@register(Tags.caches, deploy=True)
+def limites_con_cache_atomica_despliegue(app_configs, **kwargs):
+    backend = _backend_no_atomico()
+    if backend is None:
+        return []
+    return [Error(MENSAJE_LIMITES.format(backend), hint=SUGERENCIA_LIMITES, id='app.E001')]
@@ -0,0 +1,271 @@
+"""
+Minificación de HTML y compresión Brotli/gzip de las respuestas (ver CompresionMiddleware).
+
+  - minificar_html() quita los comentarios HTML y reduce los espacios en blanco, sin tocar
+    el contenido de <pre>, <textarea>, <script> ni <style> (ahí el espacio importa o el
+    código puede tener comentarios de línea). Los comentarios condicionales <!--[if ...]>
+    se conservan.
+  - La codificación se negocia con Accept-Encoding (respetando q=0): Brotli si el cliente
+    la acepta y el paquete brotli está instalado (es opcional), si no gzip.
+  - El cuerpo comprimido de las respuestas que salen de la caché se guarda también en la
+    caché: las que tienen ETag (feeds, calendario, series de indicadores) y las que la
+    vista marca con marcar_cacheable() (el índice armado con fragmentos cacheados). La
+    clave se deriva de la ruta, el Content-Type (con su charset) y el ETag o, si no tiene,
+    un hash del cuerpo sin comprimir. Un ETag solo es único dentro de su URL (dos vistas
+    pueden calcularlo igual), por eso la ruta forma parte de la clave. Así esas páginas se
+    minifican y comprimen una sola vez. Las demás (con token CSRF o listas de un editor)
+    cambian en cada petición: se comprimen sin pasar por la caché, que solo se llenaría de
+    entradas que nadie vuelve a leer.
+  - Las respuestas transmitidas por partes (IndexView bajo ASGI, exportaciones) se
+    comprimen por partes con un flush tras cada una, para no perder el envío anticipado.
+    No se minifican: una etiqueta o un comentario puede quedar cortado entre dos partes.
+
+Las métricas (ratio de compresión, aciertos de la caché y tiempo de CPU) se consultan con
+metricas() y las muestra el comando benchmark; cada respuesta lleva además el tiempo en
+la cabecera Server-Timing.
+"""
+
+import hashlib
+import re
+import threading
+import time
+import zlib
+from collections import deque
+
+from django.core.cache import cache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+TIPOS_COMPRIMIBLES = (
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/calendar', 'text/xml',
+    'application/json', 'application/javascript', 'application/xml', 'application/rss+xml',
+    'application/atom+xml', 'image/svg+xml',
+)
+TAMANO_MINIMO = 512  # Bytes; por debajo la cabecera gzip/brotli no compensa
+CALIDAD_BROTLI = 5  # 0-11: a partir de 6 el tiempo crece mucho más que el ahorro
+NIVEL_GZIP = 6
+COMPRIMIDOS_TIMEOUT = 60 * 60 * 24
+COMPRIMIDO_MAXIMO = 1024 * 1024  # No se cachean cuerpos mayores (p. ej. exportaciones)
+MUESTRAS_TIEMPO = 500
+
+_PROTEGIDO = re.compile(r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.IGNORECASE | re.DOTALL)
+_COMENTARIO = re.compile(r'<!--(?!\[if|<!).*?-->', re.DOTALL)
+_ESPACIOS_CON_SALTO = re.compile(r'\s*\n\s*')
+_ESPACIOS = re.compile(r'[ \t\r\f\v]{2,}')
+
+
+def minificar_html(html):
+    partes = _PROTEGIDO.split(html)
+    resultado = []
+    # split() con dos grupos devuelve [texto, bloque, etiqueta, texto, bloque, etiqueta, ...]
+    for indice in range(0, len(partes), 3):
+        texto = _COMENTARIO.sub('', partes[indice])
+        texto = _ESPACIOS_CON_SALTO.sub('\n', texto)
+        resultado.append(_ESPACIOS.sub(' ', texto))
+        if indice + 1 < len(partes):
+            resultado.append(partes[indice + 1])
+    return ''.join(resultado)
+
+
+def codificaciones_aceptadas(accept_encoding):
+    """
+    {codificación: q} de una cabecera Accept-Encoding ('br;q=1.0, gzip, *;q=0').
+    """
+    aceptadas = {}
+    for parte in accept_encoding.split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        calidad = 1.0
+        if parametros.strip().startswith('q='):
+            try:
+                calidad = float(parametros.strip()[2:])
+            except ValueError:
+                calidad = 0.0
+        if nombre:
+            aceptadas[nombre.strip().lower()] = calidad
+    return aceptadas
+
+
+def elegir_codificacion(accept_encoding):
+    """
+    'br', 'gzip' o None según lo que acepta el cliente y lo disponible en el servidor.
+    """
+    aceptadas = codificaciones_aceptadas(accept_encoding)
+    comodin = aceptadas.get('*', 0)
+    for codificacion in ('br', 'gzip'):
+        if codificacion == 'br' and brotli is None:
+            continue
+        if aceptadas.get(codificacion, comodin) > 0:
+            return codificacion
+    return None
+
+
+class Compresor:
+    """
+    Compresión por partes: cada llamada devuelve lo comprimido hasta ese punto (con flush),
+    de modo que el cliente puede descomprimir y mostrar cada parte al recibirla.
+    """
+
+    def __init__(self, codificacion):
+        self.codificacion = codificacion
+        if codificacion == 'br':
+            self.compresor = brotli.Compressor(quality=CALIDAD_BROTLI)
+        else:
+            self.compresor = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # Formato gzip
+
+    def parte(self, datos):
+        if self.codificacion == 'br':
+            return self.compresor.process(datos) + self.compresor.flush()
+        return self.compresor.compress(datos) + self.compresor.flush(zlib.Z_SYNC_FLUSH)
+
+    def terminar(self):
+        return self.compresor.finish() if self.codificacion == 'br' else self.compresor.flush()
+
+
+def comprimir(datos, codificacion):
+    if codificacion == 'br':
+        return brotli.compress(datos, quality=CALIDAD_BROTLI)
+    compresor = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compresor.compress(datos) + compresor.flush()
+
+
+def clave_comprimido(codificacion, ruta, content_type, etag, cuerpo):
+    """
+    Clave de caché del cuerpo comprimido. El ETag identifica el contenido sin leerlo, pero
+    solo dentro de su URL y representación, así que la clave incluye la ruta y el
+    Content-Type; sin ETag se usa un hash del cuerpo original.
+    """
+    contenido = etag if etag else hashlib.blake2b(cuerpo, digest_size=16).hexdigest()
+    huella = '\n'.join((ruta, content_type, contenido))
+    return f'radiohits:comprimido:{codificacion}:{hashlib.md5(huella.encode()).hexdigest()}'
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# MÉTRICAS
+
+class MetricasCompresion:
+    """
+    Bytes antes y después de minificar y comprimir, aciertos de la caché y tiempo de CPU.
+    """
+
+    def __init__(self):
+        self.respuestas = 0
+        self.desde_cache = 0
+        self.bytes_originales = 0
+        self.bytes_minificados = 0
+        self.bytes_enviados = 0
+        self.tiempos = deque(maxlen=MUESTRAS_TIEMPO)
+        self._candado = threading.Lock()
+
+    def registrar(self, originales, minificados, enviados, tiempo=None):
+        with self._candado:
+            self.respuestas += 1
+            self.bytes_originales += originales
+            self.bytes_minificados += minificados
+            self.bytes_enviados += enviados
+            if tiempo is None:
+                self.desde_cache += 1
+            else:
+                self.tiempos.append(tiempo)
+
+    def resumen(self):
+        with self._candado:
+            tiempos = sorted(self.tiempos)
+            datos = {
+                'respuestas': self.respuestas,
+                'desde_cache': self.desde_cache,
+                'ratio_minificado': round(self.bytes_minificados / self.bytes_originales, 3) if self.bytes_originales else None,
+                'ratio_total': round(self.bytes_enviados / self.bytes_originales, 3) if self.bytes_originales else None,
+            }
+        if tiempos:
+            datos.update({
+                'cpu_p50_ms': round(tiempos[len(tiempos) // 2] * 1000, 2),
+                'cpu_p95_ms': round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))] * 1000, 2),
+                'cpu_max_ms': round(tiempos[-1] * 1000, 2),
+            })
+        return datos
+
+
+_metricas = {}
+_candado_metricas = threading.Lock()
+
+
+def metricas_codificacion(codificacion):
+    with _candado_metricas:
+        return _metricas.setdefault(codificacion, MetricasCompresion())
+
+
+def metricas():
+    """
+    Métricas de compresión de este proceso por codificación ('br', 'gzip').
+    """
+    with _candado_metricas:
+        codificaciones = list(_metricas)
+    return {codificacion: metricas_codificacion(codificacion).resumen() for codificacion in codificaciones}
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# RESPUESTAS
+
+def es_html(response):
+    return response.get('Content-Type', '').startswith('text/html')
+
+
+def marcar_cacheable(response):
+    """
+    Indica que el cuerpo de `response` se repite entre peticiones (sale de la caché aunque
+    no tenga ETag), así que vale la pena guardar su versión comprimida.
+    """
+    response.comprimido_cacheable = True
+    return response
+
+
+def comprimir_cuerpo(request, response, codificacion):
+    """
+    Minifica (si es HTML) y comprime el cuerpo de una respuesta completa, reutilizando la
+    versión cacheada cuando existe. Devuelve (comprimido, segundos de CPU o None si vino de la caché).
+    """
+    original = response.content
+    repetible = response.has_header('ETag') or getattr(response, 'comprimido_cacheable', False)
+    cacheable = repetible and len(original) <= COMPRIMIDO_MAXIMO
+    clave = None
+    if cacheable:
+        clave = clave_comprimido(
+            codificacion, request.get_full_path(), response.get('Content-Type', ''), response.get('ETag'), original
+        )
+    guardado = cache.get(clave) if cacheable else None
+    if guardado is not None:
+        minificados, comprimido = guardado
+        metricas_codificacion(codificacion).registrar(len(original), minificados, len(comprimido))
+        return comprimido, None
+
+    inicio = time.thread_time()
+    cuerpo = original
+    if es_html(response):
+        cuerpo = minificar_html(original.decode(response.charset)).encode(response.charset)
+    comprimido = comprimir(cuerpo, codificacion)
+    tiempo = time.thread_time() - inicio
+    if cacheable:
+        cache.set(clave, (len(cuerpo), comprimido), COMPRIMIDOS_TIMEOUT)
+    metricas_codificacion(codificacion).registrar(len(original), len(cuerpo), len(comprimido), tiempo)
+    return comprimido, tiempo
+
+
+def comprimir_partes(partes, codificacion):
+    compresor = Compresor(codificacion)
+    for parte in partes:
+        comprimida = compresor.parte(parte)
+        if comprimida:
+            yield comprimida
+    yield compresor.terminar()
+
+
+async def acomprimir_partes(partes, codificacion):
+    compresor = Compresor(codificacion)
+    async for parte in partes:
+        comprimida = compresor.parte(parte)
+        if comprimida:
+            yield comprimida
+    yield compresor.terminar()
@@ -0,0 +1,179 @@
+"""
+Modo degradado de solo lectura cuando la base de datos (radio_hits_db) no responde.
+
+  - Instantáneas: cada página pública que se sirve bien (GET, 200, visitante sin
+    sesión) se guarda renderizada en la caché compartida, como mucho una vez cada
+    INSTANTANEA_INTERVALO segundos por URL (la ruta y sus parámetros conocidos, ver
+    clave_instantanea). Es la "última versión buena" de la página.
+  - Detección: un error de conexión con la base (caída, conexión perdida o tiempo
+    agotado, que MySQL informa como OperationalError o InterfaceError) durante una
+    petición marca la base como caída en la caché compartida, así todos los workers
+    entran en modo degradado a la vez. Ver ModoDegradadoMiddleware y anotar_error_base_datos (señal got_request_exception).
+  - Mientras está caída: los GET se responden con la instantánea (cabeceras Age y
+    Warning: 110 de contenido obsoleto) sin tocar la base, y las escrituras se rechazan
+    con 503 y Retry-After para no acumular peticiones esperando conexiones.
+  - Recuperación: cada ESPERA_SONDA segundos una sola petición comprueba la base con
+    SELECT 1; si responde, se vuelve al modo normal.
+
+Los datos del índice (programación y carrusel) tienen además su propia copia de
+respaldo en las consultas cacheadas (ver obtener_con_respaldo en app/cache.py).
+"""
+
+import logging
+import sys
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, InterfaceError, OperationalError, connections
+from django.http import HttpResponse
+from django.utils.http import http_date, urlencode
+
+CLAVE_CAIDA = 'radiohits:degradado:caida'
+CAIDA_TIMEOUT = 60 * 10  # Sin sondas que la confirmen, la marca expira sola
+ESPERA_SONDA = 10  # Segundos entre comprobaciones de la base durante la caída
+INSTANTANEA_TIMEOUT = 60 * 60 * 24 * 7
+INSTANTANEA_INTERVALO = 60  # Segundos mínimos entre dos copias de la misma URL
+INSTANTANEA_MAXIMA = 2 * 1024 * 1024
+ERRORES_CAIDA = (OperationalError, InterfaceError)  # Caída, conexión perdida o tiempo agotado
+# Parámetros que cambian el contenido de las páginas públicas (paginación, filtros del blog
+# y día de la programación); con cualquier otro no se guarda copia
+PARAMETROS_INSTANTANEA = ('page', 'year', 'month', 'orden', 'day')
+TIPOS_INSTANTANEA = ('text/html', 'application/rss+xml', 'application/atom+xml', 'application/xml', 'text/calendar')
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ESTADO DE LA BASE DE DATOS
+
+def base_caida():
+    return cache.get(CLAVE_CAIDA) is not None
+
+
+def marcar_caida():
+    if cache.add(CLAVE_CAIDA, time.time(), CAIDA_TIMEOUT):
+        logger.error('La base de datos no responde; se activa el modo degradado de solo lectura')
+        # La primera sonda espera ESPERA_SONDA segundos
+        cache.set(f'{CLAVE_CAIDA}:sonda', 1, ESPERA_SONDA)
+
+
+def sondear():
+    """
+    Comprueba la base como mucho una vez cada ESPERA_SONDA segundos entre todos los
+    workers. Devuelve True si respondió (y en ese caso sale del modo degradado).
+    """
+    if not cache.add(f'{CLAVE_CAIDA}:sonda', 1, ESPERA_SONDA):
+        return False
+    conexion = connections[DEFAULT_DB_ALIAS]
+    try:
+        conexion.close_if_unusable_or_obsolete()
+        with conexion.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError:
+        conexion.close()
+        return False
+    cache.delete(CLAVE_CAIDA)
+    logger.warning('La base de datos responde de nuevo; se sale del modo degradado')
+    return True
+
+
+def anotar_error_base_datos(sender, request=None, **kwargs):
+    """
+    Receptor de got_request_exception: marca la petición (y la base) cuando la
+    excepción que produjo el error 500 indica que la base no responde. Los demás errores
+    de base de datos (IntegrityError por un envío duplicado, ProgrammingError por una
+    consulta mal escrita) son fallos de esa petición y no deben dejar el sitio en solo lectura.
+    """
+    if request is not None and isinstance(sys.exc_info()[1], ERRORES_CAIDA):
+        request.error_base_datos = True
+        marcar_caida()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# INSTANTÁNEAS
+
+def clave_instantanea(request):
+    """
+    La ruta con los parámetros de PARAMETROS_INSTANTANEA en orden fijo: /about/?x=1 y
+    /about/ comparten copia, así una consulta inventada no ocupa otra entrada de la caché.
+    """
+    parametros = [(nombre, request.GET[nombre]) for nombre in PARAMETROS_INSTANTANEA if nombre in request.GET]
+    return f'radiohits:instantanea:{request.path}?{urlencode(parametros)}'
+
+
+def admite_instantanea(request, response):
+    """
+    Solo se guardan respuestas públicas: visitante sin sesión, sin cookies nuevas y sin
+    Cache-Control privado, para no mostrar a otros el contenido de un editor. Con
+    parámetros desconocidos no se guarda, porque la copia quedaría bajo la clave sin ellos.
+    """
+    return (
+        request.method == 'GET'
+        and set(request.GET) <= set(PARAMETROS_INSTANTANEA)
+        and response.status_code == 200
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and not response.cookies
+        and response.get('Content-Type', '').split(';')[0].strip() in TIPOS_INSTANTANEA
+        and not any(directiva in response.get('Cache-Control', '') for directiva in ('private', 'no-store'))
+    )
+
+
+def toca_instantanea(request):
+    """
+    True si la copia de esta URL tiene más de INSTANTANEA_INTERVALO segundos (o no existe).
+    """
+    return cache.add(f'{clave_instantanea(request)}:reciente', 1, INSTANTANEA_INTERVALO)
+
+
+def guardar_instantanea(request, contenido, content_type):
+    if len(contenido) <= INSTANTANEA_MAXIMA:
+        cache.set(clave_instantanea(request), (contenido, content_type, time.time()), INSTANTANEA_TIMEOUT)
+
+
+def guardar_al_terminar(request, partes, content_type):
+    """
+    Deja pasar las partes de una respuesta transmitida y guarda la instantánea al final
+    (si se interrumpe a medias no se guarda nada).
+    """
+    contenido = []
+    for parte in partes:
+        contenido.append(parte)
+        yield parte
+    guardar_instantanea(request, b''.join(contenido), content_type)
+
+
+async def aguardar_al_terminar(request, partes, content_type):
+    contenido = []
+    async for parte in partes:
+        contenido.append(parte)
+        yield parte
+    guardar_instantanea(request, b''.join(contenido), content_type)
+
+
+def respuesta_instantanea(request):
+    """
+    La última copia buena de la URL marcada como obsoleta, o None si no hay.
+    """
+    guardada = cache.get(clave_instantanea(request))
+    if guardada is None:
+        return None
+    contenido, content_type, guardada_en = guardada
+    response = HttpResponse(contenido, content_type=content_type)
+    response['Age'] = str(max(0, int(time.time() - guardada_en)))
+    response['Warning'] = '110 - "Response is Stale"'
+    response['Last-Modified'] = http_date(guardada_en)
+    response['Cache-Control'] = 'no-store'  # Que ningún proxy la conserve tras la recuperación
+    response['X-Modo-Degradado'] = 'instantanea'
+    return response
+
+
+def respuesta_no_disponible(request):
+    response = HttpResponse(
+        'El sitio está en modo de solo lectura por un problema técnico. Intenta de nuevo en unos segundos.',
+        status=503, content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(ESPERA_SONDA)
+    response['Cache-Control'] = 'no-store'
+    response['X-Modo-Degradado'] = 'solo-lectura'
+    return response
@@ -0,0 +1,231 @@
+"""
+Cliente HTTP compartido para las APIs de terceros (por ahora mindicador.cl).
+
+Todas las llamadas salientes pasan por `cliente_externo`, que ofrece:
+  - Un pool de conexiones con keep-alive por host (una sola requests.Session para el proceso).
+  - Tiempos límite de conexión y lectura por host; nunca se espera indefinidamente.
+  - Reintentos acotados con espera exponencial y jitter para errores transitorios
+    (conexión, tiempo agotado, 429, 502, 503 y 504), solo en métodos idempotentes.
+  - Un circuito por host: tras varios fallos seguidos se abre y las llamadas fallan de
+    inmediato con CircuitoAbierto, sin ocupar hilos; pasado un tiempo deja pasar una
+    llamada de prueba y, si funciona, vuelve a cerrarse.
+  - Métricas por host (peticiones, errores, reintentos, rechazos y latencias), ver metricas().
+
+La configuración por host se puede ajustar con HTTP_EXTERNO en settings:
+
+    HTTP_EXTERNO = {'mindicador.cl': {'timeout': (1.5, 4), 'reintentos': 2}}
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+CONFIGURACION_POR_DEFECTO = {
+    'timeout': (3.05, 5),  # Segundos (conexión, lectura)
+    'reintentos': 2,  # Intentos adicionales tras el primero
+    'espera_base': 0.2,  # Espera antes del primer reintento; se duplica en cada intento
+    'espera_maxima': 2.0,
+    'fallos_para_abrir': 5,  # Fallos seguidos que abren el circuito
+    'espera_circuito': 30,  # Segundos que el circuito permanece abierto antes de probar de nuevo
+}
+
+METODOS_IDEMPOTENTES = {'GET', 'HEAD', 'OPTIONS'}
+ESTADOS_REINTENTABLES = {429, 502, 503, 504}
+CONEXIONES_POR_HOST = 10
+MUESTRAS_LATENCIA = 500  # Latencias recientes guardadas por host para los percentiles
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitoAbierto(requests.exceptions.RequestException):
+    """
+    La llamada se rechazó sin enviarse porque el host falló repetidamente.
+    Hereda de RequestException para que el código existente la trate como cualquier error de red.
+    """
+
+
+class Circuito:
+    """
+    Disyuntor de un host: cerrado (normal), abierto (rechaza todo) o semiabierto
+    (deja pasar una única llamada de prueba).
+    """
+
+    def __init__(self, fallos_para_abrir, espera):
+        self.fallos_para_abrir = fallos_para_abrir
+        self.espera = espera
+        self.fallos = 0
+        self.abierto_desde = None
+        self.probando = False
+        self._candado = threading.Lock()
+
+    @property
+    def estado(self):
+        if self.abierto_desde is None:
+            return 'cerrado'
+        if time.monotonic() - self.abierto_desde < self.espera:
+            return 'abierto'
+        return 'semiabierto'
+
+    def permitir(self):
+        with self._candado:
+            estado = self.estado
+            if estado == 'cerrado':
+                return True
+            if estado == 'semiabierto' and not self.probando:
+                self.probando = True
+                return True
+            return False
+
+    def exito(self):
+        with self._candado:
+            self.fallos = 0
+            self.abierto_desde = None
+            self.probando = False
+
+    def fallo(self):
+        with self._candado:
+            self.fallos += 1
+            if self.probando or self.fallos >= self.fallos_para_abrir:
+                # La llamada de prueba falló o se alcanzó el umbral: (re)abrir el circuito
+                self.abierto_desde = time.monotonic()
+            self.probando = False
+
+
+class MetricasHost:
+    """
+    Contadores y latencias recientes de un host.
+    """
+
+    def __init__(self):
+        self.peticiones = 0
+        self.errores = 0
+        self.reintentos = 0
+        self.rechazadas = 0
+        self.latencias = deque(maxlen=MUESTRAS_LATENCIA)
+        self._candado = threading.Lock()
+
+    def registrar(self, campo, latencia=None):
+        with self._candado:
+            setattr(self, campo, getattr(self, campo) + 1)
+            if latencia is not None:
+                self.latencias.append(latencia)
+
+    def resumen(self):
+        with self._candado:
+            latencias = sorted(self.latencias)
+            datos = {
+                'peticiones': self.peticiones,
+                'errores': self.errores,
+                'reintentos': self.reintentos,
+                'rechazadas': self.rechazadas,
+            }
+        if latencias:
+            datos.update({
+                'latencia_p50_ms': round(latencias[len(latencias) // 2] * 1000, 1),
+                'latencia_p95_ms': round(latencias[min(len(latencias) - 1, int(len(latencias) * 0.95))] * 1000, 1),
+                'latencia_max_ms': round(latencias[-1] * 1000, 1),
+            })
+        return datos
+
+
+class ClienteExterno:
+    """
+    Cliente HTTP con pool de conexiones, reintentos, circuito y métricas por host.
+    """
+
+    def __init__(self, configuracion=None):
+        self.configuracion = configuracion
+        self.sesion = requests.Session()
+        # Los reintentos los maneja el cliente (con jitter y circuito), no urllib3
+        adaptador = HTTPAdapter(pool_connections=CONEXIONES_POR_HOST, pool_maxsize=CONEXIONES_POR_HOST, max_retries=0)
+        self.sesion.mount('https://', adaptador)
+        self.sesion.mount('http://', adaptador)
+        self._circuitos = {}
+        self._metricas = {}
+        self._candado = threading.Lock()
+
+    def configuracion_host(self, host):
+        por_host = self.configuracion if self.configuracion is not None else getattr(settings, 'HTTP_EXTERNO', {})
+        return {**CONFIGURACION_POR_DEFECTO, **por_host.get(host, {})}
+
+    def circuito(self, host):
+        with self._candado:
+            if host not in self._circuitos:
+                config = self.configuracion_host(host)
+                self._circuitos[host] = Circuito(config['fallos_para_abrir'], config['espera_circuito'])
+            return self._circuitos[host]
+
+    def metricas_host(self, host):
+        with self._candado:
+            return self._metricas.setdefault(host, MetricasHost())
+
+    def request(self, metodo, url, **kwargs):
+        """
+        Envía la petición aplicando la política del host. Devuelve la última respuesta
+        (el llamador decide con raise_for_status) o lanza RequestException / CircuitoAbierto.
+        """
+        host = urlsplit(url).hostname or ''
+        config = self.configuracion_host(host)
+        circuito = self.circuito(host)
+        metricas = self.metricas_host(host)
+
+        if not circuito.permitir():
+            metricas.registrar('rechazadas')
+            raise CircuitoAbierto(f'Circuito abierto para {host}')
+
+        kwargs.setdefault('timeout', config['timeout'])
+        intentos = 1 + (config['reintentos'] if metodo.upper() in METODOS_IDEMPOTENTES else 0)
+        for intento in range(intentos):
+            if intento:
+                metricas.registrar('reintentos')
+                # Espera exponencial con jitter completo para no sincronizar los reintentos
+                time.sleep(random.uniform(0, min(config['espera_maxima'], config['espera_base'] * 2 ** (intento - 1))))
+            inicio = time.monotonic()
+            try:
+                response = self.sesion.request(metodo, url, **kwargs)
+            except requests.exceptions.RequestException as error:
+                metricas.registrar('peticiones', time.monotonic() - inicio)
+                metricas.registrar('errores')
+                ultimo_error, response = error, None
+            else:
+                metricas.registrar('peticiones', time.monotonic() - inicio)
+                if response.status_code not in ESTADOS_REINTENTABLES:
+                    if response.status_code >= 500:
+                        metricas.registrar('errores')
+                        circuito.fallo()
+                    else:
+                        circuito.exito()
+                    return response
+                metricas.registrar('errores')
+                ultimo_error = None
+            logger.info('Intento %s/%s fallido contra %s', intento + 1, intentos, host)
+
+        circuito.fallo()
+        if response is not None:
+            return response
+        raise ultimo_error
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def metricas(self):
+        """
+        Métricas y estado del circuito de cada host contactado por este proceso.
+        """
+        with self._candado:
+            hosts = list(self._metricas)
+        return {
+            host: {**self.metricas_host(host).resumen(), 'circuito': self.circuito(host).estado}
+            for host in hosts
+        }
+
+
+# Cliente compartido por todo el proceso (su pool de conexiones se reutiliza entre peticiones)
+cliente_externo = ClienteExterno()
@@ -0,0 +1,305 @@
+"""
+Feeds RSS/Atom y sitemap XML del blog de Radio Hits, y calendario iCalendar de la programación.
+
+El XML se genera en streaming: un generador recorre las entradas con .iterator()
+y va entregando el documento por bloques. Cada bloque renderizado se guarda en
+caché bajo la generación actual del blog (ver app/cache.py), de modo que mientras
+no cambie ninguna entrada los bloques se sirven directamente desde la caché.
+
+Todas las vistas responden a peticiones condicionales (ETag / Last-Modified): si el
+blog no cambió desde la última consulta devuelven 304 sin tocar la base de datos.
+
+El calendario de la programación (programacion.ics) se genera completo una vez por
+generación del grupo 'programacion' y se sirve desde la caché; las aplicaciones de
+calendario que lo consultan cada pocos minutos reciben 304 mientras no cambie.
+"""
+
+import math
+from zoneinfo import ZoneInfo
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from django.utils.text import Truncator
+from django.views.decorators.http import condition, require_GET
+
+from .cache import obtener_generacion, obtener_o_calcular, fecha_generacion
+from .models import BlogEntrada, programacion_semanal
+from .programacion import lineas_ics
+
+FEED_MAX_ENTRADAS = 50  # Entradas más recientes incluidas en los feeds
+SITEMAP_MAX_URLS = 1000  # URLs por cada sitemap del blog
+TAMANO_BLOQUE = 25  # Filas por bloque cacheado
+BLOQUE_TIMEOUT = 60 * 60 * 24  # Los bloques además quedan obsoletos al cambiar la generación
+
+CAMPOS = ('id', 'titulo', 'contenido', 'fecha_publicacion', 'autor_nombre')
+
+# Secciones públicas incluidas en sitemap-paginas.xml
+PAGINAS_PUBLICAS = ['index', 'blog', 'about', 'eventos', 'fiestas', 'latertulia']
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# PETICIONES CONDICIONALES
+
+def _etag_blog(request, *args, **kwargs):
+    return f'blog-{obtener_generacion("blog")}'
+
+
+def _ultima_modificacion_blog(request, *args, **kwargs):
+    return fecha_generacion('blog')
+
+
+condicional_blog = condition(etag_func=_etag_blog, last_modified_func=_ultima_modificacion_blog)
+
+
+def _etag_programacion(request, *args, **kwargs):
+    return f'programacion-{obtener_generacion("programacion")}'
+
+
+def _ultima_modificacion_programacion(request, *args, **kwargs):
+    return fecha_generacion('programacion')
+
+
+condicional_programacion = condition(
+    etag_func=_etag_programacion, last_modified_func=_ultima_modificacion_programacion
+)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# GENERACIÓN POR BLOQUES
+
+def _url_sitio(request):
+    """
+    URL base de las direcciones absolutas del XML: settings.SITIO_URL y no el Host de la
+    petición, que lo elige el cliente (un Host falso quedaría en los bloques cacheados y
+    cada Host distinto crearía su propia copia). freeze la cambia con request.sitio_url.
+    """
+    return getattr(request, 'sitio_url', settings.SITIO_URL).rstrip('/')
+
+
+def _absoluta(request, ruta):
+    return _url_sitio(request) + ruta
+
+
+def _prefijo(request, tipo):
+    """
+    Prefijo de las claves de caché de un documento. Incluye la generación del blog
+    (invalidación) y la URL del sitio (las URLs del XML son absolutas).
+    """
+    return f'radiohits:xml:{tipo}:{obtener_generacion("blog")}:{_url_sitio(request)}'
+
+
+def _bloques(prefijo, queryset, renderizar_fila):
+    """
+    Genera el XML de `queryset` bloque a bloque.
+    Los bloques que ya están en caché se entregan sin consultar la base de datos; ante el
+    primer bloque ausente se continúa desde esa posición con .iterator(), guardando en
+    caché cada bloque nuevo. Un bloque incompleto marca el final del documento.
+    """
+    indice = 0
+    while True:
+        guardado = cache.get(f'{prefijo}:{indice}')
+        if guardado is None:
+            break
+        cantidad, bloque = guardado
+        yield bloque
+        if cantidad < TAMANO_BLOQUE:
+            return
+        indice += 1
+
+    filas = []
+    restantes = queryset.values(*CAMPOS)[indice * TAMANO_BLOQUE:].iterator(chunk_size=TAMANO_BLOQUE)
+    for fila in restantes:
+        filas.append(renderizar_fila(fila))
+        if len(filas) == TAMANO_BLOQUE:
+            bloque = ''.join(filas)
+            cache.set(f'{prefijo}:{indice}', (len(filas), bloque), BLOQUE_TIMEOUT)
+            yield bloque
+            indice, filas = indice + 1, []
+    # El último bloque (aunque esté vacío) se guarda para indicar el final del documento
+    bloque = ''.join(filas)
+    cache.set(f'{prefijo}:{indice}', (len(filas), bloque), BLOQUE_TIMEOUT)
+    yield bloque
+
+
+def _respuesta_xml(contenido, content_type):
+    response = StreamingHttpResponse(contenido, content_type=content_type)
+    response['Cache-Control'] = 'public, max-age=300'
+    return response
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# FEEDS RSS Y ATOM
+
+@require_GET
+@condicional_blog
+def feed_rss(request):
+    """
+    Feed RSS 2.0 con las entradas más recientes del blog.
+    """
+    url_blog = _absoluta(request, reverse('blog'))
+    url_feed = _absoluta(request, reverse('blog_feed_rss'))
+
+    def item(fila):
+        url = _absoluta(request, reverse('entrada_blog', args=[fila['id']]))
+        return (
+            f'<item><title>{escape(fila["titulo"])}</title><link>{escape(url)}</link>'
+            f'<guid isPermaLink="true">{escape(url)}</guid>'
+            f'<pubDate>{rfc2822_date(fila["fecha_publicacion"])}</pubDate>'
+            f'<dc:creator>{escape(fila["autor_nombre"])}</dc:creator>'
+            f'<description>{escape(Truncator(fila["contenido"]).words(60))}</description></item>\n'
+        )
+
+    def documento():
+        yield (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            '<channel><title>Radio Hits - Blog</title>'
+            f'<link>{escape(url_blog)}</link>'
+            '<description>Noticias y novedades de Radio Hits</description><language>es</language>'
+            f'<lastBuildDate>{rfc2822_date(fecha_generacion("blog"))}</lastBuildDate>'
+            f'<atom:link href={quoteattr(url_feed)} rel="self" type="application/rss+xml"/>\n'
+        )
+        queryset = BlogEntrada.objects.order_by('-fecha_publicacion')[:FEED_MAX_ENTRADAS]
+        yield from _bloques(_prefijo(request, 'rss'), queryset, item)
+        yield '</channel></rss>\n'
+
+    return _respuesta_xml(documento(), 'application/rss+xml; charset=utf-8')
+
+
+@require_GET
+@condicional_blog
+def feed_atom(request):
+    """
+    Feed Atom 1.0 con las entradas más recientes del blog.
+    """
+    url_blog = _absoluta(request, reverse('blog'))
+    url_feed = _absoluta(request, reverse('blog_feed_atom'))
+
+    def entry(fila):
+        url = _absoluta(request, reverse('entrada_blog', args=[fila['id']]))
+        fecha = rfc3339_date(fila['fecha_publicacion'])
+        return (
+            f'<entry><title>{escape(fila["titulo"])}</title><link href={quoteattr(url)} rel="alternate"/>'
+            f'<id>{escape(url)}</id><published>{fecha}</published><updated>{fecha}</updated>'
+            f'<author><name>{escape(fila["autor_nombre"])}</name></author>'
+            f'<summary>{escape(Truncator(fila["contenido"]).words(60))}</summary></entry>\n'
+        )
+
+    def documento():
+        yield (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="es">'
+            '<title>Radio Hits - Blog</title>'
+            f'<link href={quoteattr(url_blog)} rel="alternate"/>'
+            f'<link href={quoteattr(url_feed)} rel="self"/>'
+            f'<id>{escape(url_blog)}</id>'
+            f'<updated>{rfc3339_date(fecha_generacion("blog"))}</updated>\n'
+        )
+        queryset = BlogEntrada.objects.order_by('-fecha_publicacion')[:FEED_MAX_ENTRADAS]
+        yield from _bloques(_prefijo(request, 'atom'), queryset, entry)
+        yield '</feed>\n'
+
+    return _respuesta_xml(documento(), 'application/atom+xml; charset=utf-8')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# SITEMAPS
+
+@require_GET
+@condicional_blog
+def sitemap_index(request):
+    """
+    Índice de sitemaps: uno con las secciones públicas y uno por cada bloque de
+    SITEMAP_MAX_URLS entradas del blog.
+    """
+    clave_total = f'radiohits:xml:total:{obtener_generacion("blog")}'
+    total = cache.get(clave_total)
+    if total is None:
+        total = BlogEntrada.objects.count()
+        cache.set(clave_total, total, BLOQUE_TIMEOUT)
+    lastmod = rfc3339_date(fecha_generacion('blog'))
+
+    def documento():
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        )
+        url = _absoluta(request, reverse('sitemap_paginas'))
+        yield f'<sitemap><loc>{escape(url)}</loc></sitemap>\n'
+        for numero in range(max(1, math.ceil(total / SITEMAP_MAX_URLS))):
+            url = _absoluta(request, reverse('sitemap_blog', args=[numero]))
+            yield f'<sitemap><loc>{escape(url)}</loc><lastmod>{lastmod}</lastmod></sitemap>\n'
+        yield '</sitemapindex>\n'
+
+    return _respuesta_xml(documento(), 'application/xml; charset=utf-8')
+
+
+@require_GET
+@condicional_blog
+def sitemap_paginas(request):
+    """
+    Sitemap de las secciones públicas del sitio.
+    """
+    def documento():
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        )
+        for nombre in PAGINAS_PUBLICAS:
+            yield f'<url><loc>{escape(_absoluta(request, reverse(nombre)))}</loc></url>\n'
+        yield '</urlset>\n'
+
+    return _respuesta_xml(documento(), 'application/xml; charset=utf-8')
+
+
+@require_GET
+@condicional_blog
+def sitemap_blog(request, numero):
+    """
+    Sitemap de un bloque de SITEMAP_MAX_URLS entradas del blog (ordenadas por id).
+    """
+    def url(fila):
+        loc = _absoluta(request, reverse('entrada_blog', args=[fila['id']]))
+        return f'<url><loc>{escape(loc)}</loc><lastmod>{fila["fecha_publicacion"]:%Y-%m-%d}</lastmod></url>\n'
+
+    def documento():
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        )
+        inicio = numero * SITEMAP_MAX_URLS
+        queryset = BlogEntrada.objects.order_by('id')[inicio:inicio + SITEMAP_MAX_URLS]
+        yield from _bloques(_prefijo(request, f'sitemap-{numero}'), queryset, url)
+        yield '</urlset>\n'
+
+    return _respuesta_xml(documento(), 'application/xml; charset=utf-8')
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# CALENDARIO DE LA PROGRAMACIÓN
+
+def _calendario_programacion():
+    """
+    Calendario completo de la semana en la zona horaria de la radio (America/Santiago).
+    DTSTAMP es la fecha de la generación, así el documento no cambia mientras ella no cambie.
+    """
+    return ''.join(lineas_ics(
+        programacion_semanal(), generado=fecha_generacion('programacion'), zona=ZoneInfo(settings.TIME_ZONE)
+    ))
+
+
+@require_GET
+@condicional_programacion
+def programacion_ics(request):
+    """
+    Calendario iCalendar público con la programación semanal (eventos que se repiten cada semana).
+    """
+    calendario = obtener_o_calcular('programacion', 'ics', _calendario_programacion, timeout=BLOQUE_TIMEOUT)
+    response = HttpResponse(calendario, content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = 'inline; filename="programacion-radio-hits.ics"'
+    response['Cache-Control'] = 'public, max-age=300'
+    return response
@@ -1,4 +1,5 @@
 from django import forms
+from django.utils.functional import cached_property
 from .models import (
     EntradaIndex,
     BlogEntrada,
@@ -8,8 +9,10 @@ from .models import (
     Jueves,
     Viernes,
     Sabado,
-    Domingo
+    Domingo,
+    PROGRAMACION_POR_DIA
 )
+from .programacion import CAMPOS_PROGRAMA, DIA_POR_MODELO, FORMATOS, cargar_semana, validar_semana
 
 # FORMULARIO PARA ENTRADA DE INFORMACIÓN EN EL ÍNDICE DE RADIO HITS
 class EntradaIndexForm(forms.ModelForm):
@@ -52,7 +55,34 @@ class BlogEntradaForm(forms.ModelForm):
 # ----------------------------------------------------------------------------------------------------------------------------------------------------
 # FORMULARIOS PARA LA PROGRAMACIÓN SEMANAL
 
-class LunesForm(forms.ModelForm):
+class ProgramaForm(forms.ModelForm):
+    """
+    Base de los formularios de cada día: valida el programa contra la semana completa
+    (solapamientos con cualquier día, incluidos los programas que cruzan la medianoche).
+    """
+
+    def __init__(self, *args, validar_semana=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        # El editor en cuadrícula lo desactiva: valida la semana completa una sola vez en memoria
+        self.validar_semana = validar_semana
+
+    def clean(self):
+        datos = super().clean()
+        if not self.validar_semana or any(campo not in datos for campo in CAMPOS_PROGRAMA):
+            return datos  # Ya hay errores en los campos
+        modelo = self._meta.model
+        dia = DIA_POR_MODELO[modelo]
+        candidato = modelo(pk=self.instance.pk, **{campo: datos[campo] for campo in CAMPOS_PROGRAMA})
+        semana = cargar_semana()
+        semana[dia] = [
+            programa for programa in semana[dia] if self.instance.pk is None or programa.pk != self.instance.pk
+        ] + [candidato]
+        errores = validar_semana(semana).errores_de(candidato)
+        if errores:
+            raise forms.ValidationError(errores)
+        return datos
+
+class LunesForm(ProgramaForm):
     class Meta:
         model = Lunes
         fields = ['hora_inicio', 'hora_fin', 'nombre_programa']
@@ -62,7 +92,7 @@ class LunesForm(forms.ModelForm):
             'nombre_programa': forms.TextInput(attrs={'class': 'w-full bg-gray-900 text-white border border-gray-700 rounded-lg px-4 py-2 shadow-sm focus:ring-blue-500 focus:border-blue-500'}),
         }
 
-class MartesForm(forms.ModelForm):
+class MartesForm(ProgramaForm):
     class Meta:
         model = Martes
         fields = ['hora_inicio', 'hora_fin', 'nombre_programa']
@@ -72,7 +102,7 @@ class MartesForm(forms.ModelForm):
             'nombre_programa': forms.TextInput(attrs={'class': 'w-full bg-gray-900 text-white border border-gray-700 rounded-lg px-4 py-2 shadow-sm focus:ring-blue-500 focus:border-blue-500'}),
         }
 
-class MiercolesForm(forms.ModelForm):
+class MiercolesForm(ProgramaForm):
     class Meta:
         model = Miercoles
         fields = ['hora_inicio', 'hora_fin', 'nombre_programa']
@@ -82,7 +112,7 @@ class MiercolesForm(forms.ModelForm):
             'nombre_programa': forms.TextInput(attrs={'class': 'w-full bg-gray-900 text-white border border-gray-700 rounded-lg px-4 py-2 shadow-sm focus:ring-blue-500 focus:border-blue-500'}),
         }
 
-class JuevesForm(forms.ModelForm):
+class JuevesForm(ProgramaForm):
     class Meta:
         model = Jueves
         fields = ['hora_inicio', 'hora_fin', 'nombre_programa']
@@ -92,7 +122,7 @@ class JuevesForm(forms.ModelForm):
             'nombre_programa': forms.TextInput(attrs={'class': 'w-full bg-gray-900 text-white border border-gray-700 rounded-lg px-4 py-2 shadow-sm focus:ring-blue-500 focus:border-blue-500'}),
         }
 
-class ViernesForm(forms.ModelForm):
+class ViernesForm(ProgramaForm):
     class Meta:
         model = Viernes
         fields = ['hora_inicio', 'hora_fin', 'nombre_programa']
@@ -102,7 +132,7 @@ class ViernesForm(forms.ModelForm):
             'nombre_programa': forms.TextInput(attrs={'class': 'w-full bg-gray-900 text-white border border-gray-700 rounded-lg px-4 py-2 shadow-sm focus:ring-blue-500 focus:border-blue-500'}),
         }
 
-class SabadoForm(forms.ModelForm):
+class SabadoForm(ProgramaForm):
     class Meta:
         model = Sabado
         fields = ['hora_inicio', 'hora_fin', 'nombre_programa']
@@ -112,7 +142,7 @@ class SabadoForm(forms.ModelForm):
             'nombre_programa': forms.TextInput(attrs={'class': 'w-full bg-gray-900 text-white border border-gray-700 rounded-lg px-4 py-2 shadow-sm focus:ring-blue-500 focus:border-blue-500'}),
         }
 
-class DomingoForm(forms.ModelForm):
+class DomingoForm(ProgramaForm):
     class Meta:
         model = Domingo
         fields = ['hora_inicio', 'hora_fin', 'nombre_programa']
@@ -120,4 +150,211 @@ class DomingoForm(forms.ModelForm):
             'hora_inicio': forms.TimeInput(attrs={'type': 'time', 'class': 'w-full bg-gray-900 text-white border border-gray-700 rounded-lg px-4 py-2 shadow-sm focus:ring-blue-500 focus:border-blue-500'}),
             'hora_fin': forms.TimeInput(attrs={'type': 'time', 'class': 'w-full bg-gray-900 text-white border border-gray-700 rounded-lg px-4 py-2 shadow-sm focus:ring-blue-500 focus:border-blue-500'}),
             'nombre_programa': forms.TextInput(attrs={'class': 'w-full bg-gray-900 text-white border border-gray-700 rounded-lg px-4 py-2 shadow-sm focus:ring-blue-500 focus:border-blue-500'}),
-        }
\ No newline at end of file
+        }
+
+# ----------------------------------------------------------------------------------------------------------------------------------------------------
+# FORMULARIOS PARA LAS ACCIONES MASIVAS DE LAS LISTAS DE ADMINISTRACIÓN
+
+class SeleccionMultipleField(forms.Field):
+    """
+    Valores marcados en las casillas de selección de una lista (name="ids"), sin repetir.
+    """
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        return list(dict.fromkeys(value or []))
+
+    def validate(self, value):
+        super().validate(value)
+        if not value:
+            raise forms.ValidationError('Selecciona al menos un elemento.')
+
+
+class AccionMasivaEntradasForm(forms.Form):
+    """
+    Acción sobre varias entradas (blog o índice): eliminar o cambiar su fecha.
+    """
+    ACCIONES = [('eliminar', 'Eliminar'), ('cambiar_fecha', 'Cambiar fecha')]
+
+    accion = forms.ChoiceField(choices=ACCIONES)
+    ids = SeleccionMultipleField()
+    fecha = forms.DateTimeField(required=False, input_formats=['%Y-%m-%dT%H:%M'])
+
+    def clean_ids(self):
+        try:
+            return [int(valor) for valor in self.cleaned_data['ids']]
+        except ValueError:
+            raise forms.ValidationError('Selección inválida.')
+
+    def clean(self):
+        datos = super().clean()
+        if datos.get('accion') == 'cambiar_fecha' and not datos.get('fecha'):
+            self.add_error('fecha', 'Indica la nueva fecha.')
+        return datos
+
+
+class AccionMasivaProgramasForm(forms.Form):
+    """
+    Acción sobre varios programas de la semana: eliminar o moverlos a otro día.
+    Cada casilla envía "dia:id" (por ejemplo "lunes:12").
+    """
+    ACCIONES = [('eliminar', 'Eliminar'), ('mover', 'Mover a otro día')]
+
+    accion = forms.ChoiceField(choices=ACCIONES)
+    ids = SeleccionMultipleField()
+    dia_destino = forms.ChoiceField(choices=[(dia, dia) for dia in PROGRAMACION_POR_DIA], required=False)
+
+    def clean_ids(self):
+        """
+        Agrupa la selección por día: {'lunes': [12, 15], 'martes': [3]}.
+        """
+        por_dia = {}
+        for valor in self.cleaned_data['ids']:
+            dia, _, pk = valor.partition(':')
+            if dia not in PROGRAMACION_POR_DIA or not pk.isdigit():
+                raise forms.ValidationError('Selección inválida.')
+            por_dia.setdefault(dia, []).append(int(pk))
+        return por_dia
+
+    def clean(self):
+        datos = super().clean()
+        if datos.get('accion') == 'mover' and not datos.get('dia_destino'):
+            self.add_error('dia_destino', 'Indica el día de destino.')
+        return datos
+
+# ----------------------------------------------------------------------------------------------------------------------------------------------------
+# EDITOR EN CUADRÍCULA DE LA PROGRAMACIÓN (un formset por día)
+
+FORMULARIOS_POR_DIA = {
+    'lunes': LunesForm,
+    'martes': MartesForm,
+    'miercoles': MiercolesForm,
+    'jueves': JuevesForm,
+    'viernes': ViernesForm,
+    'sabado': SabadoForm,
+    'domingo': DomingoForm,
+}
+
+
+class ProgramaExistenteField(forms.ModelChoiceField):
+    """
+    Campo oculto con el id de una fila existente. Lo busca entre los programas del
+    queryset que el formset ya leyó, en lugar de hacer una consulta por fila como
+    ModelChoiceField.
+    """
+
+    def __init__(self, formset, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.formset = formset
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            programa = self.formset.programas_existentes.get(self.queryset.model._meta.pk.to_python(value))
+        except forms.ValidationError:
+            programa = None
+        if programa is None:
+            raise forms.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+        return programa
+
+
+class ProgramacionDiaFormSet(forms.BaseModelFormSet):
+    """
+    Todas las filas de un día. No guarda fila por fila: cambios() entrega lo que hay que
+    insertar, actualizar y eliminar para aplicarlo en bloque (ver app/programacion.py).
+    Los solapamientos se validan en la vista, con la semana completa ya editada.
+    """
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        nombre = self.model._meta.pk.name
+        campo = form.fields[nombre]
+        form.fields[nombre] = ProgramaExistenteField(
+            self, campo.queryset, required=campo.required, widget=campo.widget
+        )
+
+    def get_form_kwargs(self, index):
+        return {**super().get_form_kwargs(index), 'validar_semana': False}
+
+    @cached_property
+    def programas_existentes(self):
+        """
+        Programas del queryset del formset por id; get_queryset() se evalúa una sola vez.
+        """
+        return {programa.pk: programa for programa in self.get_queryset()}
+
+    def programas(self):
+        """
+        Programas que tendrá el día después de guardar (existentes, modificados y nuevos).
+        """
+        return [
+            form.instance for form in self.forms
+            if not self._should_delete_form(form) and (form.instance.pk is not None or form.has_changed())
+        ]
+
+    def agregar_error(self, mensaje):
+        self.non_form_errors().append(mensaje)
+
+    def cambios(self):
+        """
+        Devuelve (nuevos, modificados, ids_eliminados) con las instancias ya construidas
+        a partir de los datos validados. Las filas sin cambios no se tocan.
+        """
+        nuevos, modificados, eliminados = [], [], []
+        for form in self.forms:
+            existente = form.instance.pk is not None
+            if self._should_delete_form(form):
+                if existente:
+                    eliminados.append(form.instance.pk)
+            elif form.has_changed():
+                (modificados if existente else nuevos).append(form.instance)
+        return nuevos, modificados, eliminados
+
+
+def programacion_dia_formset(dia, data=None):
+    """
+    Formset del editor en cuadrícula para un día, con una fila vacía para agregar programas.
+    """
+    modelo = PROGRAMACION_POR_DIA[dia]
+    FormSet = forms.modelformset_factory(
+        modelo, form=FORMULARIOS_POR_DIA[dia], formset=ProgramacionDiaFormSet,
+        fields=CAMPOS_PROGRAMA, extra=1, can_delete=True,
+    )
+    # Se lee directamente de la base de datos (sin caché): se editan los datos actuales
+    return FormSet(data, queryset=modelo.objects.order_by('hora_inicio', 'pk'), prefix=dia)
+
+# ----------------------------------------------------------------------------------------------------------------------------------------------------
+# FORMULARIOS PARA IMPORTAR Y COPIAR LA PROGRAMACIÓN (solo personal)
+
+class ImportarProgramacionForm(forms.Form):
+    """
+    Archivo .csv o .ics con la programación de la semana.
+    """
+    archivo = forms.FileField()
+    combinar = forms.BooleanField(required=False)  # Sumar a la programación actual en vez de reemplazarla
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data['archivo']
+        formato = archivo.name.rpartition('.')[2].lower()
+        if formato not in FORMATOS:
+            raise forms.ValidationError('El archivo debe ser .csv o .ics.')
+        archivo.formato = formato
+        return archivo
+
+
+class CopiarDiaForm(forms.Form):
+    """
+    Copia la programación de un día a otros días de la semana.
+    """
+    DIAS = [(dia, dia) for dia in PROGRAMACION_POR_DIA]
+
+    origen = forms.ChoiceField(choices=DIAS)
+    destinos = forms.MultipleChoiceField(choices=DIAS)
+    combinar = forms.BooleanField(required=False)
+
+    def clean(self):
+        datos = super().clean()
+        if datos.get('origen') and datos.get('destinos') == [datos['origen']]:
+            self.add_error('destinos', 'Elige al menos un día distinto del de origen.')
+        return datos
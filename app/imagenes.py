@@ -0,0 +1,100 @@
+"""
+Metadatos de las imágenes subidas: dimensiones, color dominante y miniatura LQIP.
+
+Las dimensiones las escribe Django en imagen_ancho e imagen_alto al asignar la imagen
+(width_field y height_field del campo). El color y la miniatura se calculan una sola
+vez, al guardar una entrada con una imagen nueva (señal pre_save), y quedan en
+imagen_color e imagen_lqip. Si la imagen no se puede leer se marca imagen_ilegible,
+para no volver a intentarlo en cada guardado ni al cargar la fila (ver CampoImagen en
+app/models.py); una imagen nueva borra la marca.
+
+Las plantillas usan estos datos para reservar el espacio de la imagen (width/height)
+y mostrar de fondo el color y la miniatura desenfocada mientras carga la imagen real,
+sin abrir ningún archivo durante la petición (ver templatetags/imagenes.py).
+
+La miniatura LQIP ("low quality image placeholder") es un JPEG de LADO_LQIP píxeles
+de lado mayor, desenfocado, embebido como data URI (unos cientos de bytes).
+
+El comando completar_imagenes calcula los metadatos de las imágenes ya existentes.
+"""
+
+import base64
+import io
+import logging
+
+from .importaciones import perezoso
+
+# Pillow se importa al procesar la primera imagen, no al iniciar el worker (ver app/importaciones.py)
+Image = perezoso('PIL.Image')
+ImageFilter = perezoso('PIL.ImageFilter')
+
+LADO_MUESTRA = 64  # Lado de la copia reducida sobre la que se calcula el color dominante
+LADO_LQIP = 16
+CALIDAD_LQIP = 50
+COLORES_PALETA = 5  # El color dominante es el más frecuente de una paleta de este tamaño
+
+# Columnas que se guardan junto con la imagen (las dos primeras las calcula Django)
+CAMPOS_METADATOS = ['imagen_ancho', 'imagen_alto', 'imagen_color', 'imagen_lqip', 'imagen_ilegible']
+
+logger = logging.getLogger(__name__)
+
+
+def color_dominante(muestra):
+    """
+    Color más frecuente ('#rrggbb') de una imagen RGB pequeña, tras reducirla a una paleta.
+    """
+    paleta = muestra.quantize(colors=COLORES_PALETA, method=Image.Quantize.MEDIANCUT)
+    _, indice = max(paleta.getcolors())
+    rojo, verde, azul = paleta.getpalette()[indice * 3:indice * 3 + 3]
+    return f'#{rojo:02x}{verde:02x}{azul:02x}'
+
+
+def miniatura_lqip(muestra):
+    """
+    Data URI de una miniatura JPEG desenfocada.
+    """
+    miniatura = muestra.copy()
+    miniatura.thumbnail((LADO_LQIP, LADO_LQIP))
+    miniatura = miniatura.filter(ImageFilter.GaussianBlur(1))
+    salida = io.BytesIO()
+    miniatura.save(salida, format='JPEG', quality=CALIDAD_LQIP, optimize=True)
+    return 'data:image/jpeg;base64,' + base64.b64encode(salida.getvalue()).decode('ascii')
+
+
+def metadatos(archivo):
+    """
+    {'imagen_color', 'imagen_lqip'} de un archivo de imagen.
+    """
+    archivo.seek(0)
+    with Image.open(archivo) as imagen:
+        # En JPEG, draft() decodifica directamente a una escala reducida (mucho más rápido)
+        imagen.draft('RGB', (LADO_MUESTRA, LADO_MUESTRA))
+        muestra = imagen.convert('RGB')
+    muestra.thumbnail((LADO_MUESTRA, LADO_MUESTRA))
+    archivo.seek(0)
+    return {
+        'imagen_color': color_dominante(muestra),
+        'imagen_lqip': miniatura_lqip(muestra),
+    }
+
+
+def asignar_metadatos(instance):
+    """
+    Copia en `instance` el color y la miniatura de su imagen (o los vacía si no tiene).
+    Una imagen ilegible deja los metadatos vacíos (la plantilla la muestra sin marcador)
+    y queda marcada como ilegible.
+    """
+    valores = {'imagen_color': '', 'imagen_lqip': '', 'imagen_ilegible': False}
+    if instance.imagen:
+        try:
+            if instance.imagen._committed:
+                with instance.imagen.open('rb'):
+                    valores.update(metadatos(instance.imagen.file))
+            else:
+                # Subida recién recibida: se lee sin cerrarla, el almacenamiento la guarda después
+                valores.update(metadatos(instance.imagen.file))
+        except (OSError, Image.DecompressionBombError):  # UnidentifiedImageError es un OSError
+            logger.warning('No se pudieron leer los metadatos de %s', instance.imagen.name, exc_info=True)
+            valores['imagen_ilegible'] = True
+    for campo, valor in valores.items():
+        setattr(instance, campo, valor)
@@ -0,0 +1,47 @@
+"""
+Importación diferida de módulos pesados.
+
+NumPy (related posts) y Pillow (metadatos de imágenes) solo se usan al guardar entradas o
+en comandos de mantenimiento, pero app/signals.py los importaba al iniciar cada worker
+(más de 70 ms entre los dos). perezoso() devuelve un objeto que importa el módulo real
+al usar su primer atributo, así el costo lo paga solo quien lo necesita.
+
+    np = perezoso('numpy')  # None si no está instalado
+    np.zeros(3)             # Aquí se importa numpy
+
+El informe de tiempos de importación está en el comando warmup (--importaciones).
+"""
+
+import importlib
+import importlib.util
+
+
+class ModuloPerezoso:
+    """
+    Representante de un módulo que se importa la primera vez que se lee un atributo.
+    importlib.import_module ya serializa las importaciones simultáneas del mismo módulo.
+    """
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nombre)
+        return getattr(self._modulo, atributo)
+
+    def __repr__(self):
+        estado = 'cargado' if self._modulo is not None else 'sin cargar'
+        return f'<módulo perezoso {self._nombre} ({estado})>'
+
+
+def perezoso(nombre):
+    """
+    ModuloPerezoso de `nombre`, o None si su paquete no está instalado (dependencias opcionales).
+    Solo se busca el paquete de primer nivel: find_spec('PIL.Image') importaría PIL para
+    encontrar el submódulo. Si el submódulo no existe, el error aparece al usarlo.
+    """
+    if importlib.util.find_spec(nombre.partition('.')[0]) is None:
+        return None
+    return ModuloPerezoso(nombre)
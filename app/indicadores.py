@@ -0,0 +1,245 @@
+"""
+Histórico local de los indicadores económicos (dólar, euro, UF y UTM).
+
+Cada consulta exitosa a mindicador.cl guarda el valor del día en ValorIndicador, y el
+comando importar_indicadores carga años anteriores desde los archivos JSON de la API.
+
+Para los gráficos, la serie de cada indicador se carga una sola vez por proceso en
+arreglos compactos (array de días y de valores, ordenados por fecha) junto con sus
+reducciones semanal y mensual. Las consultas por rango usan búsqueda binaria sobre
+esos arreglos, sin volver a la base de datos. La serie se recarga cuando cambia la
+generación 'indicadores' (ver app/cache.py), es decir, cuando se guardan valores nuevos.
+"""
+
+import logging
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+from django.db import DatabaseError, close_old_connections, connection
+from django.http import Http404, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
+
+from .cache import obtener_generacion, fecha_generacion
+from .models import ValorIndicador
+
+INDICADORES = [codigo for codigo, _ in ValorIndicador.INDICADORES]
+
+# Rangos disponibles en el endpoint: días hacia atrás y resolución de los puntos
+RANGOS = {
+    '30d': (30, 'diaria'),
+    '90d': (90, 'diaria'),
+    '1y': (365, 'semanal'),
+    '5y': (365 * 5, 'mensual'),
+}
+RANGO_POR_DEFECTO = '30d'
+
+LOTE_GUARDADO = 1000  # Filas por INSERT al importar históricos
+SERIE_MAX_AGE = 60 * 10  # Cache-Control del endpoint (los valores cambian una vez al día)
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# GUARDADO
+
+def guardar_valores(filas):
+    """
+    Inserta o actualiza (indicador, fecha, valor) con un upsert por lotes.
+    Solo escribe los valores nuevos o distintos de los guardados: la API se consulta a
+    menudo y casi siempre repite el valor del día, que no debe invalidar las series.
+    Devuelve el número de filas procesadas.
+    """
+    valores = {
+        (indicador, fecha): valor
+        for indicador, fecha, valor in filas
+        if indicador in INDICADORES and valor is not None
+    }
+    if not valores:
+        return 0
+    indicadores = {indicador for indicador, _ in valores}
+    fechas = [fecha for _, fecha in valores]
+    guardados = ValorIndicador.objects.filter(
+        indicador__in=indicadores, fecha__range=(min(fechas), max(fechas))
+    ).values_list('indicador', 'fecha', 'valor')
+    for indicador, fecha, valor in guardados.iterator():
+        if valores.get((indicador, fecha)) == valor:
+            del valores[indicador, fecha]
+
+    objetos = [
+        ValorIndicador(indicador=indicador, fecha=fecha, valor=valor) for (indicador, fecha), valor in valores.items()
+    ]
+    if objetos:
+        opciones = {'update_conflicts': True, 'update_fields': ['valor']}
+        if connection.features.supports_update_conflicts_with_target:
+            # PostgreSQL y SQLite necesitan la restricción del conflicto; MySQL usa ON DUPLICATE KEY
+            opciones['unique_fields'] = ['indicador', 'fecha']
+        ValorIndicador.objects.bulk_create(objetos, batch_size=LOTE_GUARDADO, **opciones)
+    return len(fechas)
+
+
+def fecha_de(texto):
+    """
+    Fecha de un valor de mindicador.cl ('2025-07-18T04:00:00.000Z').
+    La API publica cada valor a medianoche de Chile, así que la parte de fecha es el día correcto.
+    """
+    return date.fromisoformat(texto[:10])
+
+
+def registrar_consulta(data):
+    """
+    Guarda los valores de una respuesta de https://mindicador.cl/api.
+    Un error al guardar no impide mostrar los indicadores. Se llama desde los hilos de
+    APIs externas, así que al terminar libera la conexión a la base de datos como lo
+    haría el fin de una petición.
+    """
+    try:
+        guardar_valores(
+            (codigo, fecha_de(data[codigo]['fecha']), data[codigo]['valor'])
+            for codigo in INDICADORES
+            if codigo in data and data[codigo].get('fecha')
+        )
+    except DatabaseError:
+        logger.warning('No se pudo guardar el histórico de indicadores', exc_info=True)
+    finally:
+        if not connection.in_atomic_block:
+            close_old_connections()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# SERIES EN MEMORIA
+
+class Serie:
+    """
+    Serie ordenada de (día, valor) en dos arreglos paralelos: ordinales de fecha y valores.
+    """
+
+    def __init__(self, dias=None, valores=None):
+        self.dias = dias if dias is not None else array('l')
+        self.valores = valores if valores is not None else array('d')
+
+    def __len__(self):
+        return len(self.dias)
+
+    def rango(self, desde, hasta):
+        """
+        Puntos entre `desde` y `hasta` (fechas, ambos incluidos) como [['AAAA-MM-DD', valor], ...].
+        """
+        inicio = bisect_left(self.dias, desde.toordinal())
+        fin = bisect_right(self.dias, hasta.toordinal())
+        return [
+            [date.fromordinal(self.dias[i]).isoformat(), round(self.valores[i], 2)]
+            for i in range(inicio, fin)
+        ]
+
+    def reducir(self, periodo):
+        """
+        Promedio de los valores por periodo. `periodo(fecha)` devuelve la fecha que representa
+        al periodo (por ejemplo el lunes de la semana o el primer día del mes).
+        """
+        reducida = Serie()
+        actual, suma, cantidad = None, 0.0, 0
+        for dia, valor in zip(self.dias, self.valores):
+            clave = periodo(date.fromordinal(dia)).toordinal()
+            if clave != actual and cantidad:
+                reducida.dias.append(actual)
+                reducida.valores.append(suma / cantidad)
+                suma, cantidad = 0.0, 0
+            actual = clave
+            suma += valor
+            cantidad += 1
+        if cantidad:
+            reducida.dias.append(actual)
+            reducida.valores.append(suma / cantidad)
+        return reducida
+
+
+class SerieIndicador:
+    """
+    Serie diaria de un indicador con sus reducciones semanal y mensual precalculadas.
+    """
+
+    def __init__(self, puntos):
+        self.diaria = Serie()
+        for fecha, valor in puntos:
+            self.diaria.dias.append(fecha.toordinal())
+            self.diaria.valores.append(valor)
+        self.semanal = self.diaria.reducir(lambda fecha: fecha - timedelta(days=fecha.weekday()))
+        self.mensual = self.diaria.reducir(lambda fecha: fecha.replace(day=1))
+
+    @property
+    def ultima_fecha(self):
+        return date.fromordinal(self.diaria.dias[-1]) if len(self.diaria) else None
+
+    def rango(self, desde, hasta, resolucion='diaria'):
+        return getattr(self, resolucion).rango(desde, hasta)
+
+
+# Series cargadas en este proceso: {indicador: (generación, SerieIndicador)}
+_series = {}
+_candado_series = threading.Lock()
+
+
+def obtener_serie(indicador):
+    """
+    Serie en memoria del indicador, recargada desde la base de datos solo cuando cambió
+    la generación 'indicadores'.
+    """
+    generacion = obtener_generacion('indicadores')
+    cargada = _series.get(indicador)
+    if cargada and cargada[0] == generacion:
+        return cargada[1]
+    with _candado_series:
+        cargada = _series.get(indicador)
+        if cargada and cargada[0] == generacion:
+            return cargada[1]
+        puntos = (
+            ValorIndicador.objects.filter(indicador=indicador)
+            .order_by('fecha')
+            .values_list('fecha', 'valor')
+            .iterator(chunk_size=2000)
+        )
+        serie = SerieIndicador(puntos)
+        _series[indicador] = (generacion, serie)
+        return serie
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# ENDPOINT JSON PARA LOS GRÁFICOS
+
+def _etag_serie(request, codigo):
+    return f'indicadores-{obtener_generacion("indicadores")}-{codigo}-{request.GET.get("rango", RANGO_POR_DEFECTO)}'
+
+
+def _ultima_modificacion_serie(request, codigo):
+    return fecha_generacion('indicadores')
+
+
+@require_GET
+@condition(etag_func=_etag_serie, last_modified_func=_ultima_modificacion_serie)
+def serie_json(request, codigo):
+    """
+    Puntos de un indicador para dibujar un gráfico: ?rango=30d|90d (diarios), 1y (semanales)
+    o 5y (mensuales). El rango termina en el último valor disponible.
+    """
+    if codigo not in INDICADORES:
+        raise Http404('Indicador desconocido')
+    rango = request.GET.get('rango', RANGO_POR_DEFECTO)
+    if rango not in RANGOS:
+        rango = RANGO_POR_DEFECTO
+    dias, resolucion = RANGOS[rango]
+
+    serie = obtener_serie(codigo)
+    hasta = serie.ultima_fecha
+    puntos = serie.rango(hasta - timedelta(days=dias), hasta, resolucion) if hasta else []
+
+    response = JsonResponse({
+        'indicador': codigo,
+        'rango': rango,
+        'resolucion': resolucion,
+        'puntos': puntos,
+    })
+    patch_cache_control(response, public=True, max_age=SERIE_MAX_AGE)
+    return response
@@ -0,0 +1,217 @@
+"""
+Límite de peticiones con cubetas de tokens (token bucket) guardadas en la caché compartida.
+
+Cada regla de settings.LIMITES_PETICIONES se aplica a los nombres de ruta que coinciden
+con su patrón ('login', 'add_*', ...) y da a cada visitante (por IP o por usuario) una
+cubeta de `capacidad` tokens que se rellena a `por_minuto` tokens por minuto. Cada
+petición gasta un token; sin tokens, LimitePeticionesMiddleware responde 429 con
+Retry-After (los segundos que faltan para el siguiente token). Todas las rutas de una
+regla comparten la cubeta: crear un programa del lunes y uno del martes gasta de la misma.
+
+La cubeta se guarda como (tokens, instante de la última actualización) y se rellena
+al consultarla, así no hace falta ningún proceso periódico. La lectura y escritura
+deben ser atómicas entre workers:
+
+  - Con Redis (django.core.cache.backends.redis.RedisCache) todo ocurre en un script
+    Lua: un solo viaje de ida y vuelta, atómico en el servidor.
+  - Con memcached o la caché de base de datos la cubeta se protege con un candado
+    cache.add() con token propio, como el single-flight de app/cache.py. Si el candado
+    no se consigue a tiempo la petición se rechaza (429): una ráfaga simultánea es
+    justo lo que el límite debe frenar. No hay además un candado de hilos: cada cubeta
+    tiene su propio candado en la caché y las peticiones de otros visitantes no esperan.
+  - LocMemCache es de cada proceso, así que basta un candado de hilos por cubeta
+    (CANDADOS_LOCALES candados repartidos por la clave, no uno para todo el proceso).
+  - En FileBasedCache cache.add() no es atómico, así que el límite no se cumple con
+    peticiones simultáneas. En producción la caché es Redis (core/settings_produccion.py)
+    y manage.py check avisa si se configura otra cosa (check --deploy lo da como error,
+    ver app/checks.py).
+
+Los visitantes se identifican por ip_cliente(): detrás de nginx REMOTE_ADDR es la del
+proxy, así que para las direcciones de settings.PROXIES_CONFIABLES se usa la última
+dirección no confiable de X-Forwarded-For.
+"""
+
+import fnmatch
+import functools
+import ipaddress
+import math
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+CANDADO_TIMEOUT = 1  # Segundos; el candado solo cubre una lectura y una escritura
+INTENTOS_CANDADO = 10
+ESPERA_CANDADO = 0.001
+
+# KEYS[1]: cubeta. ARGV: capacidad, tokens por segundo, ahora (s), expiración (ms).
+# Devuelve {1 si se permite, segundos de espera como texto (Lua truncaría un número a entero)}.
+SCRIPT_REDIS = """
+local capacidad = tonumber(ARGV[1])
+local tasa = tonumber(ARGV[2])
+local ahora = tonumber(ARGV[3])
+local estado = redis.call('HMGET', KEYS[1], 'tokens', 'instante')
+local tokens = tonumber(estado[1]) or capacidad
+local instante = tonumber(estado[2]) or ahora
+tokens = math.min(capacidad, tokens + math.max(0, ahora - instante) * tasa)
+local permitido = 0
+local espera = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    permitido = 1
+else
+    espera = (1 - tokens) / tasa
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'instante', tostring(ahora))
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return {permitido, tostring(espera)}
+"""
+
+CANDADOS_LOCALES = 64  # Candados de hilos de LocMemCache; dos cubetas comparten uno solo si coinciden en el hash
+
+# Backends cuyo cache.add() es atómico entre procesos (más LocMemCache, que no se comparte)
+BACKENDS_ATOMICOS = (
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django.core.cache.backends.db.DatabaseCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+_candados_locales = [threading.Lock() for _ in range(CANDADOS_LOCALES)]
+
+
+class Regla:
+    """
+    Una entrada de settings.LIMITES_PETICIONES.
+    """
+
+    def __init__(self, patron, capacidad, por_minuto, clave='ip', metodos=None):
+        self.patron = patron
+        self.capacidad = capacidad
+        self.tasa = por_minuto / 60  # Tokens por segundo
+        self.clave = clave  # 'ip' o 'usuario' (los anónimos se identifican por IP)
+        self.metodos = {metodo.upper() for metodo in metodos} if metodos else None
+        # Tiempo en que una cubeta vacía vuelve a llenarse: después ya no hace falta guardarla
+        self.expiracion = math.ceil(capacidad / self.tasa) + 1
+
+    def aplica(self, metodo):
+        return self.metodos is None or metodo in self.metodos
+
+
+def cargar_reglas():
+    return [Regla(patron, **opciones) for patron, opciones in getattr(settings, 'LIMITES_PETICIONES', {}).items()]
+
+
+@functools.lru_cache(maxsize=8)
+def _redes_confiables(proxies):
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def _es_confiable(direccion, redes):
+    try:
+        ip = ipaddress.ip_address(direccion)
+    except ValueError:
+        return False
+    return any(ip in red for red in redes)
+
+
+def ip_cliente(request):
+    """
+    Dirección del visitante. Si la petición llega desde un proxy de
+    settings.PROXIES_CONFIABLES, se recorre X-Forwarded-For de derecha a izquierda
+    saltando los proxies confiables: las entradas de más a la izquierda las escribe
+    el propio cliente y no sirven para identificarlo.
+    """
+    remota = request.META.get('REMOTE_ADDR', '')
+    redes = _redes_confiables(tuple(getattr(settings, 'PROXIES_CONFIABLES', ())))
+    if not redes or not _es_confiable(remota, redes):
+        return remota
+    reenviadas = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+    for direccion in reversed(reenviadas):
+        if not _es_confiable(direccion, redes):
+            return direccion
+    return reenviadas[0] if reenviadas else remota
+
+
+def regla_para(reglas, nombre_ruta):
+    """
+    Primera regla cuyo patrón coincide con el nombre de la ruta (o None).
+    """
+    for regla in reglas:
+        if fnmatch.fnmatchcase(nombre_ruta, regla.patron):
+            return regla
+    return None
+
+
+def _rellenar(regla, estado, ahora):
+    tokens, instante = estado if estado is not None else (regla.capacidad, ahora)
+    tokens = min(regla.capacidad, tokens + max(0, ahora - instante) * regla.tasa)
+    if tokens >= 1:
+        return tokens - 1, True, 0
+    return tokens, False, (1 - tokens) / regla.tasa
+
+
+def _cliente_redis(cache, clave):
+    """
+    Cliente redis-py del backend, o None si esta versión de Django no lo expone
+    (get_client es interno): en ese caso se usa el camino con candado.
+    """
+    obtener = getattr(getattr(cache, '_cache', None), 'get_client', None)
+    return obtener(clave, write=True) if callable(obtener) else None
+
+
+def _consumir_redis(cache, clave, regla, ahora):
+    cliente = _cliente_redis(cache, clave)
+    if cliente is None:
+        return _consumir_con_candado(cache, clave, regla, ahora)
+    clave = cache.make_and_validate_key(clave)
+    permitido, espera = cliente.eval(SCRIPT_REDIS, 1, clave, regla.capacidad, regla.tasa, ahora, regla.expiracion * 1000)
+    return bool(permitido), float(espera)
+
+
+def _consumir_con_candado(cache, clave, regla, ahora):
+    candado = f'{clave}:candado'
+    token = uuid.uuid4().hex
+    for _ in range(INTENTOS_CANDADO):
+        if cache.add(candado, token, CANDADO_TIMEOUT):
+            break
+        time.sleep(ESPERA_CANDADO)
+    else:
+        # Otra petición tiene la cubeta ocupada: se rechaza en vez de dejar pasar la ráfaga
+        return False, CANDADO_TIMEOUT
+    try:
+        tokens, permitido, espera = _rellenar(regla, cache.get(clave), ahora)
+        cache.set(clave, (tokens, ahora), regla.expiracion)
+    finally:
+        # Si el candado expiró mientras tanto ya puede ser de otra petición
+        if cache.get(candado) == token:
+            cache.delete(candado)
+    return permitido, espera
+
+
+def _consumir_local(cache, clave, regla, ahora):
+    with _candados_locales[hash(clave) % CANDADOS_LOCALES]:
+        tokens, permitido, espera = _rellenar(regla, cache.get(clave), ahora)
+        cache.set(clave, (tokens, ahora), regla.expiracion)
+    return permitido, espera
+
+
+def consumir(regla, identidad):
+    """
+    Gasta un token de la cubeta de `identidad` para `regla`.
+    Devuelve (permitido, segundos hasta el siguiente token si no se permite).
+    """
+    clave = f'radiohits:limite:{regla.patron}:{identidad}'
+    cache = caches['default']
+    if isinstance(cache, RedisCache):
+        consumir_en = _consumir_redis
+    elif isinstance(cache, LocMemCache):
+        consumir_en = _consumir_local
+    else:
+        consumir_en = _consumir_con_candado
+    return consumir_en(cache, clave, regla, time.time())
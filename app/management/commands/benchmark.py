@@ -0,0 +1,239 @@
+"""
+Comando para medir la latencia de una página a través de los handlers WSGI y ASGI de Django.
+
+Lanza N peticiones con C en paralelo contra la ruta indicada (por defecto el índice),
+usando el mismo proceso y la base de datos configurada, y muestra media, p50, p95,
+máximo y peticiones por segundo para cada handler. La latencia cuenta hasta leer el
+último byte del cuerpo: el índice se transmite por partes bajo ASGI y la respuesta
+llega antes de que se rendericen los indicadores. El tiempo hasta el primer byte se
+muestra aparte.
+
+Uso:
+    python manage.py benchmark
+    python manage.py benchmark --peticiones 200 --concurrencia 20 --en-frio --vaciar-cache --latencia-api 0.4
+
+--latencia-api reemplaza la llamada a mindicador.cl por una respuesta fija que tarda los
+segundos indicados, para que los resultados no dependan de la red. Las peticiones se lanzan
+en rondas de --concurrencia peticiones simultáneas; --en-frio vacía la caché antes de cada
+ronda para medir el peor caso (indicadores y consultas sin cachear, todos a la vez).
+
+Vaciar la caché configurada borra también las instantáneas del modo degradado, las cubetas
+del límite de peticiones y el índice de relacionadas, así que --en-frio exige además
+--vaciar-cache: es para entornos de prueba, nunca contra la caché de producción.
+
+--perfiles repite la medición en un proceso aparte por cada módulo de settings indicado,
+para comparar por ejemplo desarrollo contra producción (plantillas cacheadas, conexiones
+persistentes, sin middleware de desarrollo):
+
+    python manage.py benchmark --perfiles core.settings core.settings_produccion
+"""
+
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+
+from app.compresion import metricas as metricas_compresion
+from app.externo import cliente_externo
+
+CABECERAS = {'Accept-Encoding': 'br, gzip'}  # Como un navegador: mide también la compresión
+
+# Respuesta con el formato de https://mindicador.cl/api usada al simular la API
+RESPUESTA_MINDICADOR = {
+    'dolar': {'valor': 950.0},
+    'euro': {'valor': 1030.0},
+    'uf': {'valor': 37500.0},
+    'utm': {'valor': 65000.0, 'fecha': '2025-07-01T04:00:00.000Z'},
+}
+
+
+class _RespuestaSimulada:
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return RESPUESTA_MINDICADOR
+
+
+def _leer(response, inicio):
+    """
+    Lee el cuerpo completo de una respuesta. Devuelve (segundos hasta el primer byte, total).
+    """
+    primer_byte = None
+    if response.streaming:
+        for _ in response.streaming_content:
+            primer_byte = primer_byte or time.perf_counter() - inicio
+    total = time.perf_counter() - inicio
+    return primer_byte or total, total
+
+
+async def _aleer(response, inicio):
+    primer_byte = None
+    if response.streaming:
+        async for _ in response.streaming_content:
+            primer_byte = primer_byte or time.perf_counter() - inicio
+    total = time.perf_counter() - inicio
+    return primer_byte or total, total
+
+
+def _resumen(latencias, duracion):
+    """
+    Estadísticas de una serie de latencias (en segundos).
+    """
+    ordenadas = sorted(latencias)
+    return {
+        'media': statistics.mean(ordenadas) * 1000,
+        'p50': ordenadas[len(ordenadas) // 2] * 1000,
+        'p95': ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))] * 1000,
+        'max': ordenadas[-1] * 1000,
+        'rps': len(ordenadas) / duracion,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Mide la latencia de una página bajo los handlers WSGI y ASGI.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ruta', default='/', help='Ruta a medir.')
+        parser.add_argument('--peticiones', type=int, default=50, help='Número total de peticiones.')
+        parser.add_argument('--concurrencia', type=int, default=10, help='Peticiones simultáneas.')
+        parser.add_argument('--modo', choices=['wsgi', 'asgi', 'ambos'], default='ambos')
+        parser.add_argument('--en-frio', action='store_true',
+                            help='Vacía la caché antes de cada ronda de peticiones simultáneas (exige --vaciar-cache).')
+        parser.add_argument('--vaciar-cache', action='store_true',
+                            help='Confirma que se puede vaciar la caché configurada (no usar en producción).')
+        parser.add_argument('--latencia-api', type=float, default=None,
+                            help='Simula mindicador.cl con esta latencia (segundos) en lugar de llamarlo.')
+        parser.add_argument('--perfiles', nargs='+', metavar='SETTINGS',
+                            help='Módulos de settings a comparar, cada uno en su propio proceso.')
+
+    def handle(self, *args, **options):
+        self.opciones = options
+        if options['en_frio'] and not options['vaciar_cache']:
+            raise CommandError(
+                '--en-frio vacía la caché configurada (instantáneas, límites de peticiones, índice de '
+                'relacionadas); agrega --vaciar-cache para confirmarlo.'
+            )
+        if options['perfiles']:
+            return self.comparar_perfiles()
+        parches = []
+        if options['latencia_api'] is not None:
+            def api_simulada(*args, **kwargs):
+                time.sleep(options['latencia_api'])
+                return _RespuestaSimulada()
+            # Se reemplaza solo el envío: el pool, los reintentos y el circuito siguen activos
+            parches.append(mock.patch.object(cliente_externo.sesion, 'request', side_effect=api_simulada))
+
+        for parche in parches:
+            parche.start()
+        try:
+            modos = ['wsgi', 'asgi'] if options['modo'] == 'ambos' else [options['modo']]
+            for modo in modos:
+                self.preparar()
+                inicio = time.perf_counter()
+                tiempos = self.medir_wsgi() if modo == 'wsgi' else asyncio.run(self.medir_asgi())
+                duracion = time.perf_counter() - inicio
+                self.informar(
+                    modo.upper(),
+                    _resumen([total for _, total in tiempos], duracion),
+                    _resumen([primer_byte for primer_byte, _ in tiempos], duracion),
+                )
+            self.stdout.write(
+                f"DEBUG={settings.DEBUG}  CONN_MAX_AGE={settings.DATABASES['default'].get('CONN_MAX_AGE', 0)}  "
+                f"plantillas cacheadas={'loaders' in settings.TEMPLATES[0]['OPTIONS']}"
+            )
+        finally:
+            for parche in parches:
+                parche.stop()
+        for host, datos in cliente_externo.metricas().items():
+            self.stdout.write(f'API {host}: {datos}')
+        for codificacion, datos in metricas_compresion().items():
+            self.stdout.write(f'Compresión {codificacion}: {datos}')
+
+    def comparar_perfiles(self):
+        """
+        Ejecuta este mismo comando con cada módulo de settings en un subproceso (los settings
+        no se pueden cambiar dentro de un proceso ya iniciado) y muestra sus resultados.
+        """
+        argumentos = [
+            '--ruta', self.opciones['ruta'],
+            '--peticiones', str(self.opciones['peticiones']),
+            '--concurrencia', str(self.opciones['concurrencia']),
+            '--modo', self.opciones['modo'],
+        ]
+        if self.opciones['en_frio']:
+            argumentos += ['--en-frio', '--vaciar-cache']
+        if self.opciones['latencia_api'] is not None:
+            argumentos += ['--latencia-api', str(self.opciones['latencia_api'])]
+        for perfil in self.opciones['perfiles']:
+            self.stdout.write(self.style.MIGRATE_HEADING(perfil))
+            resultado = subprocess.run(
+                [sys.executable, sys.argv[0], 'benchmark', '--settings', perfil, *argumentos],
+                capture_output=True, text=True,
+            )
+            self.stdout.write(resultado.stdout.rstrip())
+            if resultado.returncode:
+                self.stderr.write(resultado.stderr.rstrip())
+
+    def preparar(self):
+        """
+        Petición de calentamiento (importaciones, plantillas, caché) fuera de la medición.
+        """
+        if self.opciones['en_frio']:
+            cache.clear()
+        Client(headers=CABECERAS).get(self.opciones['ruta'])
+
+    def rondas(self):
+        """
+        Tamaño de cada ronda de peticiones simultáneas.
+        """
+        total, concurrencia = self.opciones['peticiones'], self.opciones['concurrencia']
+        return [min(concurrencia, total - inicio) for inicio in range(0, total, concurrencia)]
+
+    def medir_wsgi(self):
+        ruta = self.opciones['ruta']
+
+        def peticion(_):
+            inicio = time.perf_counter()
+            return _leer(Client(headers=CABECERAS).get(ruta), inicio)
+
+        latencias = []
+        with ThreadPoolExecutor(max_workers=self.opciones['concurrencia']) as pool:
+            for tamano in self.rondas():
+                if self.opciones['en_frio']:
+                    cache.clear()
+                latencias += pool.map(peticion, range(tamano))
+        return latencias
+
+    async def medir_asgi(self):
+        ruta = self.opciones['ruta']
+        cliente = AsyncClient()
+
+        async def peticion():
+            inicio = time.perf_counter()
+            response = await cliente.get(ruta, headers=CABECERAS)
+            return await _aleer(response, inicio)
+
+        latencias = []
+        for tamano in self.rondas():
+            if self.opciones['en_frio']:
+                cache.clear()
+            latencias += await asyncio.gather(*(peticion() for _ in range(tamano)))
+        return latencias
+
+    def informar(self, modo, resumen, primer_byte):
+        self.stdout.write(
+            f"{modo:<5} {self.opciones['ruta']}  media {resumen['media']:.1f} ms  p50 {resumen['p50']:.1f} ms  "
+            f"p95 {resumen['p95']:.1f} ms  max {resumen['max']:.1f} ms  {resumen['rps']:.1f} req/s  "
+            f"(primer byte: p50 {primer_byte['p50']:.1f} ms  p95 {primer_byte['p95']:.1f} ms)"
+        )
@@ -0,0 +1,29 @@
+"""
+Comando para recalcular las entradas relacionadas ("Sigue leyendo") de todo el blog.
+
+Las señales mantienen las listas al día cuando se crea, modifica o elimina una entrada
+(solo se rehacen las filas afectadas). Este comando reconstruye todas las listas, por
+ejemplo después de una importación masiva o de cambiar los parámetros de app/relacionadas.py.
+
+Uso:
+    python manage.py calcular_relacionadas
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app import relacionadas
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las entradas relacionadas de todas las entradas del blog (TF-IDF).'
+
+    def handle(self, *args, **options):
+        if not relacionadas.disponible():
+            raise CommandError('Se necesita NumPy para calcular las entradas relacionadas (pip install numpy).')
+        inicio = time.perf_counter()
+        entradas, guardadas = relacionadas.recalcular_todas()
+        self.stdout.write(self.style.SUCCESS(
+            f'{entradas} entradas, {guardadas} relaciones guardadas en {time.perf_counter() - inicio:.2f} s.'
+        ))
@@ -0,0 +1,52 @@
+"""
+Comando para calcular los metadatos de las imágenes ya subidas (ver app/imagenes.py).
+
+Las imágenes nuevas reciben dimensiones, color dominante y miniatura al guardarse; este
+comando completa las que se subieron antes (o todas con --todas, incluidas las marcadas
+como ilegibles) y las guarda con un UPDATE por lotes, sin emitir señales ni invalidar la
+caché fila por fila.
+
+Uso:
+    python manage.py completar_imagenes
+    python manage.py completar_imagenes --todas
+"""
+
+from django.core.management.base import BaseCommand
+
+from app.imagenes import CAMPOS_METADATOS, asignar_metadatos
+from app.models import MODELOS_CON_IMAGEN
+
+LOTE = 100
+
+
+class Command(BaseCommand):
+    help = 'Calcula dimensiones, color dominante y miniatura de las imágenes existentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todas', action='store_true', help='Recalcula también las que ya tienen metadatos.')
+
+    def handle(self, *args, **options):
+        for modelo in MODELOS_CON_IMAGEN:
+            filas = modelo._base_manager.exclude(imagen='').exclude(imagen__isnull=True)
+            if not options['todas']:
+                filas = filas.filter(imagen_lqip='', imagen_ilegible=False)
+            campo = modelo._meta.get_field('imagen')
+            pendientes, completadas = [], 0
+            for instancia in filas.only('pk', 'imagen', *CAMPOS_METADATOS).iterator(chunk_size=LOTE):
+                asignar_metadatos(instancia)
+                if not instancia.imagen_ilegible:
+                    # Al cargar la fila Django solo lee las dimensiones si faltan (y nunca en las ilegibles)
+                    campo.update_dimension_fields(instancia, force=True)
+                pendientes.append(instancia)
+                if len(pendientes) == LOTE:
+                    completadas += self.guardar(modelo, pendientes)
+            completadas += self.guardar(modelo, pendientes)
+            self.stdout.write(f'{modelo.__name__}: {completadas} imágenes completadas')
+        self.stdout.write(self.style.SUCCESS('Metadatos de imágenes al día.'))
+
+    def guardar(self, modelo, pendientes):
+        # bulk_update del manager con caché: invalida el grupo una vez por lote
+        modelo.objects.bulk_update(pendientes, CAMPOS_METADATOS)
+        cantidad = len(pendientes)
+        pendientes.clear()
+        return cantidad
@@ -0,0 +1,32 @@
+"""
+Comando para copiar la programación de un día a otros días de la semana.
+
+Cada día de destino se reemplaza (o se complementa con --combinar) con un DELETE y un
+INSERT, después de validar que la semana resultante no tenga solapamientos.
+
+Uso:
+    python manage.py copiar_programacion lunes martes miercoles jueves viernes
+    python manage.py copiar_programacion sabado domingo --combinar
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.programacion import DIAS, ErrorProgramacion, copiar_dia
+
+
+class Command(BaseCommand):
+    help = 'Copia la programación de un día a otros días de la semana.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('origen', choices=DIAS)
+        parser.add_argument('destinos', nargs='+', choices=DIAS)
+        parser.add_argument('--combinar', action='store_true', help='Sumar a la programación de los días de destino.')
+
+    def handle(self, *args, **options):
+        try:
+            creados = copiar_dia(options['origen'], options['destinos'], combinar=options['combinar'])
+        except ErrorProgramacion as error:
+            for mensaje in error.errores:
+                self.stderr.write(mensaje)
+            raise CommandError('La copia produciría solapamientos; no se copió nada.')
+        self.stdout.write(self.style.SUCCESS(f'{creados} programas copiados desde el {options["origen"]}.'))
@@ -0,0 +1,79 @@
+"""
+Comando de mantenimiento del almacenamiento de media por contenido (ver app/almacenamiento.py).
+
+  1. Pasa al almacenamiento por contenido las imágenes subidas antes de activarlo
+     (media/entrada_imagenes/, media/blog_imagenes/...): cada archivo se guarda una vez
+     bajo su hash y las filas que lo usaban pasan a apuntar al nombre nuevo.
+  2. Recalcula las referencias de ArchivoMedia contando las filas que usan cada archivo
+     (corrige cualquier desvío, por ejemplo tras cambios hechos directamente en la base).
+  3. Elimina los archivos sin referencias que llevan más de --gracia minutos sin usarse.
+
+Uso:
+    python manage.py deduplicar_media
+    python manage.py deduplicar_media --borrar-originales --gracia 0
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app.almacenamiento import GRACIA_HUERFANOS, borrar_huerfanos, es_de_contenido, registrar_archivo
+from app.models import MODELOS_CON_IMAGEN, ArchivoMedia
+
+
+class Command(BaseCommand):
+    help = 'Deduplica las imágenes subidas, recalcula sus referencias y borra las que nadie usa.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--borrar-originales', action='store_true',
+            help='Elimina los archivos anteriores una vez que ninguna fila los usa.',
+        )
+        parser.add_argument(
+            '--gracia', type=int, default=int(GRACIA_HUERFANOS.total_seconds() // 60),
+            help='Minutos sin uso antes de borrar un archivo sin referencias (por defecto %(default)s).',
+        )
+
+    def handle(self, *args, **options):
+        migrados = {}  # Nombre anterior -> nombre por contenido (cada archivo se lee una vez)
+        for modelo in MODELOS_CON_IMAGEN:
+            filas = modelo._base_manager.exclude(imagen='').exclude(imagen__isnull=True).values_list('pk', 'imagen')
+            for pk, nombre in filas.iterator():
+                if es_de_contenido(nombre):
+                    continue
+                if nombre not in migrados:
+                    if not default_storage.exists(nombre):
+                        self.stderr.write(f'{modelo.__name__} {pk}: no existe {nombre}')
+                        continue
+                    with default_storage.open(nombre, 'rb') as archivo:
+                        migrados[nombre] = default_storage.save(nombre, archivo)
+                # update() y no save(): las referencias se recalculan abajo para todas las filas
+                modelo.objects.filter(pk=pk).update(imagen=migrados[nombre])
+        self.stdout.write(f'{len(migrados)} archivos pasados al almacenamiento por contenido')
+
+        if options['borrar_originales']:
+            for nombre in migrados:
+                default_storage.delete(nombre)
+
+        with transaction.atomic():
+            referencias = Counter()
+            for modelo in MODELOS_CON_IMAGEN:
+                referencias.update(
+                    nombre for nombre in modelo._base_manager.values_list('imagen', flat=True) if es_de_contenido(nombre)
+                )
+            for nombre in referencias.keys() - set(ArchivoMedia.objects.values_list('nombre', flat=True)):
+                registrar_archivo(nombre, default_storage.size(nombre) if default_storage.exists(nombre) else 0)
+            archivos = list(ArchivoMedia.objects.all())
+            for archivo in archivos:
+                archivo.referencias = referencias[archivo.nombre]
+            ArchivoMedia.objects.bulk_update(archivos, ['referencias'], batch_size=500)
+        compartidos = sum(1 for cantidad in referencias.values() if cantidad > 1)
+        self.stdout.write(f'{len(archivos)} archivos, {compartidos} usados por más de una fila')
+
+        borrados, liberados = borrar_huerfanos(timedelta(minutes=options['gracia']))
+        self.stdout.write(self.style.SUCCESS(
+            f'{borrados} archivos sin referencias eliminados ({liberados / 1024:.0f} KB liberados).'
+        ))
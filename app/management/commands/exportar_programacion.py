@@ -0,0 +1,34 @@
+"""
+Comando para exportar la programación de la semana como CSV o iCalendar.
+
+El resultado se puede editar y volver a cargar con importar_programacion.
+
+Uso:
+    python manage.py exportar_programacion > programacion.csv
+    python manage.py exportar_programacion --formato ics --salida programacion.ics
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand
+
+from app.programacion import FORMATOS, cargar_semana, filas_csv, lineas_ics
+
+
+class Command(BaseCommand):
+    help = 'Exporta la programación de la semana como .csv o .ics.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=FORMATOS, default='csv')
+        parser.add_argument('--salida', help='Archivo de destino (por defecto, la salida estándar).')
+
+    def handle(self, *args, **options):
+        semana = cargar_semana()
+        generar = filas_csv if options['formato'] == 'csv' else lineas_ics
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8', newline='') as salida:
+                salida.writelines(generar(semana))
+            total = sum(len(programas) for programas in semana.values())
+            self.stderr.write(self.style.SUCCESS(f'{total} programas exportados a {options["salida"]}.'))
+        else:
+            sys.stdout.writelines(generar(semana))
@@ -0,0 +1,307 @@
+"""
+Comando para exportar ("congelar") las páginas públicas de Radio Hits a HTML estático.
+
+Renderiza en un pool de hilos todas las rutas públicas (índice, blog paginado,
+cada entrada del blog, about, eventos, fiestas y La Tertulia, los feeds RSS/Atom,
+los sitemaps y programacion.ics) y las escribe en FREEZE_ROOT junto a un
+manifest.json. En cada ejecución solo se vuelven a escribir las páginas cuya huella
+de contenido cambió desde la última exportación, y se eliminan las páginas que ya
+no existen. Las URLs absolutas (feeds y sitemaps) se generan con --base-url.
+
+Uso:
+    python manage.py freeze
+    python manage.py freeze --force --workers 8 --base-url https://radiohits.cl
+
+Ejemplo de configuración nginx para servir el sitio congelado (con Django caído):
+
+    root /srv/radiohits/freeze;
+    location /static/ { alias /srv/radiohits/static/; }
+    location /media/  { alias /srv/radiohits/media/; }
+    location = /blog/ {
+        if ($arg_page) { rewrite ^ /blog/pagina/$arg_page/index.html last; }
+        try_files /blog/index.html =404;
+    }
+    location = /blog/feed/rss/  { types { } default_type application/rss+xml; try_files /blog/feed/rss.xml =404; }
+    location = /blog/feed/atom/ { types { } default_type application/atom+xml; try_files /blog/feed/atom.xml =404; }
+    location = /programacion.ics { types { } default_type text/calendar; }
+    location / { try_files $uri $uri/index.html =404; }
+"""
+
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from app.cache import obtener_generacion
+from app.feeds import SITEMAP_MAX_URLS
+from app.models import (
+    EntradaIndex,
+    BlogEntrada,
+    Lunes,
+    Martes,
+    Miercoles,
+    Jueves,
+    Viernes,
+    Sabado,
+    Domingo
+)
+from app.tendencias import tendencias
+from app.views import BlogGeneralView
+
+# Secciones públicas que solo dependen de sus plantillas
+SECCIONES_ESTATICAS = ['about', 'eventos', 'fiestas', 'latertulia']
+
+# Feeds del blog y el archivo en que se guardan (su ruta termina en '/', como un directorio)
+FEEDS = {'blog_feed_rss': 'blog/feed/rss.xml', 'blog_feed_atom': 'blog/feed/atom.xml'}
+
+DIAS_SEMANA = [Lunes, Martes, Miercoles, Jueves, Viernes, Sabado, Domingo]
+
+
+def _huella(*partes):
+    """
+    Calcula una huella SHA-1 estable a partir de cualquier estructura serializable.
+    """
+    contenido = json.dumps(partes, default=str, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+
+
+def _version_plantillas():
+    """
+    Huella de todas las plantillas del proyecto (ruta, tamaño y fecha de modificación).
+    Cualquier cambio en una plantilla obliga a regenerar todas las páginas.
+    """
+    archivos = []
+    for directorio in settings.TEMPLATES[0]['DIRS']:
+        for raiz, _, nombres in os.walk(directorio):
+            for nombre in sorted(nombres):
+                ruta = os.path.join(raiz, nombre)
+                stat = os.stat(ruta)
+                archivos.append((os.path.relpath(ruta, directorio), stat.st_size, stat.st_mtime_ns))
+    return _huella(sorted(archivos))
+
+
+def _archivo_para(ruta, pagina=None):
+    """
+    Traduce una ruta pública a la ruta relativa del archivo exportado.
+    '/' -> 'index.html', '/blog/3/' -> 'blog/3/index.html',
+    '/blog/?page=2' -> 'blog/pagina/2/index.html', '/sitemap.xml' -> 'sitemap.xml'.
+    """
+    partes = [p for p in ruta.strip('/').split('/') if p]
+    if partes and not ruta.endswith('/') and '.' in partes[-1]:
+        return '/'.join(partes)  # Archivos con extensión propia (sitemaps, calendario)
+    if pagina and pagina > 1:
+        partes += ['pagina', str(pagina)]
+    return '/'.join(partes + ['index.html'])
+
+
+async def _leer(partes):
+    return b''.join([parte async for parte in partes])
+
+
+def _contenido(response):
+    """
+    Cuerpo completo de una respuesta, también de las transmitidas por partes (feeds, sitemaps).
+    """
+    if not response.streaming:
+        return response.content
+    if response.is_async:
+        return async_to_sync(_leer)(response.streaming_content)
+    return b''.join(response.streaming_content)
+
+
+class Command(BaseCommand):
+    help = 'Exporta las páginas públicas a HTML estático (con feeds, sitemaps y manifest) para servirlas desde nginx o un CDN.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.FREEZE_ROOT,
+                            help='Directorio de salida de las páginas exportadas.')
+        parser.add_argument('--base-url', default=settings.FREEZE_BASE_URL,
+                            help='URL absoluta del sitio para los feeds y sitemaps.')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Número de hilos de renderizado.')
+        parser.add_argument('--force', action='store_true',
+                            help='Regenera todas las páginas aunque su huella no haya cambiado.')
+
+    def handle(self, *args, **options):
+        self.base_url = options['base_url'].rstrip('/')
+        salida = Path(options['output'])
+        salida.mkdir(parents=True, exist_ok=True)
+        ruta_manifest = salida / 'manifest.json'
+
+        anterior = {}
+        if ruta_manifest.exists():
+            anterior = json.loads(ruta_manifest.read_text(encoding='utf-8')).get('paginas', {})
+
+        paginas = self.recolectar_paginas()
+
+        # Solo se renderizan las páginas nuevas, modificadas o cuyo archivo desapareció
+        pendientes = [
+            p for p in paginas
+            if options['force']
+            or anterior.get(p['ruta'], {}).get('huella') != p['huella']
+            or not (salida / p['archivo']).exists()
+        ]
+
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            resultados = list(pool.map(self.renderizar, pendientes))
+
+        ahora = timezone.now().isoformat()
+        vigentes = {p['ruta'] for p in paginas}
+        manifest = {ruta: datos for ruta, datos in anterior.items() if ruta in vigentes}
+        escritas, sin_cambios, errores = 0, 0, []
+
+        for pagina, (estado, contenido) in zip(pendientes, resultados):
+            if estado != 200:
+                errores.append(f"{pagina['ruta']} ({estado})")
+                continue
+            sha256 = hashlib.sha256(contenido).hexdigest()
+            destino = salida / pagina['archivo']
+            if anterior.get(pagina['ruta'], {}).get('sha256') == sha256 and destino.exists():
+                # El HTML resultante es idéntico: se conserva el archivo (y su ETag en nginx)
+                sin_cambios += 1
+                modificado = anterior[pagina['ruta']]['modificado']
+            else:
+                destino.parent.mkdir(parents=True, exist_ok=True)
+                temporal = destino.with_suffix('.tmp')
+                temporal.write_bytes(contenido)
+                os.replace(temporal, destino)  # Escritura atómica para no servir archivos a medias
+                escritas += 1
+                modificado = ahora
+            manifest[pagina['ruta']] = {
+                'archivo': pagina['archivo'],
+                'huella': pagina['huella'],
+                'sha256': sha256,
+                'bytes': len(contenido),
+                'modificado': modificado,
+            }
+
+        # Eliminar las páginas que ya no existen (p. ej. entradas del blog borradas)
+        eliminadas = 0
+        for ruta, datos in anterior.items():
+            if ruta not in manifest:
+                archivo = salida / datos['archivo']
+                archivo.unlink(missing_ok=True)
+                # Limpiar los directorios que quedaron vacíos
+                for directorio in archivo.parents:
+                    if directorio == salida or any(directorio.iterdir()):
+                        break
+                    directorio.rmdir()
+                eliminadas += 1
+
+        ruta_manifest.write_text(
+            json.dumps({'generado': ahora, 'paginas': manifest}, indent=2, ensure_ascii=False),
+            encoding='utf-8'
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(paginas)} páginas públicas: {escritas} escritas, {sin_cambios} sin cambios, '
+            f'{len(paginas) - len(pendientes)} omitidas por huella, {eliminadas} eliminadas.'
+        ))
+        if errores:
+            raise CommandError('No se pudieron exportar: ' + ', '.join(errores))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # RECOLECCIÓN DE RUTAS Y HUELLAS
+
+    def recolectar_paginas(self):
+        """
+        Devuelve la lista de páginas públicas con su ruta, archivo de salida y huella.
+        La huella combina la versión de las plantillas con los datos que muestra cada página,
+        obtenidos con consultas livianas (values_list) sin renderizar nada.
+        """
+        plantillas = _version_plantillas()
+        paginas = []
+
+        def agregar(ruta, huella, pagina=None, archivo=None):
+            paginas.append({
+                'ruta': f'{ruta}?page={pagina}' if pagina and pagina > 1 else ruta,
+                'path': ruta,
+                'pagina': pagina,
+                'archivo': archivo or _archivo_para(ruta, pagina),
+                'huella': _huella(plantillas, huella),
+            })
+
+        # Índice: carrusel, programación semanal, tendencias y fecha (los indicadores cambian a diario)
+        carrusel = list(EntradaIndex.objects.order_by('-id').values_list('id', 'titulo', 'texto', 'imagen')[:3])
+        programacion = [
+            list(modelo.objects.order_by('hora_inicio').values_list('hora_inicio', 'hora_fin', 'nombre_programa'))
+            for modelo in DIAS_SEMANA
+        ]
+        en_tendencia = [
+            (popular.entrada_id, popular.entrada.titulo, popular.entrada.fecha_publicacion) for popular in tendencias(3)
+        ]
+        agregar(reverse('index'), [carrusel, programacion, en_tendencia, date.today()])
+
+        for nombre in SECCIONES_ESTATICAS:
+            agregar(reverse(nombre), nombre)
+
+        # Blog paginado: cada página depende de las entradas que lista y del total (enlaces de paginación)
+        entradas = list(
+            BlogEntrada.objects.order_by('-fecha_publicacion')
+            .values_list('id', 'titulo', 'contenido', 'imagen', 'fecha_publicacion', 'autor_nombre')
+        )
+        por_pagina = BlogGeneralView.paginate_by
+        total_paginas = max(1, math.ceil(len(entradas) / por_pagina))
+        for numero in range(1, total_paginas + 1):
+            bloque = entradas[(numero - 1) * por_pagina:numero * por_pagina]
+            agregar(reverse('blog'), [len(entradas), bloque], pagina=numero)
+
+        # Una página por entrada del blog (vista pública y vista de detalle)
+        for fila in entradas:
+            agregar(reverse('entrada_blog', args=[fila[0]]), fila)
+            agregar(reverse('blog_detail', args=[fila[0]]), fila)
+
+        # Feeds y sitemaps: cambian con la generación del blog (la misma de sus ETag) y con la URL base
+        blog = [self.base_url, obtener_generacion('blog')]
+        for nombre, archivo in FEEDS.items():
+            agregar(reverse(nombre), blog, archivo=archivo)
+        agregar(reverse('sitemap_index'), blog)
+        agregar(reverse('sitemap_paginas'), blog)
+        for numero in range(max(1, math.ceil(len(entradas) / SITEMAP_MAX_URLS))):
+            agregar(reverse('sitemap_blog', args=[numero]), blog)
+
+        agregar(reverse('programacion_ics'), obtener_generacion('programacion'))
+
+        return paginas
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # RENDERIZADO
+
+    def renderizar(self, pagina):
+        """
+        Renderiza una página como la vería un visitante anónimo.
+        Se ejecuta dentro del pool de hilos; cada hilo cierra su conexión a la base de datos al terminar.
+        """
+        try:
+            datos = {'page': pagina['pagina']} if pagina['pagina'] and pagina['pagina'] > 1 else {}
+            url_base = urlsplit(self.base_url)
+            request = RequestFactory(HTTP_HOST=url_base.netloc).get(
+                pagina['path'], datos, secure=url_base.scheme == 'https'
+            )
+            request.user = AnonymousUser()
+            request.render_interno = True  # No cuenta como vista del blog (ver registrar_vista_de)
+            request.sitio_url = self.base_url  # URLs absolutas de los feeds y sitemaps (ver app/feeds.py)
+            match = resolve(request.path_info)
+            vista = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func  # p. ej. IndexView
+            response = vista(request, *match.args, **match.kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            return response.status_code, _contenido(response)
+        except Exception as error:
+            self.stderr.write(f"Error al renderizar {pagina['ruta']}: {error}")
+            return 500, b''
+        finally:
+            connections.close_all()
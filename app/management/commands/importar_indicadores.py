@@ -0,0 +1,61 @@
+"""
+Comando para cargar el histórico de indicadores económicos desde archivos JSON de mindicador.cl.
+
+Acepta los formatos que entrega la API:
+  - Serie de un indicador por año (https://mindicador.cl/api/dolar/2024):
+      {"codigo": "dolar", "serie": [{"fecha": "2024-12-31T03:00:00.000Z", "valor": 992.12}, ...]}
+  - Una lista de objetos como el anterior.
+  - La consulta general (https://mindicador.cl/api), con el valor del día de cada indicador.
+
+Los valores se insertan por lotes con un upsert, así que volver a importar un archivo
+solo actualiza los valores existentes.
+
+Uso:
+    python manage.py importar_indicadores dolar_2024.json euro_2024.json
+"""
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from app.indicadores import INDICADORES, fecha_de, guardar_valores
+
+
+def _filas(datos):
+    """
+    Recorre un documento JSON de mindicador.cl y entrega tuplas (indicador, fecha, valor).
+    """
+    if isinstance(datos, list):
+        for elemento in datos:
+            yield from _filas(elemento)
+    elif isinstance(datos, dict) and 'serie' in datos:
+        for punto in datos['serie']:
+            yield datos['codigo'], fecha_de(punto['fecha']), punto['valor']
+    elif isinstance(datos, dict):
+        for codigo in INDICADORES:
+            if isinstance(datos.get(codigo), dict) and datos[codigo].get('fecha'):
+                yield codigo, fecha_de(datos[codigo]['fecha']), datos[codigo]['valor']
+
+
+class Command(BaseCommand):
+    help = 'Importa valores históricos de indicadores económicos desde archivos JSON de mindicador.cl.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivos', nargs='+', help='Archivos JSON con el formato de mindicador.cl.')
+
+    def handle(self, *args, **options):
+        total = 0
+        with transaction.atomic():
+            for nombre in options['archivos']:
+                ruta = Path(nombre)
+                try:
+                    datos = json.loads(ruta.read_text(encoding='utf-8'))
+                    filas = [fila for fila in _filas(datos) if fila[0] in INDICADORES]
+                except (OSError, ValueError, KeyError, TypeError) as error:
+                    raise CommandError(f'No se pudo leer {ruta}: {error}')
+                guardadas = guardar_valores(filas)
+                total += guardadas
+                self.stdout.write(f'{ruta}: {guardadas} valores')
+        self.stdout.write(self.style.SUCCESS(f'{total} valores importados.'))
@@ -0,0 +1,63 @@
+"""
+Comando para cargar la programación de la semana desde un archivo CSV o iCalendar.
+
+CSV (con encabezado):
+    dia,hora_inicio,hora_fin,nombre_programa
+    lunes,06:00,09:00,Despertar Hits
+    domingo,23:00,02:00,Trasnoche        <- termina el lunes a las 02:00
+
+iCalendar: cada VEVENT se carga en el día de su DTSTART o en los días de RRULE:BYDAY.
+
+El archivo se lee línea a línea y se valida entero (incluidos los solapamientos de la
+semana) antes de escribir; luego se guarda con bulk_create por lotes en una transacción.
+Por defecto la semana importada reemplaza a la actual.
+
+Uso:
+    python manage.py importar_programacion temporada_2025.csv
+    python manage.py importar_programacion especiales.ics --combinar
+    python manage.py importar_programacion temporada_2025.csv --validar   # Solo revisa el archivo
+"""
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.programacion import FORMATOS, LECTORES, ErrorProgramacion, importar_semana
+
+
+class Command(BaseCommand):
+    help = 'Importa la programación de la semana desde un archivo .csv o .ics.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Archivo .csv o .ics.')
+        parser.add_argument('--formato', choices=FORMATOS, help='Formato del archivo (por defecto, según la extensión).')
+        parser.add_argument('--combinar', action='store_true', help='Sumar a la programación actual en vez de reemplazarla.')
+        parser.add_argument('--validar', action='store_true', help='Solo validar el archivo, sin guardar nada.')
+
+    def handle(self, *args, **options):
+        ruta = Path(options['archivo'])
+        formato = options['formato'] or ruta.suffix.lstrip('.').lower()
+        if formato not in FORMATOS:
+            raise CommandError('Indica el formato con --formato csv|ics.')
+
+        errores = []
+        try:
+            with ruta.open(encoding='utf-8-sig', newline='') as lineas:
+                importada = importar_semana(
+                    LECTORES[formato](lineas, errores), errores,
+                    combinar=options['combinar'], guardar=not options['validar'],
+                )
+        except (OSError, UnicodeDecodeError) as error:
+            raise CommandError(f'No se pudo leer {ruta}: {error}')
+        except ErrorProgramacion as error:
+            for mensaje in error.errores:
+                self.stderr.write(mensaje)
+            raise CommandError(f'{len(error.errores)} error(es); no se importó nada.')
+
+        for dia, programas in importada.items():
+            self.stdout.write(f'{dia}: {len(programas)} programas')
+        total = sum(len(programas) for programas in importada.values())
+        if options['validar']:
+            self.stdout.write(self.style.SUCCESS(f'{ruta} es válido ({total} programas). No se guardó nada.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{total} programas importados.'))
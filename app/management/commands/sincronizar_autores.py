@@ -0,0 +1,31 @@
+"""
+Comando para recalcular el nombre del autor guardado en las entradas (autor_nombre).
+
+Las señales mantienen la copia al día cuando un usuario cambia su nombre desde Django,
+pero los cambios hechos directamente en la base de datos (o con update() sobre User)
+no las disparan. Este comando corrige todas las filas desactualizadas con un UPDATE
+por modelo.
+
+Uso:
+    python manage.py sincronizar_autores
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from app.models import MODELOS_CON_AUTOR, nombre_visible_sql
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el nombre del autor guardado en las entradas del índice y del blog.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for modelo in MODELOS_CON_AUTOR:
+                desactualizadas = modelo.objects.annotate(nombre_actual=nombre_visible_sql()).filter(
+                    ~Q(autor_nombre=F('nombre_actual'))
+                )
+                filas = desactualizadas.update(autor_nombre=nombre_visible_sql())
+                self.stdout.write(f'{modelo.__name__}: {filas} filas actualizadas')
+        self.stdout.write(self.style.SUCCESS('Nombres de autores sincronizados.'))
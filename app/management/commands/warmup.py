@@ -0,0 +1,50 @@
+"""
+Comando para calentar un despliegue antes de que los workers reciban tráfico (ver app/calentamiento.py).
+
+  1. Resuelve todas las URLs (importa las vistas) y compila las plantillas del proyecto,
+     lo que además detecta plantillas con errores antes de publicarlas.
+  2. Llena la caché compartida con los indicadores, la programación semanal, el carrusel
+     y las tendencias, para que las primeras peticiones no las calculen a la vez.
+  3. Con --importaciones, muestra los módulos que más tardan en importarse al iniciar
+     un worker y si el arranque cabe en PRESUPUESTO_ARRANQUE.
+
+Uso:
+    python manage.py warmup
+    python manage.py warmup --importaciones 20
+"""
+
+from django.core.management.base import BaseCommand
+
+from app.calentamiento import PRESUPUESTO_ARRANQUE, calentar_proceso, cebar_caches, medir_importaciones
+
+
+class Command(BaseCommand):
+    help = 'Precompila plantillas, resuelve las URLs y llena las cachés del índice antes de recibir tráfico.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--importaciones', type=int, default=0, metavar='N',
+            help='Muestra los N módulos más lentos de importar al iniciar un worker.',
+        )
+        parser.add_argument('--sin-caches', action='store_true', help='No llena la caché compartida.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'URLs y plantillas: {calentar_proceso():.2f} s')
+
+        if not options['sin_caches']:
+            for nombre, duracion in cebar_caches().items():
+                if duracion is None:
+                    self.stderr.write(f'Caché {nombre}: falló (ver el log)')
+                else:
+                    self.stdout.write(f'Caché {nombre}: {duracion:.2f} s')
+
+        if options['importaciones']:
+            duracion, modulos = medir_importaciones()
+            self.stdout.write(f'\nArranque de un worker: {duracion:.2f} s (presupuesto {PRESUPUESTO_ARRANQUE} s)')
+            self.stdout.write(f"{'acumulado ms':>13} {'propio ms':>10}  módulo")
+            for acumulado, propio, modulo in modulos[:options['importaciones']]:
+                self.stdout.write(f'{acumulado / 1000:>13.1f} {propio / 1000:>10.1f}  {modulo}')
+            if duracion > PRESUPUESTO_ARRANQUE:
+                self.stderr.write('El arranque supera el presupuesto.')
+
+        self.stdout.write(self.style.SUCCESS('Calentamiento terminado.'))
@@ -0,0 +1,166 @@
+"""
+Managers con caché (cache-aside) para los modelos de contenido y de programación.
+
+Cada modelo pertenece a un grupo de caché ('carrusel', 'blog', 'programacion' o 'indicadores').
+Los resultados de las consultas se guardan bajo claves que incluyen la generación
+del grupo (ver app/cache.py); al guardar o eliminar un registro las señales avanzan
+la generación, y lo mismo hacen aquí las operaciones masivas (update, bulk_create,
+bulk_update, delete), que no emiten señales por cada fila. Cada resultado queda además
+copiado fuera de la generación, como respaldo si la base de datos cae (ver app/degradado.py).
+"""
+
+import hashlib
+
+from django.core.exceptions import EmptyResultSet
+from django.db import models
+
+from .cache import obtener_con_respaldo, invalidar
+
+
+class CacheQuerySet(models.QuerySet):
+    """
+    QuerySet que sabe cachear su resultado y que invalida su grupo en las operaciones masivas.
+    """
+
+    @property
+    def grupo_cache(self):
+        return self.model._default_manager.grupo_cache
+
+    def cacheado(self, timeout=None):
+        """
+        Evalúa el queryset una sola vez por generación y devuelve una lista con el resultado.
+        Todas las vistas que ejecutan la misma consulta comparten la misma entrada de caché.
+        """
+        try:
+            sql, parametros = self.query.sql_with_params()
+        except EmptyResultSet:
+            return []  # .none() o filtros imposibles (pk__in=[]): no hace falta consultar
+        consulta = repr((sql, parametros)).encode('utf-8')
+        nombre = f'{self.model._meta.label_lower}:{hashlib.md5(consulta).hexdigest()}'
+        argumentos = {'timeout': timeout} if timeout is not None else {}
+        # Sobre una copia: el queryset pudo evaluarse antes y su _result_cache ser de otra generación
+        return obtener_con_respaldo(self.grupo_cache, nombre, lambda: list(self.all()), **argumentos)
+
+    def obtener_cacheado(self, **filtros):
+        """
+        Equivalente cacheado de .get(): devuelve el objeto o None si no existe.
+        """
+        return next(iter(self.filter(**filtros)[:1].cacheado()), None)
+
+    # Operaciones masivas: no emiten post_save/post_delete por fila, así que se invalida aquí
+
+    def update(self, **kwargs):
+        filas = super().update(**kwargs)
+        if filas:
+            invalidar(self.grupo_cache)
+        return filas
+
+    def bulk_create(self, *args, **kwargs):
+        objetos = super().bulk_create(*args, **kwargs)
+        invalidar(self.grupo_cache)
+        return objetos
+
+    def bulk_update(self, *args, **kwargs):
+        filas = super().bulk_update(*args, **kwargs)
+        invalidar(self.grupo_cache)
+        return filas
+
+    def delete(self):
+        resultado = super().delete()
+        invalidar(self.grupo_cache)
+        return resultado
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class CacheManager(models.Manager.from_queryset(CacheQuerySet)):
+    """
+    Manager base con caché. `grupo_cache` identifica la generación que invalida sus consultas.
+    """
+
+    def __init__(self, grupo_cache):
+        super().__init__()
+        self.grupo_cache = grupo_cache
+
+
+class EntradaIndexManager(CacheManager):
+    def __init__(self):
+        super().__init__('carrusel')
+
+    def recientes(self, cantidad=3):
+        """
+        Las entradas más recientes del carrusel del índice.
+        """
+        return self.order_by('-id')[:cantidad].cacheado()
+
+
+class BlogEntradaManager(CacheManager):
+    def __init__(self):
+        super().__init__('blog')
+
+    def publicada(self, entrada_id):
+        """
+        Una entrada del blog o None si no existe (el nombre del autor viene en autor_nombre).
+        """
+        return self.obtener_cacheado(id=entrada_id)
+
+
+class ProgramaManager(CacheManager):
+    def __init__(self):
+        super().__init__('programacion')
+
+    def programacion(self):
+        """
+        Los programas del día ordenados por hora de inicio.
+        """
+        return self.order_by('hora_inicio').cacheado()
+
+
+class ValorIndicadorManager(CacheManager):
+    def __init__(self):
+        super().__init__('indicadores')
+
+
+class EntradaRelacionadaManager(CacheManager):
+    def __init__(self):
+        super().__init__('blog')
+
+    def de(self, entrada_id):
+        """
+        Entradas relacionadas con una entrada del blog, en orden ("Sigue leyendo").
+        Una consulta por el índice (entrada, posicion), sin leer el contenido de las relacionadas.
+        """
+        return (
+            self.filter(entrada_id=entrada_id)
+            .select_related('relacionada')
+            .only(
+                'similitud', 'relacionada', 'relacionada__titulo', 'relacionada__fecha_publicacion',
+                'relacionada__imagen', 'relacionada__imagen_ancho', 'relacionada__imagen_alto',
+                'relacionada__imagen_color', 'relacionada__imagen_lqip', 'relacionada__imagen_ilegible',
+            )
+            .order_by('posicion')
+            .cacheado()
+        )
+
+
+class PopularidadEntradaManager(models.Manager):
+    """
+    Sin caché por generación: el puntaje cambia con cada vista (ver app/tendencias.py).
+    """
+
+    def tendencias(self, cantidad=3):
+        """
+        Las `cantidad` entradas con mayor puntaje, leídas en orden del índice de puntaje.
+        """
+        return (
+            self.filter(vistas__gt=0)
+            .select_related('entrada')
+            .only(
+                'puntaje', 'vistas', 'entrada', 'entrada__titulo', 'entrada__fecha_publicacion',
+                # Con la imagen van sus dimensiones: si faltaran, Django las leería fila por fila al cargarla
+                'entrada__imagen', 'entrada__imagen_ancho', 'entrada__imagen_alto', 'entrada__imagen_ilegible',
+            )
+            .order_by('-puntaje')[:cantidad]
+        )
+
@@ -0,0 +1,318 @@
+"""
+Middleware de Radio Hits.
+
+Los middleware admiten los dos modos: bajo ASGI la cadena es completamente asíncrona, así
+una vista asíncrona (IndexView) no pasa por un hilo y su respuesta transmitida por partes
+sigue en el mismo event loop hasta el final.
+"""
+
+import math
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_vary_headers
+
+from .compresion import (
+    TAMANO_MINIMO,
+    TIPOS_COMPRIMIBLES,
+    acomprimir_partes,
+    comprimir_cuerpo,
+    comprimir_partes,
+    elegir_codificacion,
+)
+from .degradado import (
+    admite_instantanea,
+    aguardar_al_terminar,
+    base_caida,
+    guardar_al_terminar,
+    guardar_instantanea,
+    respuesta_instantanea,
+    respuesta_no_disponible,
+    sondear,
+    toca_instantanea,
+)
+from .limites import cargar_reglas, consumir, ip_cliente, regla_para
+from .routers import fijar_primario, liberar_primario, hubo_escritura
+
+METODOS_SEGUROS = {'GET', 'HEAD', 'OPTIONS', 'TRACE'}
+
+# Cookie que mantiene a un editor en el primario tras escribir, y por cuánto tiempo (segundos).
+# Debe superar el retraso habitual de replicación.
+COOKIE_PRIMARIO = 'radiohits_primario'
+VENTANA_PRIMARIO = 15
+
+
+class PrimarioTrasEscrituraMiddleware:
+    """
+    Lectura de las propias escrituras con réplicas (ver app/routers.py).
+
+    Las peticiones que modifican datos leen del primario, y cuando un usuario autenticado
+    (en este sitio, alguien del equipo que edita contenido) escribe, sus peticiones de los
+    siguientes VENTANA_PRIMARIO segundos también: así la redirección tras guardar muestra
+    el cambio aunque la réplica todavía no lo tenga. Los visitantes anónimos no se ven afectados.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tokens = fijar_primario(self.leer_del_primario(request))
+        try:
+            response = self.get_response(request)
+            escribio = hubo_escritura()
+        finally:
+            liberar_primario(tokens)
+
+        usuario = getattr(request, 'user', None)
+        if escribio and usuario is not None and usuario.is_authenticated:
+            self.recordar_primario(response)
+        return response
+
+    async def __acall__(self, request):
+        tokens = fijar_primario(self.leer_del_primario(request))
+        try:
+            response = await self.get_response(request)
+            escribio = hubo_escritura()
+        finally:
+            liberar_primario(tokens)
+
+        if escribio and hasattr(request, 'auser') and (await request.auser()).is_authenticated:
+            self.recordar_primario(response)
+        return response
+
+    @staticmethod
+    def leer_del_primario(request):
+        return request.method not in METODOS_SEGUROS or COOKIE_PRIMARIO in request.COOKIES
+
+    @staticmethod
+    def recordar_primario(response):
+        response.set_cookie(COOKIE_PRIMARIO, '1', max_age=VENTANA_PRIMARIO, httponly=True, samesite='Lax')
+
+
+class EnlacesAnticipadosMiddleware:
+    """
+    Agrega a las páginas HTML la cabecera Link con settings.ENLACES_ANTICIPADOS
+    (preconnect a los CDN y preload de las hojas de estilo y scripts de base.html).
+
+    El navegador abre las conexiones y empieza las descargas al recibir las cabeceras,
+    antes de leer el <head>. Los servidores y CDN que soportan 103 Early Hints (nginx con
+    early_hints, Cloudflare...) convierten esta cabecera en una respuesta 103 que se
+    envía incluso antes de que la vista termine; Django no puede enviar 103 por sí mismo.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enlaces = ', '.join(getattr(settings, 'ENLACES_ANTICIPADOS', []))
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.agregar_enlaces(self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.agregar_enlaces(await self.get_response(request))
+
+    def agregar_enlaces(self, response):
+        if self.enlaces and response.get('Content-Type', '').startswith('text/html') and 'Link' not in response:
+            response['Link'] = self.enlaces
+        return response
+
+
+class CompresionMiddleware:
+    """
+    Minifica el HTML y comprime las respuestas con Brotli o gzip (ver app/compresion.py).
+    Las transmitidas por partes solo se comprimen.
+    Reemplaza a django.middleware.gzip.GZipMiddleware; como aquel, debe ir al principio
+    de MIDDLEWARE para ver la respuesta final.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.procesar(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.procesar(request, await self.get_response(request))
+
+    def procesar(self, request, response):
+        tipo = response.get('Content-Type', '').split(';')[0].strip()
+        if (
+            response.status_code != 200
+            or response.has_header('Content-Encoding')
+            or tipo not in TIPOS_COMPRIMIBLES
+            or 'no-transform' in response.get('Cache-Control', '')
+            or (not response.streaming and len(response.content) < TAMANO_MINIMO)
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codificacion = elegir_codificacion(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codificacion is None:
+            return response
+
+        if response.streaming:
+            argumentos = (response.streaming_content, codificacion)
+            if response.is_async:
+                response.streaming_content = acomprimir_partes(*argumentos)
+            else:
+                response.streaming_content = comprimir_partes(*argumentos)
+            del response.headers['Content-Length']
+        else:
+            comprimido, tiempo = comprimir_cuerpo(request, response, codificacion)
+            response.content = comprimido
+            response['Content-Length'] = str(len(comprimido))
+            duracion = 0 if tiempo is None else tiempo * 1000
+            response['Server-Timing'] = f'compresion;dur={duracion:.2f};desc="{codificacion}"'
+
+        # El cuerpo cambió: un ETag fuerte ya no lo identifica byte a byte (igual que GZipMiddleware)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = codificacion
+        return response
+
+
+class LimitePeticionesMiddleware:
+    """
+    Limita las peticiones por ruta con cubetas de tokens (ver app/limites.py y
+    settings.LIMITES_PETICIONES) y responde 429 con Retry-After al agotarse.
+
+    Va después de AuthenticationMiddleware (las reglas por usuario necesitan request.user)
+    y antes que el resto, para que una petición rechazada no toque la base de datos.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.reglas = cargar_reglas()
+        self.reglas_por_ruta = {}  # Nombre de ruta -> regla (o None); los nombres son pocos y fijos
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        regla = self.regla(request)
+        if regla is not None:
+            usuario = request.user if regla.clave == 'usuario' else None
+            rechazo = self.comprobar(request, regla, usuario)
+            if rechazo is not None:
+                return rechazo
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        regla = self.regla(request)
+        if regla is not None:
+            usuario = await request.auser() if regla.clave == 'usuario' else None
+            rechazo = self.comprobar(request, regla, usuario)
+            if rechazo is not None:
+                return rechazo
+        return await self.get_response(request)
+
+    def regla(self, request):
+        if not self.reglas:
+            return None
+        try:
+            nombre = resolve(request.path_info).url_name
+        except Resolver404:
+            return None
+        if nombre not in self.reglas_por_ruta:
+            self.reglas_por_ruta[nombre] = regla_para(self.reglas, nombre or '')
+        regla = self.reglas_por_ruta[nombre]
+        return regla if regla is not None and regla.aplica(request.method) else None
+
+    @staticmethod
+    def comprobar(request, regla, usuario):
+        if usuario is not None and usuario.is_authenticated:
+            identidad = f'usuario:{usuario.pk}'
+        else:
+            identidad = f'ip:{ip_cliente(request)}'
+        permitido, espera = consumir(regla, identidad)
+        if permitido:
+            return None
+
+        segundos = max(1, math.ceil(espera))
+        mensaje = f'Demasiadas peticiones. Intenta de nuevo en {segundos} segundos.'
+        if 'application/json' in request.headers.get('Accept', ''):
+            response = JsonResponse({'error': mensaje}, status=429)
+        else:
+            response = HttpResponse(mensaje, status=429, content_type='text/plain; charset=utf-8')
+        response['Retry-After'] = str(segundos)
+        return response
+
+
+class ModoDegradadoMiddleware:
+    """
+    Modo degradado de solo lectura cuando la base de datos falla (ver app/degradado.py).
+
+    Guarda la última copia buena de cada página pública y, mientras la base está caída,
+    la sirve marcada como obsoleta y rechaza las escrituras con 503. Va justo después de
+    CompresionMiddleware para cubrir también los errores de las sesiones y la autenticación.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if base_caida() and not sondear():
+            return self.degradada(request)
+        return self.procesar(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        if base_caida() and not await sync_to_async(sondear)():
+            return self.degradada(request)
+        return self.procesar(request, await self.get_response(request))
+
+    @staticmethod
+    def degradada(request):
+        if request.method in ('GET', 'HEAD'):
+            response = respuesta_instantanea(request)
+            if response is not None:
+                return response
+        return respuesta_no_disponible(request)
+
+    def procesar(self, request, response):
+        if getattr(request, 'error_base_datos', False):
+            # El error ya marcó la base como caída: la copia buena en lugar del error 500
+            return self.degradada(request)
+        if admite_instantanea(request, response) and toca_instantanea(request):
+            content_type = response['Content-Type']
+            if not response.streaming:
+                guardar_instantanea(request, response.content, content_type)
+            elif response.is_async:
+                response.streaming_content = aguardar_al_terminar(request, response.streaming_content, content_type)
+            else:
+                response.streaming_content = guardar_al_terminar(request, response.streaming_content, content_type)
+        return response
+
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_domingo_jueves_lunes_martes_miercoles_sabado_viernes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValorIndicador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('indicador', models.CharField(choices=[('dolar', 'Dólar observado'), ('euro', 'Euro'), ('uf', 'Unidad de Fomento'), ('utm', 'Unidad Tributaria Mensual')], max_length=10, verbose_name='Indicador')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('valor', models.FloatField(verbose_name='Valor')),
+            ],
+            options={
+                'verbose_name': 'Valor de indicador',
+                'verbose_name_plural': 'Valores de indicadores',
+                'constraints': [models.UniqueConstraint(fields=('indicador', 'fecha'), name='valor_indicador_unico_por_dia')],
+            },
+        ),
+    ]
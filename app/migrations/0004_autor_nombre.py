@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:04
+
+from django.db import migrations, models
+from django.db.models import Case, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Concat, Trim
+
+
+def copiar_nombres_autores(apps, schema_editor):
+    """
+    Rellena autor_nombre de las entradas existentes con un UPDATE por modelo.
+    """
+    User = apps.get_model('auth', 'User')
+    usuarios = User.objects.filter(pk=OuterRef('autor_id')).annotate(
+        completo=Trim(Concat('first_name', Value(' '), 'last_name', output_field=models.CharField())),
+    ).annotate(
+        visible=Case(When(completo='', then=F('username')), default=F('completo'), output_field=models.CharField()),
+    )
+    for nombre in ('EntradaIndex', 'BlogEntrada'):
+        modelo = apps.get_model('app', nombre)
+        modelo.objects.using(schema_editor.connection.alias).update(
+            autor_nombre=Subquery(usuarios.values('visible')[:1])
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_valorindicador'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogentrada',
+            name='autor_nombre',
+            field=models.CharField(blank=True, editable=False, max_length=301, verbose_name='Nombre del autor'),
+        ),
+        migrations.AddField(
+            model_name='entradaindex',
+            name='autor_nombre',
+            field=models.CharField(blank=True, editable=False, max_length=301, verbose_name='Nombre del autor'),
+        ),
+        migrations.RunPython(copiar_nombres_autores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_autor_nombre'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntradaRelacionada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicion', models.PositiveSmallIntegerField(verbose_name='Posición')),
+                ('similitud', models.FloatField(verbose_name='Similitud')),
+                ('entrada', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relacionadas', to='app.blogentrada', verbose_name='Entrada')),
+                ('relacionada', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app.blogentrada', verbose_name='Entrada relacionada')),
+            ],
+            options={
+                'verbose_name': 'Entrada relacionada',
+                'verbose_name_plural': 'Entradas relacionadas',
+                'constraints': [models.UniqueConstraint(fields=('entrada', 'posicion'), name='entrada_relacionada_posicion_unica')],
+            },
+        ),
+    ]
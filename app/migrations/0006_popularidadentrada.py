@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_entradarelacionada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularidadEntrada',
+            fields=[
+                ('entrada', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularidad', serialize=False, to='app.blogentrada', verbose_name='Entrada')),
+                ('puntaje', models.FloatField(default=0, verbose_name='Puntaje')),
+                ('vistas', models.PositiveIntegerField(default=0, verbose_name='Vistas')),
+                ('ultima_vista', models.DateTimeField(blank=True, null=True, verbose_name='Última vista')),
+            ],
+            options={
+                'verbose_name': 'Popularidad de entrada',
+                'verbose_name_plural': 'Popularidad de entradas',
+                'indexes': [models.Index(fields=['-puntaje'], name='popularidad_puntaje_idx')],
+            },
+        ),
+    ]
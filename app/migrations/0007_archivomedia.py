@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_popularidadentrada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoMedia',
+            fields=[
+                ('nombre', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Nombre')),
+                ('tamano', models.PositiveBigIntegerField(verbose_name='Tamaño')),
+                ('referencias', models.PositiveIntegerField(default=0, verbose_name='Referencias')),
+                ('ultimo_uso', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Último uso')),
+            ],
+            options={
+                'verbose_name': 'Archivo de media',
+                'verbose_name_plural': 'Archivos de media',
+            },
+        ),
+    ]
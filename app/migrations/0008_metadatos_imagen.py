@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_archivomedia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogentrada',
+            name='imagen_alto',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Alto de la imagen'),
+        ),
+        migrations.AddField(
+            model_name='blogentrada',
+            name='imagen_ancho',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ancho de la imagen'),
+        ),
+        migrations.AddField(
+            model_name='blogentrada',
+            name='imagen_color',
+            field=models.CharField(blank=True, editable=False, max_length=7, verbose_name='Color dominante'),
+        ),
+        migrations.AddField(
+            model_name='blogentrada',
+            name='imagen_lqip',
+            field=models.TextField(blank=True, editable=False, verbose_name='Miniatura de carga'),
+        ),
+        migrations.AddField(
+            model_name='entradaindex',
+            name='imagen_alto',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Alto de la imagen'),
+        ),
+        migrations.AddField(
+            model_name='entradaindex',
+            name='imagen_ancho',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ancho de la imagen'),
+        ),
+        migrations.AddField(
+            model_name='entradaindex',
+            name='imagen_color',
+            field=models.CharField(blank=True, editable=False, max_length=7, verbose_name='Color dominante'),
+        ),
+        migrations.AddField(
+            model_name='entradaindex',
+            name='imagen_lqip',
+            field=models.TextField(blank=True, editable=False, verbose_name='Miniatura de carga'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:02
+
+import app.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_metadatos_imagen'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogentrada',
+            name='imagen_ilegible',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Imagen ilegible'),
+        ),
+        migrations.AddField(
+            model_name='entradaindex',
+            name='imagen_ilegible',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Imagen ilegible'),
+        ),
+        migrations.AlterField(
+            model_name='blogentrada',
+            name='imagen',
+            field=app.models.CampoImagen(blank=True, height_field='imagen_alto', null=True, upload_to='blog_imagenes/', verbose_name='Imagen', width_field='imagen_ancho'),
+        ),
+        migrations.AlterField(
+            model_name='entradaindex',
+            name='imagen',
+            field=app.models.CampoImagen(blank=True, height_field='imagen_alto', null=True, upload_to='entrada_imagenes/', verbose_name='Imagen', width_field='imagen_ancho'),
+        ),
+    ]
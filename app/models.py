@@ -1,17 +1,70 @@
 from django.db import models
+from django.db.models import Case, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Concat, Trim
 from django.contrib.auth.models import User  # Importa el modelo de usuario
+from django.utils import timezone
+
+from .managers import (  # Managers con caché
+    EntradaIndexManager, BlogEntradaManager, EntradaRelacionadaManager, PopularidadEntradaManager, ProgramaManager,
+    ValorIndicadorManager
+)
 
 # Create your models here.
 
+def nombre_visible(usuario):
+    """
+    Nombre con el que se muestra a un autor: nombre completo o, si no tiene, su usuario.
+    """
+    return usuario.get_full_name() or usuario.username
+
+
+def nombre_visible_sql(modelo_usuario=User):
+    """
+    Subconsulta equivalente a nombre_visible(autor) para la fila externa (usa su autor_id).
+    Permite recalcular autor_nombre de muchas filas con un solo UPDATE.
+    """
+    usuarios = modelo_usuario.objects.filter(pk=OuterRef('autor_id')).annotate(
+        completo=Trim(Concat('first_name', Value(' '), 'last_name', output_field=models.CharField())),
+    ).annotate(
+        visible=Case(When(completo='', then=F('username')), default=F('completo'), output_field=models.CharField()),
+    )
+    return Subquery(usuarios.values('visible')[:1])
+
+
+class CampoImagen(models.ImageField):
+    """
+    ImageField que no vuelve a leer las dimensiones de una imagen marcada como ilegible.
+    Django las lee en post_init siempre que width_field o height_field estén vacíos, es
+    decir, abriría el archivo cada vez que se carga la fila (ver app/imagenes.py).
+    """
+
+    def update_dimension_fields(self, instance, force=False, *args, **kwargs):
+        if not force and instance.__dict__.get('imagen_ilegible'):
+            return
+        super().update_dimension_fields(instance, force, *args, **kwargs)
+
+
 #MODELOS PARA LA APLICACIÓN DE RADIO HITS
 #--------------------------------------------------------------------------------------------------------------------------------------
 #MODELO PARA LA CREACIÓN DE IMAGENES Y TEXTO EN EL INDICE DE RADIO HITS
 class EntradaIndex(models.Model):
     autor = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='Autor')  # Relación con el modelo User
+    autor_nombre = models.CharField(max_length=301, blank=True, editable=False, verbose_name='Nombre del autor')  # Copia de nombre_visible(autor), sincronizada por señales
     titulo = models.CharField(max_length=200, verbose_name='Título')
-    imagen = models.ImageField(upload_to='entrada_imagenes/', blank=True, null=True, verbose_name='Imagen')  # Campo para la imagen
+    imagen = CampoImagen(
+        upload_to='entrada_imagenes/', blank=True, null=True, width_field='imagen_ancho', height_field='imagen_alto',
+        verbose_name='Imagen',
+    )  # Campo para la imagen
+    imagen_ancho = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name='Ancho de la imagen')  # Los escribe Django al asignar la imagen
+    imagen_alto = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name='Alto de la imagen')
+    imagen_color = models.CharField(max_length=7, blank=True, editable=False, verbose_name='Color dominante')  # '#rrggbb', calculado al subirla (app/imagenes.py)
+    imagen_lqip = models.TextField(blank=True, editable=False, verbose_name='Miniatura de carga')  # data URI desenfocada
+    imagen_ilegible = models.BooleanField(default=False, editable=False, verbose_name='Imagen ilegible')  # No se reintenta al guardar (app/imagenes.py)
     texto = models.TextField(verbose_name='Texto')
     fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')  # Fecha de creación automática al crear la entrada      
+
+    objects = EntradaIndexManager()  # Consultas cacheadas e invalidadas por generación
+
     def __str__(self):
         return self.titulo
 
@@ -22,11 +75,22 @@ class EntradaIndex(models.Model):
 
 class BlogEntrada(models.Model):
     autor = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='Autor')  # Relación con el modelo User
+    autor_nombre = models.CharField(max_length=301, blank=True, editable=False, verbose_name='Nombre del autor')  # Copia de nombre_visible(autor), sincronizada por señales
     titulo = models.CharField(max_length=200, verbose_name='Título')
-    imagen = models.ImageField(upload_to='blog_imagenes/', blank=True, null=True, verbose_name='Imagen')  # Campo para la imagen de la entrada
+    imagen = CampoImagen(
+        upload_to='blog_imagenes/', blank=True, null=True, width_field='imagen_ancho', height_field='imagen_alto',
+        verbose_name='Imagen',
+    )  # Campo para la imagen de la entrada
+    imagen_ancho = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name='Ancho de la imagen')  # Los escribe Django al asignar la imagen
+    imagen_alto = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name='Alto de la imagen')
+    imagen_color = models.CharField(max_length=7, blank=True, editable=False, verbose_name='Color dominante')  # '#rrggbb', calculado al subirla (app/imagenes.py)
+    imagen_lqip = models.TextField(blank=True, editable=False, verbose_name='Miniatura de carga')  # data URI desenfocada
+    imagen_ilegible = models.BooleanField(default=False, editable=False, verbose_name='Imagen ilegible')  # No se reintenta al guardar (app/imagenes.py)
     contenido = models.TextField(verbose_name='Contenido')
     fecha_publicacion = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de la publicación') # Fecha de publicación automática al crear la entrada
 
+    objects = BlogEntradaManager()  # Consultas cacheadas e invalidadas por generación
+
     def __str__(self):
         return self.titulo
 
@@ -40,6 +104,8 @@ class Lunes(models.Model):
     hora_fin = models.TimeField(verbose_name='Hora de fin')
     nombre_programa = models.CharField(max_length=200, verbose_name='Nombre del programa')
 
+    objects = ProgramaManager()  # Consultas cacheadas e invalidadas por generación
+
     def __str__(self):
         return self.nombre_programa
 
@@ -50,6 +116,8 @@ class Martes(models.Model):
     hora_fin = models.TimeField(verbose_name='Hora de fin')
     nombre_programa = models.CharField(max_length=200, verbose_name='Nombre del programa')
 
+    objects = ProgramaManager()  # Consultas cacheadas e invalidadas por generación
+
     def __str__(self):
         return self.nombre_programa
 
@@ -60,6 +128,8 @@ class Miercoles(models.Model):
     hora_fin = models.TimeField(verbose_name='Hora de fin')
     nombre_programa = models.CharField(max_length=200, verbose_name='Nombre del programa')
 
+    objects = ProgramaManager()  # Consultas cacheadas e invalidadas por generación
+
     def __str__(self):
         return self.nombre_programa
     
@@ -70,6 +140,8 @@ class Jueves(models.Model):
     hora_fin = models.TimeField(verbose_name='Hora de fin')
     nombre_programa = models.CharField(max_length=200, verbose_name='Nombre del programa')
 
+    objects = ProgramaManager()  # Consultas cacheadas e invalidadas por generación
+
     def __str__(self):
         return self.nombre_programa
 #--------------------------------------------------------------------------------------------------------------------------------------
@@ -79,6 +151,8 @@ class Viernes(models.Model):
     hora_fin = models.TimeField(verbose_name='Hora de fin')
     nombre_programa = models.CharField(max_length=200, verbose_name='Nombre del programa')
 
+    objects = ProgramaManager()  # Consultas cacheadas e invalidadas por generación
+
     def __str__(self):
         return self.nombre_programa
 #--------------------------------------------------------------------------------------------------------------------------------------
@@ -88,6 +162,8 @@ class Sabado(models.Model):
     hora_fin = models.TimeField(verbose_name='Hora de fin')
     nombre_programa = models.CharField(max_length=200, verbose_name='Nombre del programa')
 
+    objects = ProgramaManager()  # Consultas cacheadas e invalidadas por generación
+
     def __str__(self):
         return self.nombre_programa
 #--------------------------------------------------------------------------------------------------------------------------------------
@@ -97,7 +173,115 @@ class Domingo(models.Model):
     hora_fin = models.TimeField(verbose_name='Hora de fin')
     nombre_programa = models.CharField(max_length=200, verbose_name='Nombre del programa')
 
+    objects = ProgramaManager()  # Consultas cacheadas e invalidadas por generación
+
     def __str__(self):
         return self.nombre_programa
 #--------------------------------------------------------------------------------------------------------------------------------------
 
+#MODELO PARA EL HISTÓRICO DE INDICADORES ECONÓMICOS
+class ValorIndicador(models.Model):
+    INDICADORES = [
+        ('dolar', 'Dólar observado'),
+        ('euro', 'Euro'),
+        ('uf', 'Unidad de Fomento'),
+        ('utm', 'Unidad Tributaria Mensual'),
+    ]
+    indicador = models.CharField(max_length=10, choices=INDICADORES, verbose_name='Indicador')
+    fecha = models.DateField(verbose_name='Fecha')
+    valor = models.FloatField(verbose_name='Valor')
+
+    objects = ValorIndicadorManager()  # Consultas cacheadas e invalidadas por generación
+
+    class Meta:
+        verbose_name = 'Valor de indicador'
+        verbose_name_plural = 'Valores de indicadores'
+        # Un valor por indicador y día; el índice también sirve para las consultas por rango de fechas
+        constraints = [
+            models.UniqueConstraint(fields=['indicador', 'fecha'], name='valor_indicador_unico_por_dia'),
+        ]
+
+    def __str__(self):
+        return f'{self.indicador} {self.fecha}: {self.valor}'
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+#MODELO PARA LAS ENTRADAS RELACIONADAS DEL BLOG ("Sigue leyendo", calculadas en app/relacionadas.py)
+class EntradaRelacionada(models.Model):
+    entrada = models.ForeignKey(BlogEntrada, on_delete=models.CASCADE, related_name='relacionadas', verbose_name='Entrada')
+    relacionada = models.ForeignKey(BlogEntrada, on_delete=models.CASCADE, related_name='+', verbose_name='Entrada relacionada')
+    posicion = models.PositiveSmallIntegerField(verbose_name='Posición')  # 0 = la más parecida
+    similitud = models.FloatField(verbose_name='Similitud')  # Coseno entre los vectores TF-IDF
+
+    objects = EntradaRelacionadaManager()  # Consultas cacheadas con el grupo del blog
+
+    class Meta:
+        verbose_name = 'Entrada relacionada'
+        verbose_name_plural = 'Entradas relacionadas'
+        # El índice único (entrada, posicion) resuelve la consulta de la vista de detalle
+        constraints = [
+            models.UniqueConstraint(fields=['entrada', 'posicion'], name='entrada_relacionada_posicion_unica'),
+        ]
+
+    def __str__(self):
+        return f'{self.entrada_id} -> {self.relacionada_id} ({self.similitud:.2f})'
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+#MODELO PARA LA POPULARIDAD DE LAS ENTRADAS DEL BLOG (tendencias, mantenida en app/tendencias.py)
+class PopularidadEntrada(models.Model):
+    entrada = models.OneToOneField(BlogEntrada, on_delete=models.CASCADE, primary_key=True, related_name='popularidad', verbose_name='Entrada')
+    puntaje = models.FloatField(default=0, verbose_name='Puntaje')  # log2 de las vistas con decaimiento, relativo a EPOCA
+    vistas = models.PositiveIntegerField(default=0, verbose_name='Vistas')  # Total sin decaimiento
+    ultima_vista = models.DateTimeField(null=True, blank=True, verbose_name='Última vista')
+
+    objects = PopularidadEntradaManager()
+
+    class Meta:
+        verbose_name = 'Popularidad de entrada'
+        verbose_name_plural = 'Popularidad de entradas'
+        # El ranking se lee en orden del índice: las N primeras sin ordenar toda la tabla
+        indexes = [models.Index(fields=['-puntaje'], name='popularidad_puntaje_idx')]
+
+    def __str__(self):
+        return f'{self.entrada_id}: {self.puntaje:.3f}'
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+#MODELO PARA LOS ARCHIVOS SUBIDOS, GUARDADOS UNA SOLA VEZ POR CONTENIDO (ver app/almacenamiento.py)
+class ArchivoMedia(models.Model):
+    nombre = models.CharField(max_length=100, primary_key=True, verbose_name='Nombre')  # contenido/ab/<sha256>.jpg
+    tamano = models.PositiveBigIntegerField(verbose_name='Tamaño')  # Bytes
+    referencias = models.PositiveIntegerField(default=0, verbose_name='Referencias')  # Filas que usan el archivo
+    ultimo_uso = models.DateTimeField(default=timezone.now, verbose_name='Último uso')  # Subida o cambio de referencias
+
+    class Meta:
+        verbose_name = 'Archivo de media'
+        verbose_name_plural = 'Archivos de media'
+
+    def __str__(self):
+        return f'{self.nombre} ({self.referencias})'
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+# Modelos de programación indexados por la clave del día usada en URLs y plantillas
+PROGRAMACION_POR_DIA = {
+    'lunes': Lunes,
+    'martes': Martes,
+    'miercoles': Miercoles,
+    'jueves': Jueves,
+    'viernes': Viernes,
+    'sabado': Sabado,
+    'domingo': Domingo,
+}
+
+# Modelos que guardan una copia del nombre del autor (evita el JOIN con auth_user al mostrarlos)
+MODELOS_CON_AUTOR = [EntradaIndex, BlogEntrada]
+
+# Modelos con imágenes guardadas por contenido, con referencias contadas en ArchivoMedia
+MODELOS_CON_IMAGEN = [EntradaIndex, BlogEntrada]
+
+
+def programacion_semanal():
+    """
+    Devuelve un diccionario {día: [programas ordenados por hora de inicio]} para toda la semana.
+    Cada día se lee desde la caché compartida por todas las vistas.
+    """
+    return {dia: modelo.objects.programacion() for dia, modelo in PROGRAMACION_POR_DIA.items()}
+
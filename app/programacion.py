@@ -0,0 +1,609 @@
+"""
+Operaciones sobre la programación semanal completa.
+
+Los cambios de varios días se aplican en bloque: por cada día como máximo un DELETE,
+un bulk_update y un bulk_create, todo dentro de una transacción. Las operaciones
+masivas de CacheQuerySet invalidan el grupo 'programacion' una sola vez al confirmar.
+
+Antes de guardar, validar_semana() revisa la semana entera de una vez: cada programa
+se convierte en un intervalo en minutos desde el lunes 00:00, los intervalos se ordenan
+y se recorren con una línea de barrido (O(n log n) más el número de conflictos).
+Un programa cuya hora de fin es anterior a la de inicio termina al día siguiente, y el
+del domingo que cruza la medianoche continúa el lunes (la semana es circular).
+
+La semana completa también se importa y exporta como CSV o iCalendar (.ics). Los
+archivos se leen línea a línea, se validan enteros de una vez y se escriben con
+bulk_create por lotes dentro de una transacción: o se carga todo o no se carga nada.
+"""
+
+import csv
+import functools
+import heapq
+import io
+import re
+import unicodedata
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import PROGRAMACION_POR_DIA
+
+CAMPOS_PROGRAMA = ['hora_inicio', 'hora_fin', 'nombre_programa']
+
+DIAS = list(PROGRAMACION_POR_DIA)
+DIA_POR_MODELO = {modelo: dia for dia, modelo in PROGRAMACION_POR_DIA.items()}
+NOMBRES_DIAS = {
+    'lunes': 'lunes', 'martes': 'martes', 'miercoles': 'miércoles', 'jueves': 'jueves',
+    'viernes': 'viernes', 'sabado': 'sábado', 'domingo': 'domingo',
+}
+
+MINUTOS_DIA = 24 * 60
+MINUTOS_SEMANA = 7 * MINUTOS_DIA
+
+LOTE_IMPORTACION = 500  # Filas por INSERT al importar
+ENCABEZADO_CSV = ['dia', *CAMPOS_PROGRAMA]
+FORMATOS = ['csv', 'ics']
+
+# iCalendar: cada programa es un evento semanal que empieza en la semana de referencia
+SEMANA_REFERENCIA_ICS = date(2024, 1, 1)  # Un lunes
+DIAS_ICS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+PRODID_ICS = '-//Radio Hits Iquique//Programacion semanal//ES'
+ANOS_VTIMEZONE = 10  # Años futuros cubiertos por los cambios de hora del VTIMEZONE
+
+
+class ErrorProgramacion(ValueError):
+    """
+    La programación recibida no se puede guardar. `errores` contiene todos los motivos.
+    """
+
+    def __init__(self, errores):
+        self.errores = list(errores)
+        super().__init__('\n'.join(self.errores))
+
+
+def describir_minuto(minuto):
+    """
+    Minuto de la semana (0 = lunes 00:00) como texto: "martes 06:30".
+    """
+    dia, resto = divmod(minuto % MINUTOS_SEMANA, MINUTOS_DIA)
+    return f'{NOMBRES_DIAS[DIAS[dia]]} {resto // 60:02d}:{resto % 60:02d}'
+
+
+class Franja:
+    """
+    Intervalo [inicio, fin) de un programa en minutos de la semana.
+    """
+    __slots__ = ('dia', 'programa', 'inicio', 'fin')
+
+    def __init__(self, dia, programa, inicio, fin):
+        self.dia = dia
+        self.programa = programa
+        self.inicio = inicio
+        self.fin = fin
+
+    def __str__(self):
+        programa = self.programa
+        return (
+            f'"{programa.nombre_programa}" ({NOMBRES_DIAS[self.dia]} '
+            f'{programa.hora_inicio:%H:%M}–{programa.hora_fin:%H:%M})'
+        )
+
+
+class Solapamiento:
+    def __init__(self, primera, segunda, desde, hasta):
+        self.primera = primera
+        self.segunda = segunda
+        self.desde = desde
+        self.hasta = hasta
+
+    def involucra(self, programa):
+        return programa is self.primera.programa or programa is self.segunda.programa
+
+    def __str__(self):
+        return (
+            f'{self.primera} se superpone con {self.segunda} '
+            f'entre el {describir_minuto(self.desde)} y el {describir_minuto(self.hasta)}.'
+        )
+
+
+class Hueco:
+    def __init__(self, desde, hasta):
+        self.desde = desde
+        self.hasta = hasta
+
+    def __str__(self):
+        return f'Sin programación entre el {describir_minuto(self.desde)} y el {describir_minuto(self.hasta)}.'
+
+
+class ProgramaSinDuracion:
+    def __init__(self, dia, programa):
+        self.dia = dia
+        self.programa = programa
+
+    def __str__(self):
+        return f'"{self.programa.nombre_programa}" ({NOMBRES_DIAS[self.dia]}) empieza y termina a la misma hora.'
+
+
+class ResultadoValidacion:
+    """
+    Solapamientos (impiden guardar) y huecos (solo avisos) de una semana de programación.
+    """
+
+    def __init__(self, solapamientos, huecos, errores):
+        self.solapamientos = solapamientos
+        self.huecos = huecos
+        self.errores = errores  # Programas inválidos por sí solos (inicio igual al fin)
+
+    @property
+    def valida(self):
+        return not self.solapamientos and not self.errores
+
+    def errores_de(self, programa):
+        """
+        Mensajes de error que afectan a un programa concreto (el que se está editando).
+        """
+        return [str(error) for error in self.errores if error.programa is programa] + [
+            str(solapamiento) for solapamiento in self.solapamientos if solapamiento.involucra(programa)
+        ]
+
+    def mensajes(self):
+        return [str(error) for error in self.errores] + [str(solapamiento) for solapamiento in self.solapamientos]
+
+
+def _minutos(hora):
+    return hora.hour * 60 + hora.minute
+
+
+def franjas_de_semana(semana):
+    """
+    Convierte {día: programas} en franjas de minutos de la semana. Devuelve (franjas, errores).
+    Un programa que cruza la medianoche del domingo se divide en dos franjas.
+    """
+    franjas, errores = [], []
+    for indice, dia in enumerate(DIAS):
+        base = indice * MINUTOS_DIA
+        for programa in semana.get(dia, ()):
+            inicio, fin = _minutos(programa.hora_inicio), _minutos(programa.hora_fin)
+            if inicio == fin:
+                errores.append(ProgramaSinDuracion(dia, programa))
+                continue
+            duracion = (fin - inicio) % MINUTOS_DIA  # Fin anterior al inicio: termina al día siguiente
+            inicio += base
+            fin = inicio + duracion
+            if fin > MINUTOS_SEMANA:
+                franjas.append(Franja(dia, programa, inicio, MINUTOS_SEMANA))
+                franjas.append(Franja(dia, programa, 0, fin - MINUTOS_SEMANA))
+            else:
+                franjas.append(Franja(dia, programa, inicio, fin))
+    return franjas, errores
+
+
+def validar_semana(semana):
+    """
+    Busca todos los solapamientos y huecos de la semana {día: [programas]}, donde cada
+    programa tiene hora_inicio, hora_fin y nombre_programa (instancias o equivalentes).
+
+    Línea de barrido: las franjas se ordenan por inicio y se mantiene un montículo con las
+    que siguen activas (ordenadas por fin). Cada franja nueva se superpone exactamente con
+    las activas que quedan tras descartar las terminadas; si no queda ninguna activa y la
+    cobertura acumulada termina antes, hay un hueco.
+    """
+    franjas, errores = franjas_de_semana(semana)
+    franjas.sort(key=lambda franja: (franja.inicio, franja.fin))
+
+    solapamientos, huecos = [], []
+    reportados = set()
+    activas = []  # Montículo de (fin, orden, franja)
+    cobertura = None  # Mayor fin visto hasta ahora
+    for orden, franja in enumerate(franjas):
+        while activas and activas[0][0] <= franja.inicio:
+            heapq.heappop(activas)
+        for _, _, otra in activas:
+            # Un programa dividido en dos franjas no debe reportarse dos veces con el mismo otro
+            par = frozenset((id(otra.programa), id(franja.programa)))
+            if otra.programa is not franja.programa and par not in reportados:
+                reportados.add(par)
+                solapamientos.append(Solapamiento(otra, franja, franja.inicio, min(otra.fin, franja.fin)))
+        if cobertura is not None and franja.inicio > cobertura:
+            huecos.append(Hueco(cobertura, franja.inicio))
+        cobertura = franja.fin if cobertura is None else max(cobertura, franja.fin)
+        heapq.heappush(activas, (franja.fin, orden, franja))
+
+    # Hueco circular: desde el último fin de la semana hasta el primer inicio (del lunes siguiente)
+    if franjas and cobertura - MINUTOS_SEMANA < franjas[0].inicio:
+        huecos.append(Hueco(cobertura, franjas[0].inicio + MINUTOS_SEMANA))
+
+    return ResultadoValidacion(solapamientos, huecos, errores)
+
+
+def cargar_semana(excluir=()):
+    """
+    Lee de la base de datos (sin caché) los programas de todos los días salvo los de `excluir`.
+    """
+    return {
+        dia: list(modelo.objects.only(*CAMPOS_PROGRAMA).order_by('hora_inicio'))
+        for dia, modelo in PROGRAMACION_POR_DIA.items()
+        if dia not in excluir
+    }
+
+
+def aplicar_cambios(cambios):
+    """
+    Aplica {día: (nuevos, modificados, ids_eliminados)} en una sola transacción.
+    `nuevos` y `modificados` son instancias del modelo del día. Devuelve un diccionario
+    con el total de filas creadas, actualizadas y eliminadas.
+    """
+    totales = {'creados': 0, 'actualizados': 0, 'eliminados': 0}
+    with transaction.atomic():
+        for dia, (nuevos, modificados, eliminados) in cambios.items():
+            modelo = PROGRAMACION_POR_DIA[dia]
+            if eliminados:
+                totales['eliminados'] += modelo.objects.filter(pk__in=eliminados).delete()[0]
+            if modificados:
+                totales['actualizados'] += modelo.objects.bulk_update(modificados, CAMPOS_PROGRAMA)
+            if nuevos:
+                totales['creados'] += len(modelo.objects.bulk_create(nuevos))
+    return totales
+
+
+def copiar_dia(origen, destinos, combinar=False):
+    """
+    Copia los programas de `origen` a cada día de `destinos` reemplazando su programación
+    (o sumándola con combinar=True). Se valida la semana resultante y se escribe con un
+    DELETE y un INSERT por día de destino. Devuelve el número de programas creados.
+    """
+    semana = cargar_semana()
+    copias = {}
+    for dia in destinos:
+        if dia == origen:
+            continue
+        modelo = PROGRAMACION_POR_DIA[dia]
+        copias[dia] = [
+            modelo(**{campo: getattr(programa, campo) for campo in CAMPOS_PROGRAMA}) for programa in semana[origen]
+        ]
+        semana[dia] = (semana[dia] if combinar else []) + copias[dia]
+
+    resultado = validar_semana(semana)
+    errores = [error for programas in copias.values() for programa in programas for error in resultado.errores_de(programa)]
+    if errores:
+        raise ErrorProgramacion(dict.fromkeys(errores))
+
+    with transaction.atomic():
+        for dia, programas in copias.items():
+            modelo = PROGRAMACION_POR_DIA[dia]
+            if not combinar:
+                modelo.objects.all().delete()
+            modelo.objects.bulk_create(programas, batch_size=LOTE_IMPORTACION)
+    return sum(len(programas) for programas in copias.values())
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# IMPORTACIÓN
+
+def dia_de(texto):
+    """
+    Clave del día a partir de su nombre, sin distinguir mayúsculas ni tildes ("Miércoles" -> "miercoles").
+    """
+    normalizado = unicodedata.normalize('NFKD', texto.strip().lower()).encode('ascii', 'ignore').decode()
+    return normalizado if normalizado in PROGRAMACION_POR_DIA else None
+
+
+def _programa(dia, hora_inicio, hora_fin, nombre, origen, errores):
+    """
+    Construye el programa o anota por qué no es válido. `origen` identifica la fila ("línea 12").
+    """
+    nombre = nombre.strip()
+    campo = PROGRAMACION_POR_DIA[dia]._meta.get_field('nombre_programa')
+    if not nombre:
+        errores.append(f'{origen}: falta el nombre del programa.')
+    elif len(nombre) > campo.max_length:
+        errores.append(f'{origen}: el nombre tiene más de {campo.max_length} caracteres.')
+    else:
+        return PROGRAMACION_POR_DIA[dia](hora_inicio=hora_inicio, hora_fin=hora_fin, nombre_programa=nombre)
+    return None
+
+
+def leer_csv(lineas, errores):
+    """
+    Lee un CSV con columnas dia,hora_inicio,hora_fin,nombre_programa (con encabezado) y
+    entrega (día, programa) a medida que avanza. Los errores se acumulan en `errores`.
+    """
+    lector = csv.DictReader(lineas)
+    faltantes = set(ENCABEZADO_CSV) - set(lector.fieldnames or [])
+    if faltantes:
+        errores.append(f'Faltan las columnas: {", ".join(sorted(faltantes))}.')
+        return
+    for fila in lector:
+        origen = f'Línea {lector.line_num}'
+        dia = dia_de(fila['dia'] or '')
+        if dia is None:
+            errores.append(f'{origen}: día desconocido "{fila["dia"]}".')
+            continue
+        try:
+            hora_inicio = time.fromisoformat((fila['hora_inicio'] or '').strip())
+            hora_fin = time.fromisoformat((fila['hora_fin'] or '').strip())
+        except ValueError:
+            errores.append(f'{origen}: hora inválida (usa HH:MM).')
+            continue
+        programa = _programa(dia, hora_inicio, hora_fin, fila['nombre_programa'] or '', origen, errores)
+        if programa is not None:
+            yield dia, programa
+
+
+def _lineas_desplegadas(lineas):
+    """
+    Une las líneas plegadas de iCalendar (las que continúan empiezan con espacio o tabulador).
+    """
+    actual = None
+    for linea in lineas:
+        linea = linea.rstrip('\r\n')
+        if linea[:1] in (' ', '\t') and actual is not None:
+            actual += linea[1:]
+            continue
+        if actual is not None:
+            yield actual
+        actual = linea
+    if actual:
+        yield actual
+
+
+def _propiedad(linea):
+    """
+    Separa "DTSTART;TZID=America/Santiago:20240101T080000" en (nombre, parámetros, valor).
+    """
+    cabecera, _, valor = linea.partition(':')
+    nombre, *parametros = cabecera.split(';')
+    return nombre.upper(), dict(parametro.partition('=')[::2] for parametro in parametros), valor
+
+
+def _hora_local(valor, parametros):
+    """
+    Hora local (America/Santiago) y día de la semana de un DTSTART/DTEND.
+    Acepta horas flotantes, en UTC (sufijo Z) o con TZID.
+    """
+    zona_local = ZoneInfo(settings.TIME_ZONE)
+    momento = datetime.strptime(valor.rstrip('Z'), '%Y%m%dT%H%M%S')
+    if valor.endswith('Z'):
+        momento = momento.replace(tzinfo=dt_timezone.utc).astimezone(zona_local)
+    elif 'TZID' in parametros:
+        momento = momento.replace(tzinfo=ZoneInfo(parametros['TZID'].strip('"'))).astimezone(zona_local)
+    return momento
+
+
+def _duracion(valor):
+    coincidencia = re.fullmatch(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?', valor)
+    if not coincidencia:
+        raise ValueError(valor)
+    dias, horas, minutos, segundos = (int(parte or 0) for parte in coincidencia.groups())
+    return timedelta(days=dias, hours=horas, minutes=minutos, seconds=segundos)
+
+
+def _texto_ics(valor):
+    return re.sub(r'\\([\\;,nN])', lambda m: '\n' if m.group(1) in 'nN' else m.group(1), valor)
+
+
+def leer_ics(lineas, errores):
+    """
+    Lee los eventos (VEVENT) de un calendario y entrega (día, programa) por cada día en que
+    se repite: los de RRULE con BYDAY o, si no tiene, el día de la semana de DTSTART.
+    """
+    evento = None
+    for numero, linea in enumerate(_lineas_desplegadas(lineas), start=1):
+        nombre, parametros, valor = _propiedad(linea)
+        if nombre == 'BEGIN' and valor.upper() == 'VEVENT':
+            evento = {'linea': numero}
+        elif nombre == 'END' and valor.upper() == 'VEVENT' and evento is not None:
+            yield from _programas_evento(evento, errores)
+            evento = None
+        elif evento is not None:
+            evento.setdefault(nombre, (parametros, valor))
+
+
+def _programas_evento(evento, errores):
+    origen = f'Evento de la línea {evento["linea"]}'
+    if 'DTSTART' not in evento:
+        errores.append(f'{origen}: falta DTSTART.')
+        return
+    try:
+        inicio = _hora_local(evento['DTSTART'][1], evento['DTSTART'][0])
+        if 'DTEND' in evento:
+            fin = _hora_local(evento['DTEND'][1], evento['DTEND'][0])
+        elif 'DURATION' in evento:
+            fin = inicio + _duracion(evento['DURATION'][1])
+        else:
+            raise ValueError('sin fin')
+    except (ValueError, ZoneInfoNotFoundError):
+        errores.append(f'{origen}: fechas inválidas (se esperan fecha y hora, con DTEND o DURATION).')
+        return
+
+    dias = [DIAS[inicio.weekday()]]
+    reglas = dict(regla.partition('=')[::2] for regla in evento.get('RRULE', ({}, ''))[1].split(';') if regla)
+    if reglas.get('BYDAY'):
+        codigos = [codigo[-2:].upper() for codigo in reglas['BYDAY'].split(',')]
+        if any(codigo not in DIAS_ICS for codigo in codigos):
+            errores.append(f'{origen}: BYDAY inválido "{reglas["BYDAY"]}".')
+            return
+        dias = [DIAS[DIAS_ICS.index(codigo)] for codigo in codigos]
+
+    nombre = _texto_ics(evento.get('SUMMARY', ({}, ''))[1])
+    for dia in dias:
+        programa = _programa(dia, inicio.time().replace(second=0), fin.time().replace(second=0), nombre, origen, errores)
+        if programa is not None:
+            yield dia, programa
+
+
+LECTORES = {'csv': leer_csv, 'ics': leer_ics}
+
+
+def importar_semana(filas, errores, combinar=False, guardar=True):
+    """
+    Carga los (día, programa) de `filas` (ver leer_csv / leer_ics). Sin combinar, la semana
+    importada reemplaza a la actual; con combinar=True se suma a ella. Si hay errores de
+    lectura o solapamientos no se guarda nada y se lanza ErrorProgramacion.
+    Devuelve {día: programas importados}.
+    """
+    importada = {dia: [] for dia in DIAS}
+    for dia, programa in filas:
+        importada[dia].append(programa)
+    if errores:
+        raise ErrorProgramacion(errores)
+
+    semana = importada
+    if combinar:
+        actual = cargar_semana()
+        semana = {dia: actual[dia] + importada[dia] for dia in DIAS}
+    resultado = validar_semana(semana)
+    conflictos = [
+        error for programas in importada.values() for programa in programas for error in resultado.errores_de(programa)
+    ]
+    if conflictos:
+        raise ErrorProgramacion(dict.fromkeys(conflictos))
+
+    if guardar:
+        with transaction.atomic():
+            for dia, programas in importada.items():
+                modelo = PROGRAMACION_POR_DIA[dia]
+                if not combinar:
+                    modelo.objects.all().delete()
+                modelo.objects.bulk_create(programas, batch_size=LOTE_IMPORTACION)
+    return importada
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# EXPORTACIÓN (generadores: las respuestas HTTP se envían en streaming)
+
+def filas_csv(semana):
+    """
+    Líneas CSV de la semana {día: programas}, empezando por el encabezado.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(ENCABEZADO_CSV)
+    for dia in DIAS:
+        for programa in semana.get(dia, ()):
+            escritor.writerow([dia, f'{programa.hora_inicio:%H:%M}', f'{programa.hora_fin:%H:%M}', programa.nombre_programa])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.getvalue():
+        yield buffer.getvalue()  # Semana vacía: solo el encabezado
+
+
+def _plegar(linea):
+    """
+    Pliega una línea de iCalendar en trozos de 75 octetos como máximo (RFC 5545, 3.1).
+    """
+    codificada = linea.encode('utf-8')
+    if len(codificada) <= 75:
+        return linea + '\r\n'
+    partes, limite = [], 75
+    while codificada:
+        corte = min(limite, len(codificada))
+        while corte < len(codificada) and (codificada[corte] & 0xC0) == 0x80:
+            corte -= 1  # No cortar un carácter UTF-8 por la mitad
+        partes.append(codificada[:corte].decode('utf-8'))
+        codificada = codificada[corte:]
+        limite = 74  # Las líneas siguientes empiezan con un espacio
+    return '\r\n '.join(partes) + '\r\n'
+
+
+def _escapar_ics(texto):
+    return texto.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _desfase(delta):
+    minutos = int(delta.total_seconds()) // 60
+    signo = '-' if minutos < 0 else '+'
+    return f'{signo}{abs(minutos) // 60:02d}{abs(minutos) % 60:02d}'
+
+
+@functools.lru_cache(maxsize=4)
+def transiciones(zona, desde, hasta):
+    """
+    Cambios de hora de `zona` entre el 1 de enero de `desde` y el fin de `hasta`, como
+    tuplas (instante UTC, desfase anterior, desfase nuevo). Se recorre el intervalo en
+    pasos de seis horas y cada cambio se ubica al minuto con búsqueda binaria.
+    """
+    paso = timedelta(hours=6)
+    actual = datetime(desde, 1, 1, tzinfo=dt_timezone.utc)
+    fin = datetime(hasta + 1, 1, 1, tzinfo=dt_timezone.utc)
+    anterior = actual.astimezone(zona).utcoffset()
+    cambios = []
+    while actual < fin:
+        siguiente = actual + paso
+        desfase = siguiente.astimezone(zona).utcoffset()
+        if desfase != anterior:
+            bajo, alto = 0, int(paso.total_seconds()) // 60
+            while alto - bajo > 1:
+                medio = (bajo + alto) // 2
+                if (actual + timedelta(minutes=medio)).astimezone(zona).utcoffset() == anterior:
+                    bajo = medio
+                else:
+                    alto = medio
+            cambios.append((actual + timedelta(minutes=alto), anterior, desfase))
+            anterior = desfase
+        actual = siguiente
+    return tuple(cambios)
+
+
+def lineas_vtimezone(zona, desde, hasta):
+    """
+    Componente VTIMEZONE con los cambios de hora reales de `zona` (tomados de la base de
+    datos de zonas horarias del sistema) entre los años `desde` y `hasta`. Cada cambio es
+    una observancia propia, sin RRULE: las reglas de Chile cambian casi todos los años.
+    """
+    inicio = datetime(desde, 1, 1, tzinfo=dt_timezone.utc).astimezone(zona)
+    observancias = [(inicio.replace(tzinfo=None), inicio.utcoffset(), inicio.utcoffset(), inicio)]
+    for instante, anterior, desfase in transiciones(zona, desde, hasta):
+        observancias.append(((instante + anterior).replace(tzinfo=None), anterior, desfase, instante.astimezone(zona)))
+
+    yield from map(_plegar, ['BEGIN:VTIMEZONE', f'TZID:{zona.key}'])
+    for comienzo, anterior, desfase, local in observancias:
+        tipo = 'DAYLIGHT' if local.dst() else 'STANDARD'
+        yield from map(_plegar, [
+            f'BEGIN:{tipo}',
+            f'DTSTART:{comienzo:%Y%m%dT%H%M%S}',
+            f'TZOFFSETFROM:{_desfase(anterior)}',
+            f'TZOFFSETTO:{_desfase(desfase)}',
+            f'TZNAME:{local.tzname()}',
+            f'END:{tipo}',
+        ])
+    yield _plegar('END:VTIMEZONE')
+
+
+def lineas_ics(semana, generado=None, zona=None):
+    """
+    Calendario iCalendar de la semana: un evento semanal (RRULE) por programa a partir de
+    SEMANA_REFERENCIA_ICS. Sin `zona` las horas son flotantes (la hora local de quien lo
+    abra); con `zona` llevan TZID y el calendario incluye su VTIMEZONE, de modo que las
+    repeticiones conservan la hora local de la radio en los cambios de horario.
+    """
+    generado = generado or datetime.now(dt_timezone.utc)
+    tzid = f';TZID={zona.key}' if zona else ''
+    yield from map(_plegar, [
+        'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID_ICS}', 'CALSCALE:GREGORIAN',
+        'X-WR-CALNAME:Programación Radio Hits',
+    ])
+    if zona:
+        yield _plegar(f'X-WR-TIMEZONE:{zona.key}')
+        yield from lineas_vtimezone(zona, SEMANA_REFERENCIA_ICS.year, generado.year + ANOS_VTIMEZONE)
+    for indice, dia in enumerate(DIAS):
+        fecha = SEMANA_REFERENCIA_ICS + timedelta(days=indice)
+        for numero, programa in enumerate(semana.get(dia, ()), start=1):
+            inicio = datetime.combine(fecha, programa.hora_inicio)
+            fin = datetime.combine(fecha, programa.hora_fin)
+            if fin <= inicio:
+                fin += timedelta(days=1)  # Termina al día siguiente
+            yield from map(_plegar, [
+                'BEGIN:VEVENT',
+                f'UID:{dia}-{programa.pk or f"n{numero}"}@radiohits.cl',
+                f'DTSTAMP:{generado.astimezone(dt_timezone.utc):%Y%m%dT%H%M%SZ}',
+                f'DTSTART{tzid}:{inicio:%Y%m%dT%H%M%S}',
+                f'DTEND{tzid}:{fin:%Y%m%dT%H%M%S}',
+                f'RRULE:FREQ=WEEKLY;BYDAY={DIAS_ICS[indice]}',
+                f'SUMMARY:{_escapar_ics(programa.nombre_programa)}',
+                'END:VEVENT',
+            ])
+    yield _plegar('END:VCALENDAR')
@@ -0,0 +1,353 @@
+"""
+Entradas relacionadas del blog ("Sigue leyendo") por similitud de contenido.
+
+Cada entrada se representa con un vector TF-IDF de su título y contenido: palabras en
+minúsculas y sin tildes, sin palabras vacías del español, con tf sublineal (1 + log tf)
+y normalizado a largo 1, de modo que el producto punto de dos filas es su coseno.
+El vocabulario se limita a los términos que aparecen en al menos dos entradas (los
+demás no aportan a ninguna similitud), con un máximo de MAX_TERMINOS.
+
+La matriz es dispersa (cada entrada usa unas decenas de los miles de términos) y se
+guarda también por columnas, como índice invertido: las similitudes de un lote de filas
+se calculan sumando solo los términos en común (NumPy) y de cada fila se conservan las
+RELACIONADAS_POR_ENTRADA mejores con argpartition. El resultado se guarda en
+EntradaRelacionada, así la vista de detalle no calcula nada: lee unas pocas filas por
+índice (y normalmente desde la caché del blog).
+
+Las frecuencias de términos de cada entrada se guardan en la caché compartida
+(CLAVE_INDICE), así un cambio solo lee y tokeniza la entrada modificada; el IDF y la
+normalización se recalculan a partir de ellas sin tocar la base de datos. Si dos
+guardados simultáneos pisan el índice de la caché, la entrada perdida se corrige al
+reconstruirlo (cuando expira, INDICE_TIMEOUT, o con calcular_relacionadas); si nombra
+entradas que ya no existen, guardar sus relacionadas falla y se reconstruye en el acto.
+
+Actualización:
+  - Comando calcular_relacionadas: reconstruye el índice y recalcula todas las entradas.
+  - Al crear o modificar una entrada (señales, al confirmar la transacción): se vuelve a
+    contar solo esa entrada, se recalcula su fila y solo las de las entradas cuya lista
+    puede cambiar, es decir, las que ya la incluían y aquellas en las que ahora superaría
+    a su última relacionada.
+  - Al eliminar una entrada: se quita del índice y se recalculan las entradas que la incluían.
+
+NumPy es opcional: sin él las entradas simplemente no muestran relacionadas.
+"""
+
+import logging
+import re
+import unicodedata
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Min
+
+from .cache import acumular_al_confirmar
+from .importaciones import perezoso
+from .models import BlogEntrada, EntradaRelacionada
+
+np = perezoso('numpy')  # Se importa al construir el primer índice (ver app/importaciones.py)
+
+RELACIONADAS_POR_ENTRADA = 4
+SIMILITUD_MINIMA = 0.05  # Por debajo de esto dos entradas no tienen nada en común
+MAX_TERMINOS = 5000  # Columnas de la matriz (los términos con más documentos)
+LOTE_SIMILITUD = 256  # Filas por lote de similitudes: memoria de LOTE_SIMILITUD x entradas
+PESO_TITULO = 3  # Las palabras del título cuentan como si aparecieran tres veces
+LARGO_MINIMO = 3
+CLAVE_INDICE = 'radiohits:relacionadas:indice'
+INDICE_TIMEOUT = 60 * 60 * 24  # Al expirar se reconstruye desde la base de datos
+
+PALABRAS_VACIAS = frozenset('''
+    a al algo algun alguna algunas alguno algunos ante antes aqui asi aun aunque bajo bien cada casi
+    como con contra cual cuales cuando de del desde donde dos durante el ella ellas ello ellos en
+    entre era eran es esa esas ese eso esos esta estaba estaban estan estar estas este esto estos
+    fue fueron ha habia han hasta hay la las le les lo los mas me mi mis mientras muy nada ni no
+    nos nosotros nuestra nuestro o os otra otras otro otros para pero poco por porque que quien
+    quienes se sea ser si sido sin sobre solo son su sus tambien tan tanto te tiene tienen todo
+    todos tu tus un una unas uno unos usted ustedes ya yo hace hacer puede pueden cada vez ademas
+    despues ahora hoy ser estar haber tener todas segun sino tras
+'''.split())
+
+_PALABRA = re.compile(r'[a-z0-9]+')
+
+logger = logging.getLogger(__name__)
+
+
+def disponible():
+    return np is not None
+
+
+def terminos_de(texto):
+    """
+    Palabras útiles de un texto: minúsculas, sin tildes ni palabras vacías.
+    """
+    normalizado = unicodedata.normalize('NFKD', texto.lower()).encode('ascii', 'ignore').decode()
+    return [
+        palabra for palabra in _PALABRA.findall(normalizado)
+        if len(palabra) >= LARGO_MINIMO and palabra not in PALABRAS_VACIAS and not palabra.isdigit()
+    ]
+
+
+def _posiciones(inicios, largos):
+    """
+    Concatenación de los rangos [inicio, inicio + largo) sin un ciclo en Python.
+    """
+    desplazamientos = np.repeat(inicios - np.cumsum(largos) + largos, largos)
+    return desplazamientos + np.arange(int(largos.sum()), dtype=np.int64)
+
+
+class Indice:
+    """
+    Matriz TF-IDF dispersa (una fila normalizada por entrada) de todo el blog.
+
+    Se construye a partir de las frecuencias de términos de cada entrada (`conteos`:
+    {id: (columnas, cantidades)}, con columnas de `terminos`). Son lo único caro de
+    obtener (leer y tokenizar el contenido), así que se guardan en la caché; el IDF,
+    el vocabulario y los pesos se recalculan desde ellas con operaciones vectoriales.
+    La matriz se guarda por filas y por columnas (índice invertido) para multiplicar
+    solo los términos que las entradas tienen en común.
+    """
+
+    def __init__(self, terminos, conteos):
+        self.terminos = terminos  # {palabra: columna}; crece con cada palabra nueva
+        self.conteos = conteos
+        self.ids = np.asarray(sorted(conteos), dtype=np.int64)
+        self.fila = {int(entrada_id): fila for fila, entrada_id in enumerate(self.ids)}
+        self._ponderar()
+
+    @staticmethod
+    def contar(terminos, titulo, contenido):
+        """
+        Frecuencias de una entrada como (columnas, cantidades); agrega a `terminos` las palabras nuevas.
+        """
+        conteo = Counter(terminos_de(contenido))
+        for palabra in terminos_de(titulo):
+            conteo[palabra] += PESO_TITULO
+        columnas = np.fromiter((terminos.setdefault(palabra, len(terminos)) for palabra in conteo), dtype=np.int64)
+        return columnas, np.fromiter(conteo.values(), dtype=np.float32)
+
+    @classmethod
+    def construir(cls, entradas):
+        """
+        `entradas` entrega (id, titulo, contenido); se recorre una sola vez.
+        """
+        terminos = {}
+        conteos = {entrada_id: cls.contar(terminos, titulo, contenido) for entrada_id, titulo, contenido in entradas}
+        return cls(terminos, conteos)
+
+    def con_cambios(self, entradas, eliminadas=()):
+        """
+        Nuevo índice con las entradas indicadas vueltas a contar y sin las eliminadas.
+        Solo se tokenizan las entradas recibidas.
+        """
+        terminos, conteos = dict(self.terminos), dict(self.conteos)
+        for entrada_id in eliminadas:
+            conteos.pop(entrada_id, None)
+        for entrada_id, titulo, contenido in entradas:
+            conteos[entrada_id] = self.contar(terminos, titulo, contenido)
+        return Indice(terminos, conteos)
+
+    def estado(self):
+        """
+        Lo necesario para reconstruir el índice con Indice(*estado) (se guarda en la caché).
+        """
+        return self.terminos, self.conteos
+
+    def _ponderar(self):
+        total, columnas_totales = len(self.ids), max(len(self.terminos), 1)
+        largos = np.fromiter((len(self.conteos[entrada_id][0]) for entrada_id in self.ids), dtype=np.int64, count=total)
+        if total:
+            columnas = np.concatenate([self.conteos[entrada_id][0] for entrada_id in self.ids])
+            cantidades = np.concatenate([self.conteos[entrada_id][1] for entrada_id in self.ids])
+        else:
+            columnas, cantidades = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        filas = np.repeat(np.arange(total, dtype=np.int64), largos)
+
+        # Vocabulario: términos presentes en al menos dos entradas, como mucho MAX_TERMINOS
+        frecuencia_documentos = np.bincount(columnas, minlength=columnas_totales)
+        vocabulario = np.flatnonzero(frecuencia_documentos >= 2)
+        if len(vocabulario) > MAX_TERMINOS:
+            vocabulario = vocabulario[np.argsort(-frecuencia_documentos[vocabulario], kind='stable')[:MAX_TERMINOS]]
+        idf = np.zeros(columnas_totales, dtype=np.float32)
+        idf[vocabulario] = np.log((1 + total) / (1 + frecuencia_documentos[vocabulario])) + 1
+
+        valores = (1 + np.log(cantidades)) * idf[columnas]
+        presentes = valores > 0
+        filas, columnas, valores = filas[presentes], columnas[presentes], valores[presentes]
+        normas = np.sqrt(np.bincount(filas, weights=valores * valores, minlength=total)).astype(np.float32)
+        valores /= normas[filas]
+
+        # Por filas (los conteos ya vienen ordenados por fila) y por columnas
+        self.inicio_filas = np.concatenate(([0], np.cumsum(np.bincount(filas, minlength=total))))
+        self.columnas, self.valores = columnas, valores
+        orden = np.argsort(columnas, kind='stable')
+        self.inicio_columnas = np.concatenate(([0], np.cumsum(np.bincount(columnas, minlength=columnas_totales))))
+        self.filas_columna, self.valores_columna = filas[orden], valores[orden]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def similitudes(self, filas):
+        """
+        Cosenos de las filas indicadas contra todas las entradas (len(filas) x entradas).
+        Cada término de una fila suma su aporte a las entradas de su lista invertida.
+        """
+        filas = np.asarray(filas, dtype=np.int64)
+        largos = self.inicio_filas[filas + 1] - self.inicio_filas[filas]
+        posiciones = _posiciones(self.inicio_filas[filas], largos)
+        consultas = np.repeat(np.arange(len(filas), dtype=np.int64), largos)
+        columnas, pesos = self.columnas[posiciones], self.valores[posiciones]
+
+        largos = self.inicio_columnas[columnas + 1] - self.inicio_columnas[columnas]
+        posiciones = _posiciones(self.inicio_columnas[columnas], largos)
+        destinos = np.repeat(consultas, largos) * len(self) + self.filas_columna[posiciones]
+        aportes = np.repeat(pesos, largos) * self.valores_columna[posiciones]
+        similitudes = np.bincount(destinos, weights=aportes, minlength=len(filas) * len(self))
+        return similitudes.astype(np.float32).reshape(len(filas), len(self))
+
+    def vecinos(self, filas, k=RELACIONADAS_POR_ENTRADA):
+        """
+        Para cada fila, las k entradas más parecidas como [(id, similitud), ...] de mayor a menor.
+        Se procesa por lotes de LOTE_SIMILITUD filas.
+        """
+        filas = np.asarray(filas, dtype=np.int64)
+        k = min(k, len(self) - 1)
+        for inicio in range(0, len(filas), LOTE_SIMILITUD):
+            lote = filas[inicio:inicio + LOTE_SIMILITUD]
+            if k <= 0:
+                yield from ((fila, []) for fila in lote)
+                continue
+            similitudes = self.similitudes(lote)
+            similitudes[np.arange(len(lote)), lote] = -1  # Una entrada no se relaciona consigo misma
+            mejores = np.argpartition(-similitudes, k - 1, axis=1)[:, :k]
+            puntajes = np.take_along_axis(similitudes, mejores, axis=1)
+            orden = np.argsort(-puntajes, axis=1)
+            mejores = np.take_along_axis(mejores, orden, axis=1)
+            puntajes = np.take_along_axis(puntajes, orden, axis=1)
+            for fila, columnas, valores in zip(lote, mejores, puntajes):
+                yield fila, [
+                    (int(self.ids[columna]), float(valor))
+                    for columna, valor in zip(columnas, valores) if valor >= SIMILITUD_MINIMA
+                ]
+
+
+def construir_indice():
+    entradas = BlogEntrada.objects.order_by('id').values_list('id', 'titulo', 'contenido')
+    return Indice.construir(entradas.iterator(chunk_size=500))
+
+
+def guardar_indice(indice):
+    cache.set(CLAVE_INDICE, indice.estado(), INDICE_TIMEOUT)
+
+
+def indice_actualizado(cambiadas=(), eliminadas=()):
+    """
+    El índice de la caché con las entradas cambiadas vueltas a leer y sin las eliminadas
+    (las cambiadas que ya no existen también se quitan). Si no hay índice en la caché se
+    construye desde la base de datos.
+    """
+    estado = cache.get(CLAVE_INDICE)
+    if estado is None:
+        indice = construir_indice()
+    else:
+        entradas = list(BlogEntrada.objects.filter(pk__in=cambiadas).values_list('id', 'titulo', 'contenido'))
+        desaparecidas = set(cambiadas) - {entrada_id for entrada_id, _, _ in entradas}
+        indice = Indice(*estado).con_cambios(entradas, set(eliminadas) | desaparecidas)
+    guardar_indice(indice)
+    return indice
+
+
+def _guardar(indice, filas):
+    """
+    Reemplaza las relacionadas de las entradas de `filas` (todas en una transacción).
+    """
+    nuevas = [
+        EntradaRelacionada(entrada_id=int(indice.ids[fila]), relacionada_id=relacionada, posicion=posicion, similitud=similitud)
+        for fila, vecinos in indice.vecinos(filas)
+        for posicion, (relacionada, similitud) in enumerate(vecinos)
+    ]
+    with transaction.atomic():
+        EntradaRelacionada.objects.filter(entrada_id__in=[int(indice.ids[fila]) for fila in filas]).delete()
+        EntradaRelacionada.objects.bulk_create(nuevas, batch_size=1000)
+    return len(nuevas)
+
+
+def recalcular_todas():
+    """
+    Recalcula las relacionadas de todo el blog. Devuelve (entradas, relaciones guardadas).
+    """
+    indice = construir_indice()
+    guardar_indice(indice)
+    with transaction.atomic():
+        EntradaRelacionada.objects.all().delete()
+        guardadas = _guardar(indice, range(len(indice)))
+    return len(indice), guardadas
+
+
+def actualizar_relacionadas(cambiadas=(), recalcular=(), eliminadas=()):
+    """
+    Actualización incremental. `cambiadas` son entradas creadas o modificadas; `recalcular`,
+    entradas cuya lista debe rehacerse sin que su contenido cambiara (p. ej. porque se
+    eliminó una de sus relacionadas); `eliminadas`, las que se quitan del índice.
+    Devuelve los ids de las entradas recalculadas.
+    """
+    try:
+        return _actualizar(indice_actualizado(cambiadas, eliminadas), cambiadas, recalcular)
+    except IntegrityError:
+        # El índice de la caché nombra entradas que ya no existen (eliminadas sin señales,
+        # p. ej. con un DELETE directo): se reconstruye desde la base de datos y se reintenta
+        logger.warning('Índice de relacionadas desactualizado; se reconstruye', exc_info=True)
+        indice = construir_indice()
+        guardar_indice(indice)
+        return _actualizar(indice, cambiadas, recalcular)
+
+
+def _actualizar(indice, cambiadas, recalcular):
+    cambiadas = [entrada_id for entrada_id in cambiadas if entrada_id in indice.fila]
+    afectadas = set(cambiadas) | {entrada_id for entrada_id in recalcular if entrada_id in indice.fila}
+
+    if cambiadas:
+        # Entradas que ya mostraban alguna de las cambiadas: su similitud pudo bajar
+        afectadas.update(
+            EntradaRelacionada.objects.filter(relacionada_id__in=cambiadas).values_list('entrada_id', flat=True)
+        )
+        # Entradas donde una cambiada supera ahora a la última de su lista (o su lista no está llena)
+        umbrales = np.full(len(indice), SIMILITUD_MINIMA, dtype=np.float32)
+        resumen = (
+            EntradaRelacionada.objects.values('entrada_id')
+            .annotate(minima=Min('similitud'), cantidad=Count('id'))
+            .filter(cantidad__gte=RELACIONADAS_POR_ENTRADA)
+        )
+        for fila in resumen:
+            if fila['entrada_id'] in indice.fila:
+                umbrales[indice.fila[fila['entrada_id']]] = max(fila['minima'], SIMILITUD_MINIMA)
+        mejores = indice.similitudes([indice.fila[entrada_id] for entrada_id in cambiadas]).max(axis=0)
+        afectadas.update(int(entrada_id) for entrada_id in indice.ids[mejores >= umbrales])
+
+    afectadas &= indice.fila.keys()
+    if afectadas:
+        _guardar(indice, sorted(indice.fila[entrada_id] for entrada_id in afectadas))
+    return afectadas
+
+
+def actualizar_al_confirmar(cambiadas=(), recalcular=(), eliminadas=()):
+    """
+    Programa actualizar_relacionadas() para cuando se confirme la transacción en curso.
+    Dentro de una transacción los cambios se acumulan en una sola actualización (como
+    invalidar en app/cache.py): una acción masiva que elimina varias entradas no debe
+    recalcular las demás mientras el índice aún contiene las otras eliminadas.
+    Un fallo aquí no debe afectar al guardado de la entrada: se registra y se sigue.
+    """
+    if not disponible():
+        return
+
+    def actualizar(pendientes):
+        cambiadas, recalcular, eliminadas = pendientes
+        try:
+            actualizar_relacionadas(sorted(cambiadas - eliminadas), sorted(recalcular - eliminadas), sorted(eliminadas))
+        except Exception:
+            logger.exception('No se pudieron actualizar las entradas relacionadas')
+
+    nuevas = (cambiadas, recalcular, eliminadas)
+    pendientes = acumular_al_confirmar('relacionadas', lambda: tuple(set(ids) for ids in nuevas), actualizar)
+    for conjunto, ids in zip(pendientes, nuevas):
+        conjunto.update(ids)
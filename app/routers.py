@@ -0,0 +1,141 @@
+"""
+Enrutador de base de datos con réplicas de solo lectura.
+
+Las lecturas públicas (blog, carrusel, programación) se reparten entre los alias
+listados en settings.DATABASE_REPLICAS; las escrituras siempre van a 'default'.
+Las lecturas vuelven a 'default' cuando:
+  - la petición está fijada al primario (ver app/middleware.py: peticiones que
+    escriben y las siguientes del mismo editor durante unos segundos, para que
+    vea sus propios cambios aunque la réplica tenga retraso). Solo se fija dentro
+    de una petición (entre fijar_primario() y liberar_primario()): una escritura
+    fuera de ellas, p. ej. en un comando o en un hilo de fondo, no deja fijado el
+    contexto del hilo para siempre. Los comandos que necesiten leer lo que acaban
+    de escribir deben hacerlo dentro de transaction.atomic(). Tampoco fijan las
+    escrituras dentro de escritura_sin_fijar() (las vistas del blog en app/tendencias.py);
+  - hay una transacción abierta en 'default' (se leen los datos de esa transacción);
+  - ninguna réplica está sana. La salud de cada réplica se comprueba como mucho
+    una vez cada REPLICA_INTERVALO_SALUD segundos por proceso.
+
+Sin réplicas configuradas el enrutador no cambia nada.
+"""
+
+import contextvars
+import logging
+from contextlib import contextmanager
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+REPLICA_INTERVALO_SALUD = 10  # Segundos entre comprobaciones de una misma réplica
+
+# True mientras la petición en curso deba leer del primario
+_forzar_primario = contextvars.ContextVar('radiohits_forzar_primario', default=False)
+# True si la petición en curso escribió en la base de datos
+_hubo_escritura = contextvars.ContextVar('radiohits_hubo_escritura', default=False)
+# True dentro de una petición (lo marca PrimarioTrasEscrituraMiddleware con fijar_primario)
+_en_peticion = contextvars.ContextVar('radiohits_en_peticion', default=False)
+# True mientras se hace una escritura que no cambia lo que lee la petición (ver escritura_sin_fijar)
+_sin_fijar = contextvars.ContextVar('radiohits_escritura_sin_fijar', default=False)
+
+# Estado de salud por alias: {alias: (sana, comprobar_de_nuevo_en)}
+_salud = {}
+_candado_salud = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def fijar_primario(valor=True):
+    """
+    Abre el ámbito de una petición: fija (o no) sus lecturas al primario y reinicia el registro
+    de escrituras. Devuelve los tokens para restaurar el estado anterior con liberar_primario().
+    """
+    return _forzar_primario.set(valor), _hubo_escritura.set(False), _en_peticion.set(True)
+
+
+def liberar_primario(tokens):
+    _forzar_primario.reset(tokens[0])
+    _hubo_escritura.reset(tokens[1])
+    _en_peticion.reset(tokens[2])
+
+
+@contextmanager
+def escritura_sin_fijar():
+    """
+    Escrituras que no fijan la petición al primario ni cuentan como escritura del editor,
+    p. ej. contar la vista de una entrada: nadie necesita leerlas enseguida, y fijar cada
+    visita al blog quitaría a la réplica casi todo su tráfico.
+    """
+    token = _sin_fijar.set(True)
+    try:
+        yield
+    finally:
+        _sin_fijar.reset(token)
+
+
+def primario_fijado():
+    return _forzar_primario.get()
+
+
+def hubo_escritura():
+    return _hubo_escritura.get()
+
+
+def replica_sana(alias):
+    """
+    Indica si la réplica acepta conexiones. El resultado se reutiliza durante
+    REPLICA_INTERVALO_SALUD segundos para no comprobarla en cada consulta.
+    """
+    ahora = time.monotonic()
+    estado = _salud.get(alias)
+    if estado and estado[1] > ahora:
+        return estado[0]
+    with _candado_salud:
+        estado = _salud.get(alias)
+        if estado and estado[1] > ahora:
+            return estado[0]
+        try:
+            conexion = connections[alias]
+            conexion.ensure_connection()
+            sana = conexion.is_usable()
+        except DatabaseError:
+            sana = False
+        if not sana:
+            logger.warning('La réplica %s no está disponible; se lee desde el primario', alias)
+        _salud[alias] = (sana, ahora + REPLICA_INTERVALO_SALUD)
+        return sana
+
+
+class ReplicaRouter:
+    """
+    Envía las lecturas a una réplica sana elegida al azar y las escrituras al primario.
+    """
+
+    def replicas(self):
+        return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+    def db_for_read(self, model, **hints):
+        replicas = self.replicas()
+        if not replicas or primario_fijado() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        random.shuffle(replicas)
+        for alias in replicas:
+            if replica_sana(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        if _en_peticion.get() and not _sin_fijar.get():
+            # Lo que se lea después en esta misma petición debe ver la escritura
+            _forzar_primario.set(True)
+            _hubo_escritura.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primario y réplicas contienen los mismos datos
+        bases = {DEFAULT_DB_ALIAS, *self.replicas()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
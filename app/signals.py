@@ -0,0 +1,159 @@
+"""
+Señales de Radio Hits.
+
+Mantienen actualizadas las generaciones de caché (ver app/cache.py y app/managers.py)
+cada vez que se crea, modifica o elimina contenido, y la copia del nombre del autor
+que guardan las entradas (autor_nombre) cuando cambia el usuario. También programan la
+actualización de las entradas relacionadas del blog (ver app/relacionadas.py) y las
+referencias de las imágenes guardadas por contenido (ver app/almacenamiento.py) y sus
+metadatos (ver app/imagenes.py). Los errores de base de datos durante una petición
+activan el modo degradado (ver app/degradado.py).
+"""
+
+from django.contrib.auth.models import User
+from django.core.signals import got_request_exception
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+
+from .almacenamiento import restar_referencia, sumar_referencia
+from .cache import invalidar
+from .degradado import anotar_error_base_datos
+from .imagenes import CAMPOS_METADATOS, asignar_metadatos
+from .models import (
+    EntradaIndex,
+    BlogEntrada,
+    EntradaRelacionada,
+    ValorIndicador,
+    PROGRAMACION_POR_DIA,
+    MODELOS_CON_AUTOR,
+    MODELOS_CON_IMAGEN,
+    nombre_visible
+)
+from .relacionadas import actualizar_al_confirmar
+
+# Campos de User que forman el nombre visible del autor
+CAMPOS_NOMBRE_AUTOR = {'username', 'first_name', 'last_name'}
+
+# Campos de BlogEntrada que intervienen en la similitud entre entradas
+CAMPOS_SIMILITUD = {'titulo', 'contenido'}
+
+# Modelos cuyas consultas se cachean (carrusel, blog, los siete días de programación e indicadores)
+MODELOS_CACHEADOS = [EntradaIndex, BlogEntrada, ValorIndicador, *PROGRAMACION_POR_DIA.values()]
+
+
+def invalidar_cache_modelo(sender, **kwargs):
+    """
+    Avanza la generación del grupo de caché del modelo modificado
+    (para el blog esto incluye también el feed y el sitemap).
+    """
+    invalidar(sender.objects.grupo_cache)
+
+
+for modelo in MODELOS_CACHEADOS:
+    post_save.connect(invalidar_cache_modelo, sender=modelo)
+    post_delete.connect(invalidar_cache_modelo, sender=modelo)
+
+
+def asignar_nombre_autor(sender, instance, **kwargs):
+    """
+    Copia el nombre visible del autor en la entrada antes de guardarla.
+    """
+    if instance.autor_id is not None:
+        instance.autor_nombre = nombre_visible(instance.autor)
+
+
+def sincronizar_nombre_autor(sender, instance, update_fields=None, **kwargs):
+    """
+    Actualiza con un UPDATE por modelo las entradas de un usuario cuyo nombre cambió.
+    Los guardados que no tocan el nombre (por ejemplo last_login al iniciar sesión) se ignoran.
+    """
+    if update_fields is not None and not CAMPOS_NOMBRE_AUTOR & set(update_fields):
+        return
+    nombre = nombre_visible(instance)
+    for modelo in MODELOS_CON_AUTOR:
+        modelo.objects.filter(autor=instance).exclude(autor_nombre=nombre).update(autor_nombre=nombre)
+
+
+for modelo in MODELOS_CON_AUTOR:
+    pre_save.connect(asignar_nombre_autor, sender=modelo)
+
+post_save.connect(sincronizar_nombre_autor, sender=User)
+
+
+def actualizar_relacionadas_entrada(sender, instance, update_fields=None, **kwargs):
+    """
+    Recalcula las relacionadas afectadas por una entrada nueva o modificada.
+    Los guardados que no tocan título ni contenido se ignoran.
+    """
+    if update_fields is not None and not CAMPOS_SIMILITUD & set(update_fields):
+        return
+    actualizar_al_confirmar(cambiadas=[instance.pk])
+
+
+def actualizar_relacionadas_eliminada(sender, instance, **kwargs):
+    """
+    Antes de eliminar una entrada anota las que la mostraban como relacionada,
+    para rehacer sus listas (y quitarla del índice) cuando se confirme la eliminación.
+    """
+    mostraban = list(EntradaRelacionada.objects.filter(relacionada=instance).values_list('entrada_id', flat=True))
+    actualizar_al_confirmar(recalcular=mostraban, eliminadas=[instance.pk])
+
+
+post_save.connect(actualizar_relacionadas_entrada, sender=BlogEntrada)
+pre_delete.connect(actualizar_relacionadas_eliminada, sender=BlogEntrada)
+
+
+def recordar_imagen_anterior(sender, instance, update_fields=None, **kwargs):
+    """
+    Antes de guardar, anota qué imagen tenía la fila para saber si cambió.
+    """
+    if update_fields is not None and 'imagen' not in update_fields:
+        instance._imagen_anterior = instance.imagen.name or None
+    elif instance.pk is None:
+        instance._imagen_anterior = None
+    else:
+        instance._imagen_anterior = sender._base_manager.filter(pk=instance.pk).values_list('imagen', flat=True).first() or None
+
+
+def calcular_metadatos_imagen(sender, instance, update_fields=None, **kwargs):
+    """
+    Calcula color y miniatura cuando la imagen es nueva o cambió (las dimensiones ya las
+    escribió Django al asignarla). Una imagen anterior a los metadatos se completa en su
+    próximo guardado, salvo que ya se haya marcado como ilegible.
+    """
+    if update_fields is not None and 'imagen' not in update_fields:
+        return
+    nueva = instance.imagen.name or None
+    pendiente = nueva and not instance.imagen_lqip and not instance.imagen_ilegible
+    if not instance.imagen._committed or nueva != instance._imagen_anterior or pendiente:
+        asignar_metadatos(instance)
+        if update_fields is not None and not set(CAMPOS_METADATOS) <= set(update_fields):
+            # save(update_fields=['imagen']) no guardaría los metadatos: se escriben aparte
+            sender._base_manager.filter(pk=instance.pk).update(
+                **{campo: getattr(instance, campo) for campo in CAMPOS_METADATOS}
+            )
+
+
+def contar_referencia_imagen(sender, instance, **kwargs):
+    """
+    Suma una referencia a la imagen nueva y resta una a la reemplazada.
+    """
+    nueva = instance.imagen.name or None
+    anterior = getattr(instance, '_imagen_anterior', None)
+    if nueva != anterior:
+        sumar_referencia(nueva)
+        restar_referencia(anterior)
+    instance._imagen_anterior = nueva
+
+
+def descontar_referencia_imagen(sender, instance, **kwargs):
+    restar_referencia(instance.imagen.name)
+
+
+for modelo in MODELOS_CON_IMAGEN:
+    pre_save.connect(recordar_imagen_anterior, sender=modelo)
+    pre_save.connect(calcular_metadatos_imagen, sender=modelo)
+    post_save.connect(contar_referencia_imagen, sender=modelo)
+    post_delete.connect(descontar_referencia_imagen, sender=modelo)
+
+
+got_request_exception.connect(anotar_error_base_datos)
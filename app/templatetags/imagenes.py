@@ -0,0 +1,30 @@
+"""
+Atributos de las etiquetas <img> a partir de los metadatos guardados (ver app/imagenes.py).
+
+    {% load imagenes %}
+    <img src="{{ entrada.imagen.url }}" {% atributos_imagen entrada %} class="...">
+
+Agrega width/height (el navegador reserva el espacio y la página no salta al cargar la
+imagen) y un fondo con el color dominante y la miniatura desenfocada, que queda a la
+vista hasta que llega la imagen real. No abre ningún archivo.
+"""
+
+from django import template
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+@register.simple_tag
+def atributos_imagen(objeto):
+    atributos = []
+    if objeto.imagen_ancho and objeto.imagen_alto:
+        atributos.append(format_html('width="{}" height="{}"', objeto.imagen_ancho, objeto.imagen_alto))
+    if objeto.imagen_lqip:
+        atributos.append(format_html(
+            'style="background: {} url(\'{}\') center / cover no-repeat"',
+            objeto.imagen_color or 'transparent', objeto.imagen_lqip,
+        ))
+    elif objeto.imagen_color:
+        atributos.append(format_html('style="background-color: {}"', objeto.imagen_color))
+    return format_html(' '.join(['{}'] * len(atributos)), *atributos)
@@ -0,0 +1,125 @@
+"""
+Entradas del blog en tendencia: vistas recientes con decaimiento exponencial.
+
+Cada vista aporta 2^((t - EPOCA) / VIDA_MEDIA) al puntaje de su entrada ("forward decay"):
+una vista vale el doble que otra ocurrida VIDA_MEDIA antes. Como el peso de una vista no
+cambia después de registrarse, el orden entre entradas se mantiene sin recalcular nada
+y basta un índice sobre el puntaje para leer las N primeras (O(log n + N)).
+
+Para que el puntaje no se desborde con el paso de los años se guarda su log2 y cada vista
+lo actualiza con un solo UPDATE atómico (log-suma-exp):
+
+    puntaje' = max(puntaje, x) + log2(1 + 2^-|puntaje - x|),   x = (t - EPOCA) / VIDA_MEDIA
+
+Así nunca se agregan eventos crudos: PopularidadEntrada tiene una fila por entrada vista.
+Las vistas repetidas de un mismo visitante dentro de VISTA_REPETIDA se cuentan una vez.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Abs, Greatest, Log, Power
+from django.utils import timezone as dj_timezone
+
+from .cache import clave_generacional, obtener_single_flight
+from .limites import ip_cliente
+from .models import BlogEntrada, PopularidadEntrada
+from .routers import escritura_sin_fijar
+
+EPOCA = datetime(2025, 1, 1, tzinfo=timezone.utc)
+VIDA_MEDIA = timedelta(hours=24)  # Una vista de ayer vale la mitad que una de hoy
+VISTA_REPETIDA = 60 * 30  # Segundos en los que un mismo visitante cuenta una sola vez por entrada
+TENDENCIAS_TIMEOUT = 60  # Segundos que se reutiliza el ranking de la portada
+
+logger = logging.getLogger(__name__)
+
+
+def exponente(momento):
+    """
+    log2 del peso de una vista ocurrida en `momento`.
+    """
+    return (momento - EPOCA) / VIDA_MEDIA
+
+
+def vistas_recientes(popularidad, momento=None):
+    """
+    Vistas con decaimiento al `momento` indicado (por defecto, ahora): 2^(puntaje - x).
+    """
+    if not popularidad.vistas:
+        return 0.0
+    return 2 ** (popularidad.puntaje - exponente(momento or dj_timezone.now()))
+
+
+def _sumar(x):
+    """
+    Expresión SQL del nuevo puntaje tras sumar una vista de peso 2^x.
+    """
+    x = Value(x, output_field=FloatField())
+    return Greatest(F('puntaje'), x) + Log(2, 1 + Power(2, -Abs(F('puntaje') - x)))
+
+
+def registrar_vista(entrada_id, momento=None):
+    """
+    Suma una vista a la entrada. La primera vista crea su fila; si otra petición la crea
+    al mismo tiempo, se vuelve al UPDATE.
+    """
+    momento = momento or dj_timezone.now()
+    x = exponente(momento)
+    cambios = {'puntaje': _sumar(x), 'vistas': F('vistas') + 1, 'ultima_vista': momento}
+    if PopularidadEntrada.objects.filter(entrada_id=entrada_id).update(**cambios):
+        return
+    try:
+        with transaction.atomic():
+            PopularidadEntrada.objects.create(entrada_id=entrada_id, puntaje=x, vistas=1, ultima_vista=momento)
+    except IntegrityError:
+        PopularidadEntrada.objects.filter(entrada_id=entrada_id).update(**cambios)
+
+
+def registrar_vista_de(request, entrada_id):
+    """
+    Registra la vista de una página de entrada, salvo que el mismo visitante ya la haya
+    visto hace poco. Un error al guardar no impide mostrar la entrada.
+
+    No cuentan los renderizados internos (request.render_interno, p. ej. el comando
+    freeze). El visitante es su sesión si tiene una y si no su IP real (ip_cliente(),
+    la misma que usa el límite de peticiones): detrás de nginx REMOTE_ADDR es la del proxy.
+    La escritura no fija la petición al primario (ver escritura_sin_fijar en app/routers.py).
+    """
+    if request.method != 'GET' or getattr(request, 'render_interno', False):
+        return
+    sesion = getattr(request, 'session', None)
+    if sesion is not None and sesion.session_key:
+        visitante = f'sesion:{sesion.session_key}'
+    else:
+        visitante = f'ip:{ip_cliente(request)}'
+    if not cache.add(f'radiohits:vista:{entrada_id}:{visitante}', 1, VISTA_REPETIDA):
+        return
+    try:
+        with escritura_sin_fijar():
+            registrar_vista(entrada_id)
+    except DatabaseError:
+        logger.warning('No se pudo registrar la vista de la entrada %s', entrada_id, exc_info=True)
+
+
+def tendencias(cantidad=3):
+    """
+    Las `cantidad` entradas en tendencia como lista de PopularidadEntrada (con .entrada).
+    Se cachea TENDENCIAS_TIMEOUT segundos y bajo la generación del blog, para que una
+    entrada eliminada o editada no siga apareciendo.
+    """
+    return obtener_single_flight(
+        clave_generacional('blog', f'tendencias:{cantidad}'),
+        lambda: list(PopularidadEntrada.objects.tendencias(cantidad)),
+        TENDENCIAS_TIMEOUT,
+    )
+
+
+def ordenar_por_tendencia(queryset=None):
+    """
+    Entradas del blog de mayor a menor puntaje; las nunca vistas van al final, por fecha.
+    """
+    queryset = BlogEntrada.objects.all() if queryset is None else queryset
+    return queryset.order_by(F('popularidad__puntaje').desc(nulls_last=True), '-fecha_publicacion')
@@ -1,3 +1,1437 @@
-from django.test import TestCase
+import gzip
+import importlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time as hora, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from xml.etree import ElementTree
+
+import requests
+from PIL import Image
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connections, router, transaction
+from django.db.utils import load_backend
+from django.http import HttpResponse, StreamingHttpResponse
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.test import AsyncClient, Client, RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core import settings as core_settings
+
+from . import compresion, relacionadas
+from .almacenamiento import borrar_huerfanos
+from .cache import incrementar_generacion, obtener_con_respaldo, obtener_generacion, obtener_single_flight, single_flight
+from .calentamiento import PRESUPUESTO_ARRANQUE, compilar_plantillas, resolver_urls
+from .checks import limites_con_cache_atomica, limites_con_cache_atomica_despliegue
+from .compresion import elegir_codificacion, minificar_html
+from .degradado import CLAVE_CAIDA, ESPERA_SONDA, base_caida, marcar_caida
+from .externo import CircuitoAbierto, ClienteExterno
+from .feeds import TAMANO_BLOQUE
+from .indicadores import SerieIndicador, guardar_valores
+from .middleware import COOKIE_PRIMARIO, CompresionMiddleware, LimitePeticionesMiddleware, PrimarioTrasEscrituraMiddleware
+from .forms import LunesForm
+from .limites import Regla, _consumir_con_candado, consumir
+from .models import (
+    ArchivoMedia, BlogEntrada, Domingo, EntradaIndex, EntradaRelacionada, Lunes, Martes, PopularidadEntrada,
+    ValorIndicador, programacion_semanal,
+)
+from .programacion import (
+    ErrorProgramacion, copiar_dia, filas_csv, importar_semana, leer_csv, leer_ics, lineas_ics, validar_semana,
+)
+from .routers import _salud, fijar_primario, liberar_primario, primario_fijado
+from .tendencias import VIDA_MEDIA, registrar_vista, vistas_recientes
 
 # Create your tests here.
+
+CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class SingleFlightTests(SimpleTestCase):
+    """
+    Pruebas de la protección contra estampidas de app/cache.py.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_un_solo_recalculo_bajo_concurrencia(self):
+        llamadas = []
+        hilos = 20
+        barrera = threading.Barrier(hilos)
+        resultados = [None] * hilos
+
+        @single_flight('pruebas:costoso', timeout=60)
+        def costoso():
+            llamadas.append(1)
+            time.sleep(0.3)  # Simula una consulta lenta (API externa, siete consultas a la BD...)
+            return 'valor'
+
+        def peticion(indice):
+            barrera.wait()  # Todas las peticiones llegan al mismo tiempo con la caché vacía
+            resultados[indice] = costoso()
+
+        threads = [threading.Thread(target=peticion, args=(i,)) for i in range(hilos)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(llamadas), 1)
+        self.assertEqual(resultados, ['valor'] * hilos)
+
+    def test_valor_obsoleto_mientras_otro_recalcula(self):
+        obtener_single_flight('pruebas:obsoleto', lambda: 'viejo', timeout=60)
+        cache.add('pruebas:obsoleto:candado', 'otro-proceso', 300)
+        # Con el valor lógicamente expirado y el candado tomado se sirve el valor anterior
+        with mock.patch('app.cache.time.time', return_value=time.time() + 90):
+            valor = obtener_single_flight('pruebas:obsoleto', lambda: 'nuevo', timeout=60)
+        self.assertEqual(valor, 'viejo')
+
+    def test_expiracion_temprana_probabilistica(self):
+        # Valor que aún no expira (faltan 30 s) pero cuyo último cálculo tardó 10 s
+        cache.set('pruebas:xfetch', ('viejo', 10.0, time.time() + 30), 120)
+        with mock.patch('app.cache.random.random', return_value=0.5):
+            valor = obtener_single_flight('pruebas:xfetch', lambda: 'nuevo', timeout=60)
+        self.assertEqual(valor, 'viejo')
+        # Un número aleatorio cercano a 1 hace que XFetch adelante el recálculo antes de expirar
+        with mock.patch('app.cache.random.random', return_value=0.99):
+            valor = obtener_single_flight('pruebas:xfetch', lambda: 'nuevo', timeout=60)
+        self.assertEqual(valor, 'nuevo')
+
+    def test_error_al_recalcular_conserva_el_valor_anterior(self):
+        obtener_single_flight('pruebas:error', lambda: 'viejo', timeout=60)
+
+        def falla():
+            raise RuntimeError('API caída')
+
+        with mock.patch('app.cache.time.time', return_value=time.time() + 90):
+            valor = obtener_single_flight('pruebas:error', falla, timeout=60)
+        self.assertEqual(valor, 'viejo')
+
+
+class _ServidorInestable(BaseHTTPRequestHandler):
+    """
+    Imitación local de una API externa: responde según el guion de la clase
+    ('ok', 'error' para un 503 o 'lento' para no responder a tiempo).
+    """
+    guion = []
+    recibidas = 0
+
+    def do_GET(self):
+        cls = type(self)
+        paso = cls.guion[min(cls.recibidas, len(cls.guion) - 1)]
+        cls.recibidas += 1
+        if paso == 'lento':
+            time.sleep(0.5)
+        cuerpo = json.dumps({'estado': paso}).encode()
+        try:
+            self.send_response(503 if paso == 'error' else 200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # El cliente ya abandonó la respuesta lenta por tiempo agotado
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class CacheQuerySetTests(TransactionTestCase):
+    """
+    Pruebas de las consultas cacheadas y de la invalidación por generaciones.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def crear(self, nombre):
+        return Lunes.objects.create(hora_inicio='08:00', hora_fin='09:00', nombre_programa=nombre)
+
+    def test_consultas_vacias_no_fallan(self):
+        self.crear('Matinal')
+        with self.assertNumQueries(0):
+            self.assertEqual(Lunes.objects.none().cacheado(), [])
+            self.assertEqual(Lunes.objects.filter(pk__in=[]).cacheado(), [])
+
+    def test_guardar_y_operaciones_masivas_avanzan_la_generacion(self):
+        programa = self.crear('Matinal')
+        consulta = Lunes.objects.order_by('id')
+        self.assertEqual([p.nombre_programa for p in consulta.cacheado()], ['Matinal'])
+        with self.assertNumQueries(0):
+            consulta.cacheado()
+
+        antes = obtener_generacion('programacion')
+        programa.nombre_programa = 'Despertar'
+        programa.save()
+        self.assertGreater(obtener_generacion('programacion'), antes)
+        self.assertEqual([p.nombre_programa for p in consulta.cacheado()], ['Despertar'])
+
+        antes = obtener_generacion('programacion')
+        programa.nombre_programa = 'Buenos días'
+        Lunes.objects.bulk_update([programa], ['nombre_programa'])
+        self.assertGreater(obtener_generacion('programacion'), antes)
+        self.assertEqual([p.nombre_programa for p in consulta.cacheado()], ['Buenos días'])
+
+    def test_una_invalidacion_por_transaccion(self):
+        antes = obtener_generacion('programacion')
+        with mock.patch('app.cache.incrementar_generacion', wraps=incrementar_generacion) as incrementar:
+            with transaction.atomic():
+                for numero in range(5):
+                    self.crear(f'Programa {numero}')
+                Lunes.objects.update(nombre_programa='Igual')
+                self.assertEqual(obtener_generacion('programacion'), antes)  # Nada visible hasta confirmar
+        incrementar.assert_called_once_with('programacion')
+        self.assertGreater(obtener_generacion('programacion'), antes)
+
+    def test_invalidacion_revertida_no_se_arrastra(self):
+        # Una transacción revertida (o un savepoint revertido) descarta su invalidación
+        # pendiente: la siguiente modificación tiene que programar la suya
+        with self.assertRaises(ValueError), transaction.atomic():
+            self.crear('Revertido')
+            raise ValueError
+        antes = obtener_generacion('programacion')
+        with transaction.atomic():
+            self.crear('Matinal')
+        self.assertGreater(obtener_generacion('programacion'), antes)
+
+        antes = obtener_generacion('programacion')
+        with transaction.atomic():
+            with self.assertRaises(ValueError), transaction.atomic():
+                self.crear('Revertido')
+                raise ValueError
+            self.crear('Vespertino')
+        self.assertGreater(obtener_generacion('programacion'), antes)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class FreezeTests(TransactionTestCase):
+    """
+    Pruebas de la exportación incremental a HTML estático.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.autor = User.objects.create_user('autor')
+        self.salida = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.salida)
+        indicadores = {'dolar': 950.5, 'euro': 1010.2, 'uf': 39000, 'utm': 68000, 'utm_mes': 'Octubre', 'instantanea': 1}
+        parche = mock.patch('app.views.obtener_indicadores', return_value=indicadores)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def congelar(self):
+        salida = io.StringIO()
+        call_command('freeze', output=self.salida, base_url='http://testserver', workers=2, stdout=salida)
+        manifest = json.loads(Path(self.salida, 'manifest.json').read_text(encoding='utf-8'))['paginas']
+        return salida.getvalue(), {ruta: datos['modificado'] for ruta, datos in manifest.items()}
+
+    def test_solo_reescribe_lo_que_cambio_y_elimina_lo_que_ya_no_existe(self):
+        rock = BlogEntrada.objects.create(autor=self.autor, titulo='Festival de rock', contenido='Bandas')
+        jazz = BlogEntrada.objects.create(autor=self.autor, titulo='Noche de jazz', contenido='Trío')
+        _, primera = self.congelar()
+        for archivo in ('index.html', f'blog/{jazz.id}/index.html', 'blog/feed/rss.xml', 'sitemap.xml', 'programacion.ics'):
+            self.assertTrue(Path(self.salida, archivo).exists(), archivo)
+        self.assertIn(f'http://testserver/blog/{jazz.id}/', Path(self.salida, 'blog/feed/rss.xml').read_text())
+
+        # Sin cambios no se reescribe nada
+        informe, segunda = self.congelar()
+        self.assertIn(' 0 escritas', informe)
+        self.assertEqual(segunda, primera)
+
+        # Editar una entrada reescribe sus páginas, el listado y los feeds, no las demás
+        rock.titulo = 'Festival de rock y pop'
+        rock.save()
+        _, tercera = self.congelar()
+        cambiadas = {ruta for ruta in tercera if tercera[ruta] != segunda[ruta]}
+        self.assertIn(f'/blog/{rock.id}/', cambiadas)
+        self.assertIn('/blog/feed/rss/', cambiadas)
+        self.assertNotIn(f'/blog/{jazz.id}/', cambiadas)
+        self.assertNotIn('/about/', cambiadas)
+
+        # Las tendencias son parte del índice
+        registrar_vista(jazz.id)
+        cache.clear()
+        _, cuarta = self.congelar()
+        self.assertNotEqual(cuarta['/'], tercera['/'])
+        self.assertIn('Noche de jazz', Path(self.salida, 'index.html').read_text())
+
+        # Una entrada eliminada pierde sus archivos y su carpeta
+        jazz_id = jazz.id
+        jazz.delete()
+        informe, quinta = self.congelar()
+        self.assertNotIn(f'/blog/{jazz_id}/', quinta)
+        self.assertFalse(Path(self.salida, 'blog', str(jazz_id)).exists())
+        self.assertIn('2 eliminadas', informe)
+
+
+class ConfiguracionProduccionTests(SimpleTestCase):
+    """
+    Pruebas del perfil core.settings_produccion.
+    """
+
+    def cargar(self, **entorno):
+        self.addCleanup(sys.modules.pop, 'core.settings_produccion', None)
+        sys.modules.pop('core.settings_produccion', None)
+        with mock.patch.dict(os.environ, entorno):
+            return importlib.import_module('core.settings_produccion')
+
+    def test_perfil_de_produccion(self):
+        produccion = self.cargar(DB_REPLICA_HOSTS='10.0.0.2, 10.0.0.3', DB_CONN_MAX_AGE='120')
+        self.assertFalse(produccion.DEBUG)
+        self.assertNotIn('django_browser_reload', produccion.INSTALLED_APPS)
+        self.assertFalse([m for m in produccion.MIDDLEWARE if m.startswith('django_browser_reload')])
+
+        plantillas = produccion.TEMPLATES[0]
+        self.assertFalse(plantillas['APP_DIRS'])
+        self.assertEqual(plantillas['OPTIONS']['loaders'][0][0], 'django.template.loaders.cached.Loader')
+        self.assertNotIn('loaders', core_settings.TEMPLATES[0]['OPTIONS'])  # El perfil de desarrollo no cambia
+
+        base = produccion.DATABASES['default']
+        self.assertEqual((base['CONN_MAX_AGE'], base['CONN_HEALTH_CHECKS']), (120, True))
+        self.assertEqual(produccion.DATABASE_REPLICAS, ['replica_1', 'replica_2'])
+        self.assertEqual(produccion.DATABASES['replica_2']['HOST'], '10.0.0.3')
+        self.assertEqual(produccion.DATABASES['replica_2']['CONN_MAX_AGE'], 120)
+        self.assertEqual(produccion.CACHES['default']['BACKEND'], 'django.core.cache.backends.redis.RedisCache')
+
+
+class ClienteExternoTests(SimpleTestCase):
+    """
+    Pruebas del cliente HTTP saliente de app/externo.py contra un servidor local inestable.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = ThreadingHTTPServer(('127.0.0.1', 0), _ServidorInestable)
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.servidor.server_port}/api'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        super().tearDownClass()
+
+    def cliente(self, guion, **configuracion):
+        _ServidorInestable.guion = guion
+        _ServidorInestable.recibidas = 0
+        politica = {'timeout': (1, 0.2), 'reintentos': 2, 'espera_base': 0.01, 'fallos_para_abrir': 2, 'espera_circuito': 60}
+        return ClienteExterno(configuracion={'127.0.0.1': {**politica, **configuracion}})
+
+    def test_reintenta_errores_transitorios(self):
+        cliente = self.cliente(['error', 'lento', 'ok'])
+        response = cliente.get(self.url)
+        self.assertEqual(response.json(), {'estado': 'ok'})
+        metricas = cliente.metricas()['127.0.0.1']
+        self.assertEqual((metricas['peticiones'], metricas['errores'], metricas['reintentos']), (3, 2, 2))
+        self.assertEqual(metricas['circuito'], 'cerrado')
+
+    def test_circuito_abierto_falla_sin_llamar_al_servidor(self):
+        cliente = self.cliente(['error'])
+        for _ in range(2):
+            self.assertEqual(cliente.get(self.url).status_code, 503)
+        self.assertEqual(_ServidorInestable.recibidas, 6)
+        inicio = time.monotonic()
+        with self.assertRaises(CircuitoAbierto):
+            cliente.get(self.url)
+        self.assertLess(time.monotonic() - inicio, 0.05)
+        self.assertEqual(_ServidorInestable.recibidas, 6)
+        self.assertEqual(cliente.metricas()['127.0.0.1']['rechazadas'], 1)
+
+    def test_llamada_de_prueba_cierra_el_circuito(self):
+        cliente = self.cliente(['lento', 'lento', 'lento', 'ok'], reintentos=0, fallos_para_abrir=1)
+        with self.assertRaises(requests.exceptions.Timeout):
+            cliente.get(self.url)
+        self.assertEqual(cliente.metricas()['127.0.0.1']['circuito'], 'abierto')
+        _ServidorInestable.recibidas = 3
+        with mock.patch('app.externo.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertEqual(cliente.circuito('127.0.0.1').estado, 'semiabierto')
+            self.assertEqual(cliente.get(self.url).json(), {'estado': 'ok'})
+        self.assertEqual(cliente.metricas()['127.0.0.1']['circuito'], 'cerrado')
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class ReplicaRouterTests(TransactionTestCase):
+    """
+    Pruebas del enrutador de réplicas de app/routers.py. La base de pruebas hace de primario
+    y un archivo SQLite temporal hace de réplica (con datos distintos para saber de dónde se leyó).
+    """
+    databases = {'default'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directorio = tempfile.TemporaryDirectory()
+        alias = {
+            'replica_prueba': os.path.join(cls.directorio.name, 'replica.sqlite3'),
+            'replica_caida': os.path.join(cls.directorio.name, 'no-existe', 'replica.sqlite3'),
+        }
+        # Conexiones creadas al vuelo (no declaradas en settings.DATABASES), solo para esta prueba
+        configuradas = connections.configure_settings({
+            'default': dict(connections.settings['default']),
+            **{nombre: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ruta} for nombre, ruta in alias.items()},
+        })
+        for nombre in alias:
+            connections[nombre] = load_backend('django.db.backends.sqlite3').DatabaseWrapper(configuradas[nombre], nombre)
+        with connections['replica_prueba'].schema_editor() as editor:
+            editor.create_model(Lunes)
+        Lunes.objects.using('replica_prueba').create(hora_inicio='08:00', hora_fin='09:00', nombre_programa='Réplica')
+
+    @classmethod
+    def tearDownClass(cls):
+        for nombre in ('replica_prueba', 'replica_caida'):
+            connections[nombre].close()
+            del connections[nombre]
+        cls.directorio.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        _salud.clear()
+        self.tokens = fijar_primario(False)
+        Lunes.objects.create(hora_inicio='08:00', hora_fin='09:00', nombre_programa='Primario')
+        liberar_primario(self.tokens)
+        self.tokens = fijar_primario(False)
+
+    def tearDown(self):
+        liberar_primario(self.tokens)
+
+    def nombres(self):
+        return list(Lunes.objects.values_list('nombre_programa', flat=True))
+
+    @override_settings(DATABASE_REPLICAS=['replica_prueba'])
+    def test_lecturas_en_la_replica_y_escrituras_en_el_primario(self):
+        self.assertEqual(self.nombres(), ['Réplica'])
+        programa = Lunes.objects.create(hora_inicio='10:00', hora_fin='11:00', nombre_programa='Nuevo')
+        self.assertEqual(programa._state.db, 'default')
+        # Después de escribir, la misma petición lee del primario
+        self.assertEqual(sorted(self.nombres()), ['Nuevo', 'Primario'])
+
+    @override_settings(DATABASE_REPLICAS=['replica_caida', 'replica_prueba'])
+    def test_replica_caida_se_omite(self):
+        self.assertEqual(router.db_for_read(Lunes), 'replica_prueba')
+
+    @override_settings(DATABASE_REPLICAS=['replica_caida'])
+    def test_sin_replicas_sanas_se_lee_del_primario(self):
+        self.assertEqual(self.nombres(), ['Primario'])
+
+    @override_settings(DATABASE_REPLICAS=['replica_prueba'])
+    def test_escritura_fuera_de_una_peticion_no_fija_el_primario(self):
+        liberar_primario(self.tokens)  # Como en un comando o un hilo de fondo: sin middleware
+        try:
+            Lunes.objects.create(hora_inicio='10:00', hora_fin='11:00', nombre_programa='Nuevo')
+            self.assertFalse(primario_fijado())
+            self.assertEqual(self.nombres(), ['Réplica'])
+        finally:
+            self.tokens = fijar_primario(False)
+
+    @override_settings(DATABASE_REPLICAS=['replica_prueba'])
+    def test_editor_lee_sus_escrituras(self):
+        leidas = []
+
+        def vista(request):
+            if request.method == 'POST':
+                Lunes.objects.create(hora_inicio='10:00', hora_fin='11:00', nombre_programa='Nuevo')
+            leidas.append(router.db_for_read(Lunes))
+            return HttpResponse()
+
+        middleware = PrimarioTrasEscrituraMiddleware(vista)
+        factory = RequestFactory()
+        editor = mock.Mock(is_authenticated=True)
+
+        request = factory.post('/add_programa_lunes/')
+        request.user = editor
+        response = middleware(request)
+        self.assertIn(COOKIE_PRIMARIO, response.cookies)
+
+        siguiente = factory.get('/list_programacion/')
+        siguiente.user = editor
+        siguiente.COOKIES[COOKIE_PRIMARIO] = '1'
+        self.assertNotIn(COOKIE_PRIMARIO, middleware(siguiente).cookies)
+
+        visitante = factory.get('/')
+        visitante.user = mock.Mock(is_authenticated=False)
+        middleware(visitante)
+
+        self.assertEqual(leidas, ['default', 'default', 'replica_prueba'])
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class EditorProgramacionTests(TransactionTestCase):
+    """
+    Pruebas del editor en cuadrícula: todos los cambios de la semana en un solo envío.
+    TransactionTestCase para que la transacción de la vista se confirme de verdad.
+    """
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('editor', password='x'))
+        self.manana = Lunes.objects.create(hora_inicio='08:00', hora_fin='10:00', nombre_programa='Mañana')
+        self.tarde = Lunes.objects.create(hora_inicio='15:00', hora_fin='17:00', nombre_programa='Tarde')
+
+    def datos_semana(self):
+        """
+        Datos POST de la semana tal como los envía el editor sin cambios (una fila vacía por día).
+        """
+        datos = {}
+        for dia in ('lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo'):
+            datos.update({f'{dia}-TOTAL_FORMS': 1, f'{dia}-INITIAL_FORMS': 0})
+        datos.update({'lunes-TOTAL_FORMS': 3, 'lunes-INITIAL_FORMS': 2})
+        for indice, programa in enumerate([self.manana, self.tarde]):
+            datos.update({
+                f'lunes-{indice}-id': programa.pk,
+                f'lunes-{indice}-hora_inicio': programa.hora_inicio,
+                f'lunes-{indice}-hora_fin': programa.hora_fin,
+                f'lunes-{indice}-nombre_programa': programa.nombre_programa,
+            })
+        return datos
+
+    def test_guarda_la_semana_en_una_transaccion(self):
+        datos = self.datos_semana()
+        datos.update({
+            'lunes-0-nombre_programa': 'Mañana Hits',
+            'lunes-1-DELETE': 'on',
+            'martes-0-hora_inicio': '20:00', 'martes-0-hora_fin': '22:00', 'martes-0-nombre_programa': 'Noche',
+        })
+        with mock.patch('app.cache.incrementar_generacion') as incrementar:
+            response = self.client.post('/list_programacion/editor/?dia=todos', datos)
+        self.assertRedirects(response, '/list_programacion/?day=todos', fetch_redirect_response=False)
+        self.assertEqual(list(Lunes.objects.values_list('nombre_programa', flat=True)), ['Mañana Hits'])
+        self.assertEqual(list(Martes.objects.values_list('nombre_programa', flat=True)), ['Noche'])
+        # Una sola invalidación del grupo aunque se modificaran dos días
+        incrementar.assert_called_once_with('programacion')
+
+    def test_un_error_descarta_todos_los_cambios(self):
+        datos = self.datos_semana()
+        datos.update({
+            'lunes-0-nombre_programa': 'Mañana Hits',
+            'lunes-2-hora_inicio': '15:00', 'lunes-2-hora_fin': '16:00', 'lunes-2-nombre_programa': 'Repetido',
+        })
+        response = self.client.post('/list_programacion/editor/?dia=lunes', datos)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['formsets']['lunes'].non_form_errors())
+        self.assertEqual(Lunes.objects.get(pk=self.manana.pk).nombre_programa, 'Mañana')
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class AccionesMasivasTests(TransactionTestCase):
+    """
+    Pruebas de las acciones masivas de las listas: una consulta por conjunto y una sola invalidación.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.autor = User.objects.create_user('editor', password='x')
+        self.client.force_login(self.autor)
+        # Entradas sin nada en común, para que eliminarlas no rehaga listas de relacionadas
+        self.propias = [
+            BlogEntrada.objects.create(autor=self.autor, titulo=titulo, contenido=titulo)
+            for titulo in ('Festival de rock', 'Final de fútbol', 'Receta de empanadas')
+        ]
+        self.ajena = BlogEntrada.objects.create(autor=User.objects.create_user('otro'), titulo='Ajena', contenido='...')
+
+    def mensajes(self, response):
+        return [str(mensaje) for mensaje in get_messages(response.wsgi_request)]
+
+    def test_eliminar_entradas_propias_y_avisar_de_las_ajenas(self):
+        ids = [entrada.id for entrada in self.propias[:2]] + [self.ajena.id]
+        with mock.patch('app.cache.incrementar_generacion') as incrementar:
+            response = self.client.post('/list_entradas_blog/acciones/', {'accion': 'eliminar', 'ids': ids})
+        self.assertRedirects(response, '/list_entradas_blog/', fetch_redirect_response=False)
+        self.assertEqual(set(BlogEntrada.objects.values_list('id', flat=True)), {self.propias[2].id, self.ajena.id})
+        self.assertEqual(self.mensajes(response), [
+            '2 entrada(s) eliminada(s) correctamente.',
+            '1 entrada(s) no se modificaron (no existen o no son tuyas).',
+        ])
+        incrementar.assert_called_once_with('blog')
+
+    def test_cambiar_fecha_con_un_solo_update(self):
+        ids = [entrada.id for entrada in self.propias] + [self.ajena.id]
+        with CaptureQueriesContext(connections['default']) as consultas:
+            response = self.client.post('/list_entradas_blog/acciones/', {
+                'accion': 'cambiar_fecha', 'ids': ids, 'fecha': '2024-05-01T10:30', 'volver': '/list_entradas_blog/?page=2',
+            })
+        self.assertRedirects(response, '/list_entradas_blog/?page=2', fetch_redirect_response=False)
+        actualizaciones = [c['sql'] for c in consultas if c['sql'].startswith('UPDATE "app_blogentrada"')]
+        self.assertEqual(len(actualizaciones), 1)
+        fechas = dict(BlogEntrada.objects.values_list('id', 'fecha_publicacion'))
+        for entrada in self.propias:
+            self.assertEqual(timezone.localtime(fechas[entrada.id]).strftime('%Y-%m-%dT%H:%M'), '2024-05-01T10:30')
+        self.assertEqual(fechas[self.ajena.id], self.ajena.fecha_publicacion)
+
+    def test_mover_programas_de_dia(self):
+        manana = Lunes.objects.create(hora_inicio='08:00', hora_fin='10:00', nombre_programa='Mañana')
+        tarde = Lunes.objects.create(hora_inicio='15:00', hora_fin='17:00', nombre_programa='Tarde')
+        response = self.client.post('/list_programacion/acciones/', {
+            'accion': 'mover', 'ids': [f'lunes:{manana.pk}', f'lunes:{tarde.pk}'], 'dia_destino': 'martes',
+        })
+        self.assertRedirects(response, '/list_programacion/?day=martes', fetch_redirect_response=False)
+        self.assertFalse(Lunes.objects.exists())
+        self.assertEqual(sorted(Martes.objects.values_list('nombre_programa', flat=True)), ['Mañana', 'Tarde'])
+
+    def test_mover_con_solapamiento_no_cambia_nada(self):
+        manana = Lunes.objects.create(hora_inicio='08:00', hora_fin='10:00', nombre_programa='Mañana')
+        Martes.objects.create(hora_inicio='09:00', hora_fin='11:00', nombre_programa='Noticias')
+        response = self.client.post('/list_programacion/acciones/', {
+            'accion': 'mover', 'ids': [f'lunes:{manana.pk}'], 'dia_destino': 'martes',
+        })
+        self.assertRedirects(response, '/list_programacion/', fetch_redirect_response=False)
+        self.assertTrue(Lunes.objects.filter(pk=manana.pk).exists())
+        self.assertEqual(list(Martes.objects.values_list('nombre_programa', flat=True)), ['Noticias'])
+        self.assertTrue(any('Noticias' in mensaje for mensaje in self.mensajes(response)))
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class ValidacionSemanaTests(TransactionTestCase):
+    """
+    Pruebas de la validación por línea de barrido de app/programacion.py.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def programa(self, modelo, inicio, fin, nombre):
+        return modelo(hora_inicio=hora(*inicio), hora_fin=hora(*fin), nombre_programa=nombre)
+
+    def test_solapamientos_y_huecos_con_cruce_de_medianoche(self):
+        trasnoche = self.programa(Domingo, (22, 0), (2, 0), 'Trasnoche')  # Termina el lunes a las 02:00
+        madrugada = self.programa(Lunes, (1, 0), (6, 0), 'Madrugada')
+        manana = self.programa(Lunes, (6, 0), (12, 0), 'Mañana')
+        tarde = self.programa(Martes, (15, 0), (18, 0), 'Tarde')
+        resultado = validar_semana({'lunes': [madrugada, manana], 'martes': [tarde], 'domingo': [trasnoche]})
+
+        self.assertEqual(len(resultado.solapamientos), 1)
+        self.assertTrue(resultado.solapamientos[0].involucra(trasnoche))
+        self.assertTrue(resultado.solapamientos[0].involucra(madrugada))
+        self.assertIn('lunes 01:00 y el lunes 02:00', str(resultado.solapamientos[0]))
+        self.assertEqual([str(hueco) for hueco in resultado.huecos], [
+            'Sin programación entre el lunes 12:00 y el martes 15:00.',
+            'Sin programación entre el martes 18:00 y el domingo 22:00.',
+        ])
+
+    def test_programas_contiguos_no_se_superponen(self):
+        programas = [
+            self.programa(Lunes, (inicio, 0), ((inicio + 6) % 24, 0), f'Bloque {inicio}') for inicio in (0, 6, 12, 18)
+        ]
+        resultado = validar_semana({'lunes': programas})
+        self.assertTrue(resultado.valida)
+        self.assertEqual(len(resultado.huecos), 1)  # Del martes 00:00 al lunes siguiente
+
+    def test_formulario_rechaza_solapamiento_con_otro_dia(self):
+        Domingo.objects.create(hora_inicio='23:00', hora_fin='03:00', nombre_programa='Trasnoche')
+        form = LunesForm(data={'hora_inicio': '02:00', 'hora_fin': '04:00', 'nombre_programa': 'Madrugada'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('Trasnoche', form.non_field_errors()[0])
+        form = LunesForm(data={'hora_inicio': '03:00', 'hora_fin': '04:00', 'nombre_programa': 'Madrugada'})
+        self.assertTrue(form.is_valid())
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class ImportacionProgramacionTests(TransactionTestCase):
+    """
+    Pruebas de la importación/exportación (CSV e iCalendar) y de la copia de días.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def importar(self, lector, texto, **opciones):
+        errores = []
+        return importar_semana(lector(texto.splitlines(keepends=True), errores), errores, **opciones)
+
+    def test_csv_ida_y_vuelta(self):
+        self.importar(leer_csv, (
+            'dia,hora_inicio,hora_fin,nombre_programa\n'
+            'Lunes,06:00,09:00,Despertar Hits\n'
+            'Miércoles,09:00,12:00,"Mañanas, con todo"\n'
+        ))
+        exportado = ''.join(filas_csv({'lunes': Lunes.objects.all(), 'miercoles': []}))
+        self.assertEqual(exportado.splitlines()[1], 'lunes,06:00,09:00,Despertar Hits')
+        Lunes.objects.all().delete()
+        self.importar(leer_csv, exportado)
+        self.assertEqual(Lunes.objects.get().nombre_programa, 'Despertar Hits')
+
+    def test_errores_y_solapamientos_no_guardan_nada(self):
+        Lunes.objects.create(hora_inicio='08:00', hora_fin='10:00', nombre_programa='Actual')
+        with self.assertRaises(ErrorProgramacion) as contexto:
+            self.importar(leer_csv, (
+                'dia,hora_inicio,hora_fin,nombre_programa\n'
+                'lunes,xx,09:00,Mala hora\n'
+                'feriado,06:00,09:00,Mal día\n'
+            ))
+        self.assertEqual(len(contexto.exception.errores), 2)
+        with self.assertRaises(ErrorProgramacion):
+            self.importar(leer_csv, 'dia,hora_inicio,hora_fin,nombre_programa\nlunes,09:00,11:00,Choca\n', combinar=True)
+        self.assertEqual(list(Lunes.objects.values_list('nombre_programa', flat=True)), ['Actual'])
+
+    def test_ics_con_zona_horaria_byday_y_exportacion(self):
+        importada = self.importar(leer_ics, (
+            'BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\n'
+            'DTSTART;TZID=America/Santiago:20250106T060000\r\nDURATION:PT3H\r\n'
+            'RRULE:FREQ=WEEKLY;BYDAY=MO,TU\r\nSUMMARY:Despertar\r\n  Hits\r\nEND:VEVENT\r\n'
+            'BEGIN:VEVENT\r\nDTSTART:20250112T020000Z\r\nDTEND:20250112T050000Z\r\n'
+            'SUMMARY:Trasnoche\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n'
+        ))
+        self.assertEqual([programa.nombre_programa for programa in importada['martes']], ['Despertar Hits'])
+        # 02:00 UTC del domingo 12 de enero (horario de verano, UTC-3) = 23:00 del sábado en Santiago
+        trasnoche = importada['sabado'][0]
+        self.assertEqual((trasnoche.hora_inicio, trasnoche.hora_fin), (hora(23, 0), hora(2, 0)))
+
+        calendario = ''.join(lineas_ics({'sabado': [trasnoche]}))
+        self.assertIn('DTSTART:20240106T230000\r\nDTEND:20240107T020000\r\nRRULE:FREQ=WEEKLY;BYDAY=SA', calendario)
+
+    def test_copiar_dia(self):
+        Lunes.objects.create(hora_inicio='06:00', hora_fin='09:00', nombre_programa='Despertar')
+        Martes.objects.create(hora_inicio='20:00', hora_fin='21:00', nombre_programa='Se reemplaza')
+        self.assertEqual(copiar_dia('lunes', ['martes', 'domingo']), 2)
+        self.assertEqual(list(Martes.objects.values_list('nombre_programa', flat=True)), ['Despertar'])
+        self.assertEqual(Domingo.objects.count(), 1)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class HistoricoIndicadoresTests(TransactionTestCase):
+    """
+    Pruebas del histórico de indicadores: upsert, series en memoria y endpoint JSON.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_reducciones_respetan_semanas_y_meses(self):
+        # Domingo 27/09, lunes 28/09, miércoles 30/09 y jueves 01/10 de 2026
+        puntos = [(date(2026, 9, 27), 10.0), (date(2026, 9, 28), 20.0), (date(2026, 9, 30), 30.0), (date(2026, 10, 1), 40.0)]
+        serie = SerieIndicador(puntos)
+        self.assertEqual(
+            serie.rango(date(2026, 9, 1), date(2026, 10, 31), 'semanal'), [['2026-09-21', 10.0], ['2026-09-28', 30.0]]
+        )
+        self.assertEqual(
+            serie.rango(date(2026, 9, 1), date(2026, 10, 31), 'mensual'), [['2026-09-01', 20.0], ['2026-10-01', 40.0]]
+        )
+        # Ambos extremos incluidos
+        self.assertEqual(serie.rango(date(2026, 9, 28), date(2026, 9, 30)), [['2026-09-28', 20.0], ['2026-09-30', 30.0]])
+        self.assertEqual(serie.rango(date(2026, 8, 1), date(2026, 8, 31)), [])
+
+    def test_guardar_valores_es_idempotente(self):
+        filas = [('dolar', date(2026, 10, 1), 950.5), ('dolar', date(2026, 10, 2), 951.0), ('bitcoin', date(2026, 10, 1), 1.0)]
+        self.assertEqual(guardar_valores(filas), 2)
+        # Repetir los mismos valores (lo normal en cada consulta a la API) no escribe ni invalida
+        antes = obtener_generacion('indicadores')
+        with self.assertNumQueries(1):
+            self.assertEqual(guardar_valores(filas), 2)
+        self.assertEqual(obtener_generacion('indicadores'), antes)
+        guardar_valores([('dolar', date(2026, 10, 2), 960.25), ('euro', date(2026, 10, 2), None)])
+        self.assertEqual(
+            list(ValorIndicador.objects.order_by('fecha').values_list('indicador', 'valor')), [('dolar', 950.5), ('dolar', 960.25)]
+        )
+
+    def test_serie_json_con_etag(self):
+        guardar_valores([('uf', date(2026, 10, 1) - timedelta(days=dias), 39000.0 + dias) for dias in range(40)])
+        response = self.client.get('/indicadores/uf/serie/')
+        datos = response.json()
+        self.assertEqual((datos['rango'], datos['resolucion']), ('30d', 'diaria'))
+        self.assertEqual(len(datos['puntos']), 31)
+        self.assertEqual(datos['puntos'][-1], ['2026-10-01', 39000.0])
+
+        self.assertEqual(self.client.get('/indicadores/uf/serie/', headers={'If-None-Match': response['ETag']}).status_code, 304)
+        self.assertNotEqual(self.client.get('/indicadores/uf/serie/?rango=1y')['ETag'], response['ETag'])
+        guardar_valores([('uf', date(2026, 10, 2), 39100.0)])
+        self.assertEqual(self.client.get('/indicadores/uf/serie/', headers={'If-None-Match': response['ETag']}).status_code, 200)
+
+        self.assertEqual(self.client.get('/indicadores/bitcoin/serie/').status_code, 404)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class CalendarioProgramacionTests(TransactionTestCase):
+    """
+    Pruebas del calendario público programacion.ics.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_calendario_condicional_y_con_zona_horaria(self):
+        Lunes.objects.create(hora_inicio='06:00', hora_fin='09:00', nombre_programa='Despertar')
+        response = self.client.get('/programacion.ics')
+        calendario = response.content.decode()
+        self.assertIn('DTSTART;TZID=America/Santiago:20240101T060000', calendario)
+        # Fin del horario de verano 2025: a las 00:00 (-03) del 6 de abril se vuelve a -04
+        self.assertIn('DTSTART:20250406T000000\r\nTZOFFSETFROM:-0300\r\nTZOFFSETTO:-0400', calendario)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/programacion.ics', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        Lunes.objects.create(hora_inicio='20:00', hora_fin='21:00', nombre_programa='Noche')
+        response = self.client.get('/programacion.ics', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('SUMMARY:Noche', response.content.decode())
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class FragmentosIndiceTests(TransactionTestCase):
+    """
+    Pruebas de los fragmentos cacheados de index.html, cada uno con su propia versión.
+    """
+
+    def setUp(self):
+        cache.clear()
+        Lunes.objects.create(hora_inicio='08:00', hora_fin='09:00', nombre_programa='Matinal')
+
+    def indice(self, dolar, instantanea, programacion=None):
+        indicadores = {'dolar': dolar, 'euro': 1010.2, 'uf': 39000, 'utm': 68000, 'utm_mes': 'Octubre', 'instantanea': instantanea}
+        with mock.patch('app.views.obtener_indicadores', return_value=indicadores), mock.patch(
+            'app.views.programacion_semanal', return_value=programacion or programacion_semanal()
+        ):
+            return self.client.get('/').content.decode()
+
+    def test_cada_fragmento_se_invalida_por_separado(self):
+        html = self.indice(950.5, instantanea=1)
+        self.assertIn('Matinal', html)
+        self.assertIn('950,50', html)
+
+        # Datos nuevos con las mismas versiones: se sirven los fragmentos ya renderizados
+        otra = {dia: [] for dia in programacion_semanal()}
+        otra['lunes'] = [Lunes(hora_inicio=hora(8), hora_fin=hora(9), nombre_programa='Vespertino')]
+        html = self.indice(999.0, instantanea=1, programacion=otra)
+        self.assertIn('Matinal', html)
+        self.assertIn('950,50', html)
+
+        # Nueva generación de la programación: solo ese fragmento se vuelve a renderizar
+        incrementar_generacion('programacion')
+        html = self.indice(999.0, instantanea=1, programacion=otra)
+        self.assertIn('Vespertino', html)
+        self.assertIn('950,50', html)
+
+        # Nueva instantánea de los indicadores
+        html = self.indice(999.0, instantanea=2, programacion=otra)
+        self.assertIn('999,00', html)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class NombreAutorTests(TransactionTestCase):
+    """
+    Pruebas del nombre del autor copiado en las entradas (autor_nombre).
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.autor = User.objects.create_user('ana')
+        self.entrada = BlogEntrada.objects.create(autor=self.autor, titulo='Festival de rock', contenido='Bandas')
+        EntradaIndex.objects.create(autor=self.autor, titulo='Portada', texto='...')
+
+    def nombres(self):
+        return {modelo.__name__: list(modelo.objects.values_list('autor_nombre', flat=True)) for modelo in (BlogEntrada, EntradaIndex)}
+
+    def test_renombrar_actualiza_las_entradas_y_las_paginas_no_leen_usuarios(self):
+        self.assertEqual(self.nombres(), {'BlogEntrada': ['ana'], 'EntradaIndex': ['ana']})
+        self.autor.first_name, self.autor.last_name = 'Ana', 'Pérez'
+        self.autor.save()
+        self.assertEqual(self.nombres(), {'BlogEntrada': ['Ana Pérez'], 'EntradaIndex': ['Ana Pérez']})
+
+        for ruta in ('/blog/', f'/blog/{self.entrada.id}/'):
+            with CaptureQueriesContext(connections['default']) as consultas:
+                self.assertContains(self.client.get(ruta), 'Ana Pérez')
+            self.assertFalse([c['sql'] for c in consultas if 'auth_user' in c['sql']], ruta)
+
+    def test_comando_corrige_cambios_sin_senales(self):
+        User.objects.filter(pk=self.autor.pk).update(first_name='Anita')  # update() no emite post_save
+        call_command('sincronizar_autores', stdout=io.StringIO())
+        self.assertEqual(self.nombres(), {'BlogEntrada': ['Anita'], 'EntradaIndex': ['Anita']})
+
+
+@override_settings(CACHES=CACHE_LOCAL, SITIO_URL='http://testserver')
+class FeedsTests(TransactionTestCase):
+    """
+    Pruebas de los feeds y sitemaps transmitidos por bloques cacheados.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.autor = User.objects.create_user('autor', first_name='Ana', last_name='Pérez')
+        for numero in range(TAMANO_BLOQUE + 5):  # Dos bloques
+            BlogEntrada.objects.create(autor=self.autor, titulo=f'Entrada {numero}', contenido='Texto <b>con</b> marcas')
+
+    def leer(self, ruta, **cabeceras):
+        response = self.client.get(ruta, headers=cabeceras)
+        return response, b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_feeds_por_bloques_y_peticiones_condicionales(self):
+        response, cuerpo = self.leer('/blog/feed/rss/')
+        self.assertEqual(response['Content-Type'], 'application/rss+xml; charset=utf-8')
+        items = ElementTree.fromstring(cuerpo).findall('./channel/item')
+        self.assertEqual(len(items), TAMANO_BLOQUE + 5)
+        self.assertEqual(items[0].find('{http://purl.org/dc/elements/1.1/}creator').text, 'Ana Pérez')
+        self.assertTrue(items[0].find('link').text.startswith('http://testserver/blog/'))
+
+        # Con los bloques en caché no se consulta la base de datos, y el mismo ETag recibe 304
+        with self.assertNumQueries(0):
+            _, repetido = self.leer('/blog/feed/rss/')
+            no_modificado, _ = self.leer('/blog/feed/rss/', **{'If-None-Match': response['ETag']})
+        self.assertEqual(repetido, cuerpo)
+        self.assertEqual(no_modificado.status_code, 304)
+
+        # Una entrada nueva cambia la generación: otro ETag y bloques nuevos
+        BlogEntrada.objects.create(autor=self.autor, titulo='Última & nueva', contenido='...')
+        actualizado, cuerpo = self.leer('/blog/feed/rss/', **{'If-None-Match': response['ETag']})
+        self.assertEqual(actualizado.status_code, 200)
+        self.assertIn('Última & nueva', [item.find('title').text for item in ElementTree.fromstring(cuerpo).iter('item')])
+
+        _, atom = self.leer('/blog/feed/atom/')
+        entradas = ElementTree.fromstring(atom).findall('{http://www.w3.org/2005/Atom}entry')
+        self.assertEqual(len(entradas), TAMANO_BLOQUE + 6)
+
+    def test_sitemaps(self):
+        _, indice = self.leer('/sitemap.xml')
+        ubicaciones = [loc.text for loc in ElementTree.fromstring(indice).iter('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')]
+        self.assertEqual(ubicaciones, ['http://testserver/sitemap-paginas.xml', 'http://testserver/sitemap-blog-0.xml'])
+        _, blog = self.leer('/sitemap-blog-0.xml')
+        self.assertEqual(len(ElementTree.fromstring(blog)), TAMANO_BLOQUE + 5)
+
+    def test_host_de_la_peticion_no_cambia_las_urls(self):
+        _, cuerpo = self.leer('/blog/feed/rss/')
+        # Otro Host recibe los mismos bloques, con las URLs de SITIO_URL, sin consultar la base de datos
+        with self.assertNumQueries(0):
+            _, falso = self.leer('/blog/feed/rss/', Host='atacante.example')
+        self.assertEqual(falso, cuerpo)
+        self.assertNotIn(b'atacante.example', falso)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class EntradasRelacionadasTests(TransactionTestCase):
+    """
+    Pruebas de las entradas relacionadas (TF-IDF) y su actualización incremental.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.autor = User.objects.create_user('autor')
+
+    def crear(self, titulo, contenido):
+        return BlogEntrada.objects.create(autor=self.autor, titulo=titulo, contenido=contenido)
+
+    def relacionadas(self, entrada):
+        return list(EntradaRelacionada.objects.filter(entrada=entrada).order_by('posicion').values_list('relacionada__titulo', flat=True))
+
+    def test_relacionadas_por_contenido_y_actualizacion(self):
+        futbol = self.crear('Final de fútbol', 'El equipo ganó la final del campeonato de fútbol con un gol')
+        rock = self.crear('Festival de rock', 'Las bandas de rock tocaron guitarras en el festival')
+        self.crear('Campeonato de fútbol', 'El campeonato de fútbol juvenil definió su final')
+        self.assertEqual(self.relacionadas(futbol)[0], 'Campeonato de fútbol')
+        self.assertEqual(self.relacionadas(rock), [])  # Nada en común con las demás
+
+        # Al cambiar una entrada se rehacen también las listas de las otras que la involucran
+        guitarras = self.crear('Guitarras del festival', 'Las guitarras del festival de rock')
+        self.assertEqual(self.relacionadas(rock), ['Guitarras del festival'])
+        guitarras.delete()
+        self.assertEqual(self.relacionadas(rock), [])
+
+        response = self.client.get(f'/blog/{futbol.id}/')
+        self.assertContains(response, 'Sigue leyendo')
+
+    def test_actualizacion_incremental_igual_a_recalcular_todo(self):
+        entradas = [
+            self.crear('Final de fútbol', 'El equipo ganó la final del campeonato de fútbol con un gol'),
+            self.crear('Festival de rock', 'Las bandas de rock tocaron guitarras en el festival'),
+            self.crear('Campeonato de fútbol', 'El campeonato de fútbol juvenil definió su final'),
+        ]
+
+        def guardadas():
+            return sorted(EntradaRelacionada.objects.values_list('entrada_id', 'relacionada_id', 'posicion'))
+
+        # Con el índice en la caché solo se lee y tokeniza la entrada que cambió
+        with mock.patch('app.relacionadas.construir_indice', wraps=relacionadas.construir_indice) as construir:
+            self.crear('Guitarras del festival', 'Las guitarras del festival de rock y la final de fútbol')
+            entradas[2].contenido = 'Guitarras y bandas de rock en el festival juvenil'
+            entradas[2].save()
+            eliminada = entradas[0].id
+            entradas[0].delete()
+        construir.assert_not_called()
+        incremental = guardadas()
+
+        relacionadas.recalcular_todas()
+        self.assertEqual(incremental, guardadas())
+        self.assertFalse(EntradaRelacionada.objects.filter(relacionada_id=eliminada).exists())
+        self.assertNotIn(eliminada, relacionadas.indice_actualizado().fila)
+
+    def test_eliminar_varias_en_una_transaccion(self):
+        final = self.crear('Final de fútbol', 'El equipo ganó la final del campeonato de fútbol con un gol')
+        campeonato = self.crear('Campeonato de fútbol', 'El campeonato de fútbol juvenil definió su final')
+        juvenil = self.crear('Fútbol juvenil', 'La final del campeonato juvenil de fútbol')
+        self.assertEqual(len(self.relacionadas(juvenil)), 2)
+
+        # Una sola actualización al confirmar, ya sin ninguna de las dos eliminadas en el índice
+        with self.assertNoLogs('app.relacionadas', level='ERROR'):
+            BlogEntrada.objects.filter(pk__in=[final.pk, campeonato.pk]).delete()
+        self.assertEqual(self.relacionadas(juvenil), [])
+        self.assertEqual(list(relacionadas.indice_actualizado().fila), [juvenil.id])
+
+    def test_indice_con_entradas_inexistentes_se_reconstruye(self):
+        final = self.crear('Final de fútbol', 'El equipo ganó la final del campeonato de fútbol con un gol')
+        campeonato = self.crear('Campeonato de fútbol', 'El campeonato de fútbol juvenil definió su final')
+        desactualizado = cache.get(relacionadas.CLAVE_INDICE)
+        campeonato.delete()
+        cache.set(relacionadas.CLAVE_INDICE, desactualizado)  # Como si la eliminación no lo hubiera tocado
+
+        with self.assertLogs('app.relacionadas', level='WARNING'):
+            juvenil = self.crear('Fútbol juvenil', 'La final del campeonato juvenil de fútbol')
+        self.assertEqual(self.relacionadas(juvenil), ['Final de fútbol'])
+        self.assertEqual(sorted(relacionadas.indice_actualizado().fila), [final.id, juvenil.id])
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class TendenciasTests(TransactionTestCase):
+    """
+    Pruebas del puntaje de tendencias con decaimiento exponencial.
+    """
+
+    def setUp(self):
+        cache.clear()
+        autor = User.objects.create_user('autor')
+        self.antigua, self.reciente = (
+            BlogEntrada.objects.create(autor=autor, titulo=titulo, contenido='...') for titulo in ('Antigua', 'Reciente')
+        )
+
+    def test_vistas_recientes_pesan_mas(self):
+        ahora = timezone.now()
+        for _ in range(4):  # Cuatro vistas de hace tres vidas medias valen media vista de hoy
+            registrar_vista(self.antigua.id, ahora - 3 * VIDA_MEDIA)
+        registrar_vista(self.reciente.id, ahora)
+        self.assertAlmostEqual(vistas_recientes(PopularidadEntrada.objects.get(pk=self.antigua.id), ahora), 0.5)
+        self.assertEqual(
+            [popular.entrada.titulo for popular in PopularidadEntrada.objects.tendencias(3)], ['Reciente', 'Antigua']
+        )
+
+        response = self.client.get('/blog/?orden=tendencias')
+        self.assertEqual([entrada.titulo for entrada in response.context['blog_entradas']], ['Reciente', 'Antigua'])
+
+        # Un mismo visitante cuenta una sola vez por entrada
+        self.client.get(f'/blog/{self.antigua.id}/')
+        self.client.get(f'/blog/{self.antigua.id}/')
+        self.assertEqual(PopularidadEntrada.objects.get(pk=self.antigua.id).vistas, 5)
+
+    def test_vista_del_blog_no_fija_el_primario(self):
+        # Contar la vista escribe, pero no debe mandar al editor al primario como una edición
+        self.client.force_login(User.objects.get(username='autor'))
+        response = self.client.get(f'/blog/{self.reciente.id}/')
+        self.assertEqual(PopularidadEntrada.objects.get(pk=self.reciente.id).vistas, 1)
+        self.assertNotIn(COOKIE_PRIMARIO, response.cookies)
+
+    @override_settings(PROXIES_CONFIABLES=['127.0.0.1'])
+    def test_vistas_por_cliente_real_y_sin_renderizados_internos(self):
+        # Detrás del proxy cada cliente de X-Forwarded-For es un visitante distinto
+        for cliente in ('203.0.113.1', '203.0.113.2', '203.0.113.2'):
+            self.client.get(f'/blog/{self.reciente.id}/', headers={'X-Forwarded-For': cliente})
+        self.assertEqual(PopularidadEntrada.objects.get(pk=self.reciente.id).vistas, 2)
+
+        # freeze renderiza la entrada sin sumar vistas
+        with tempfile.TemporaryDirectory() as salida:
+            call_command('freeze', output=salida, workers=1, stdout=io.StringIO())
+        self.assertFalse(PopularidadEntrada.objects.filter(pk=self.antigua.id).exists())
+        self.assertEqual(PopularidadEntrada.objects.get(pk=self.reciente.id).vistas, 2)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class AlmacenamientoPorContenidoTests(TransactionTestCase):
+    """
+    Pruebas del almacenamiento de media deduplicado por contenido.
+    """
+
+    def setUp(self):
+        cache.clear()
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        ajustes = override_settings(MEDIA_ROOT=carpeta.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.media = carpeta.name
+        self.autor = User.objects.create_user('autor')
+
+    def archivos(self):
+        return [os.path.join(raiz, nombre) for raiz, _, nombres in os.walk(self.media) for nombre in nombres]
+
+    def test_misma_imagen_se_guarda_una_vez(self):
+        imagen = b'\xff\xd8 publicidad ' * 1000
+        portada = EntradaIndex.objects.create(
+            autor=self.autor, titulo='Portada', texto='...', imagen=SimpleUploadedFile('Publicidad.JPG', imagen)
+        )
+        nota = BlogEntrada.objects.create(
+            autor=self.autor, titulo='Nota', contenido='...', imagen=SimpleUploadedFile('otra.jpg', imagen)
+        )
+        self.assertEqual(portada.imagen.name, nota.imagen.name)
+        self.assertRegex(portada.imagen.name, r'^contenido/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        self.assertEqual(len(self.archivos()), 1)
+        self.assertEqual(ArchivoMedia.objects.get().referencias, 2)
+
+        portada.delete()
+        nota.imagen = SimpleUploadedFile('nueva.png', b'otra imagen')
+        nota.save()
+        anterior = ArchivoMedia.objects.get(nombre=portada.imagen.name)
+        self.assertEqual(anterior.referencias, 0)
+        self.assertEqual(borrar_huerfanos(timedelta(0)), (1, len(imagen)))
+        self.assertEqual([os.path.basename(ruta) for ruta in self.archivos()], [os.path.basename(nota.imagen.name)])
+
+    def test_metadatos_de_imagen_al_subir(self):
+        contenido = io.BytesIO()
+        Image.new('RGB', (120, 80), (200, 30, 40)).save(contenido, format='PNG')
+        nota = BlogEntrada.objects.create(
+            autor=self.autor, titulo='Nota', contenido='...', imagen=SimpleUploadedFile('nota.png', contenido.getvalue())
+        )
+        nota.refresh_from_db()
+        self.assertEqual((nota.imagen_ancho, nota.imagen_alto, nota.imagen_color), (120, 80, '#c81e28'))
+        self.assertTrue(nota.imagen_lqip.startswith('data:image/jpeg;base64,'))
+
+        response = self.client.get(f'/blog/{nota.id}/')
+        self.assertContains(response, 'width="120" height="80"')
+
+    def test_imagen_ilegible_no_se_reintenta(self):
+        with self.assertLogs('app.imagenes', level='WARNING'):
+            nota = BlogEntrada.objects.create(
+                autor=self.autor, titulo='Nota', contenido='...', imagen=SimpleUploadedFile('rota.png', b'no es una imagen')
+            )
+        nota.refresh_from_db()
+        self.assertTrue(nota.imagen_ilegible)
+        self.assertEqual((nota.imagen_ancho, nota.imagen_alto, nota.imagen_lqip), (None, None, ''))
+
+        # Ni al cargar la fila (dimensiones) ni al guardarla sin cambiar la imagen (color y miniatura)
+        with mock.patch('app.imagenes.metadatos') as metadatos, \
+                mock.patch('django.core.files.images.get_image_dimensions') as dimensiones:
+            nota = BlogEntrada.objects.get(pk=nota.pk)
+            nota.titulo = 'Nota corregida'
+            nota.save()
+        metadatos.assert_not_called()
+        dimensiones.assert_not_called()
+
+        contenido = io.BytesIO()
+        Image.new('RGB', (60, 40), (0, 0, 255)).save(contenido, format='PNG')
+        nota.imagen = SimpleUploadedFile('nota.png', contenido.getvalue())
+        nota.save()
+        nota.refresh_from_db()
+        self.assertFalse(nota.imagen_ilegible)
+        self.assertEqual((nota.imagen_ancho, nota.imagen_alto, nota.imagen_color), (60, 40, '#0000ff'))
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class IndiceTransmitidoTests(TransactionTestCase):
+    """
+    Pruebas del índice enviado por partes bajo ASGI.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_indice_transmite_la_parte_visible_antes(self):
+        indicadores = {'dolar': 950.5, 'euro': 1010.2, 'uf': 39000, 'utm': 68000, 'utm_mes': 'Octubre', 'instantanea': 1}
+        with mock.patch('app.views.obtener_indicadores', return_value=indicadores):
+            response = await AsyncClient().get('/')
+            partes = [parte async for parte in response.streaming_content]
+
+        self.assertIn('rel=preload; as=style', response['Link'])
+        self.assertEqual(len(partes), 3)
+        cabeza, diferido, cola = (parte.decode() for parte in partes)
+        self.assertIn('<head>', cabeza)
+        self.assertNotIn('radiohits:diferido', cabeza + cola)
+        self.assertIn('950', diferido)
+        self.assertTrue(cola.rstrip().endswith('</html>'))
+
+    async def test_api_lenta_usa_los_ultimos_indicadores_sin_fijar_el_hilo(self):
+        data = {
+            codigo: {'valor': valor, 'fecha': '2026-10-19T03:00:00.000Z'}
+            for codigo, valor in (('dolar', 950.5), ('euro', 1010.2), ('uf', 39000), ('utm', 68000))
+        }
+        respuesta = mock.Mock(json=mock.Mock(return_value=data), raise_for_status=mock.Mock())
+        ejecutor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(ejecutor.shutdown)
+        with mock.patch('app.views.EJECUTOR_EXTERNO', ejecutor):
+            with mock.patch('app.views.cliente_externo.get', return_value=respuesta):
+                await AsyncClient().get('/')
+            # El histórico se guardó en el hilo del ejecutor sin dejarlo fijado al primario
+            self.assertFalse(ejecutor.submit(primario_fijado).result())
+
+            liberar = threading.Event()
+            self.addCleanup(liberar.set)
+            lenta = mock.Mock(side_effect=lambda: liberar.wait(5))
+            with mock.patch('app.views.obtener_indicadores', lenta), mock.patch('app.views.INDICADORES_ESPERA', 0.05):
+                response = await AsyncClient().get('/')
+                partes = [parte.decode() async for parte in response.streaming_content]
+
+        lenta.assert_called_once()
+        self.assertEqual(len(partes), 3)
+        cabeza, diferido, cola = partes
+        self.assertNotIn('950', cabeza)
+        self.assertIn('950', diferido)  # Últimos valores cacheados
+        self.assertNotIn('radiohits:diferido', cabeza + diferido + cola)
+
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class CompresionTests(TransactionTestCase):
+    """
+    Pruebas de la minificación y compresión de respuestas.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_minificar_conserva_bloques_protegidos(self):
+        html = '<div>\n    <!-- nota -->\n    <p>Hola    mundo</p>\n</div><pre>  a\n   b</pre><script>// x\nf();</script>'
+        self.assertEqual(
+            minificar_html(html), '<div>\n<p>Hola mundo</p>\n</div><pre>  a\n   b</pre><script>// x\nf();</script>'
+        )
+
+    def test_negociacion(self):
+        with mock.patch('app.compresion.brotli', None):
+            self.assertEqual(elegir_codificacion('br, gzip'), 'gzip')
+        self.assertEqual(elegir_codificacion('gzip;q=0, identity'), None)
+        self.assertEqual(elegir_codificacion('*'), 'br' if compresion.brotli else 'gzip')
+
+    def test_pagina_comprimida_una_vez(self):
+        indicadores = {'dolar': 950.5, 'euro': 1010.2, 'uf': 39000, 'utm': 68000, 'utm_mes': 'Octubre', 'instantanea': 1}
+        cliente = Client(headers={'Accept-Encoding': 'gzip'})
+        with mock.patch('app.compresion.brotli', None), mock.patch('app.views.obtener_indicadores', return_value=indicadores):
+            sin_comprimir = Client().get('/')
+            antes = compresion.metricas_codificacion('gzip').desde_cache
+            primera = cliente.get('/')
+            segunda = cliente.get('/')
+
+        self.assertNotIn('Content-Encoding', sin_comprimir)
+        self.assertEqual(primera['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', primera['Vary'])
+        html = gzip.decompress(primera.content).decode()
+        self.assertIn('950', html)
+        self.assertLess(len(html), len(sin_comprimir.content))
+        self.assertEqual(segunda.content, primera.content)
+        self.assertEqual(compresion.metricas_codificacion('gzip').desde_cache, antes + 1)
+        self.assertLess(compresion.metricas()['gzip']['ratio_total'], 1)
+
+    def test_solo_se_cachean_las_respuestas_repetibles(self):
+        cuerpo = '<p>' + 'x' * 1000 + '</p>'
+        vistas = {
+            '/unica/': HttpResponse(cuerpo, content_type='text/html'),  # Como una página con token CSRF
+            '/feed/': HttpResponse(cuerpo, content_type='text/html', headers={'ETag': '"1"'}),
+            '/marcada/': compresion.marcar_cacheable(HttpResponse(cuerpo, content_type='text/html')),
+        }
+        middleware = CompresionMiddleware(lambda request: vistas[request.path])
+        with mock.patch('app.compresion.brotli', None), mock.patch('app.compresion.cache') as cache_compresion:
+            cache_compresion.get.return_value = None
+            for ruta in vistas:
+                middleware(RequestFactory().get(ruta, headers={'Accept-Encoding': 'gzip'}))
+        self.assertEqual(cache_compresion.get.call_count, 2)
+        self.assertEqual(cache_compresion.set.call_count, 2)
+
+    def test_clave_por_ruta_y_tipo_y_partes_sin_minificar(self):
+        relleno = '<!-- nota -->' + ' ' * 1000
+        vistas = {
+            '/a/': HttpResponse(f'<p>A</p>{relleno}', content_type='text/html; charset=utf-8', headers={'ETag': '"1"'}),
+            '/b/': HttpResponse(f'<p>B</p>{relleno}', content_type='text/html; charset=utf-8', headers={'ETag': '"1"'}),
+            '/c/': StreamingHttpResponse(['<p>C</p><!-- ', 'radiohits:diferido -->  ', relleno], content_type='text/html'),
+        }
+        middleware = CompresionMiddleware(lambda request: vistas[request.path])
+        with mock.patch('app.compresion.brotli', None):
+            cuerpos = {
+                ruta: middleware(RequestFactory().get(ruta, headers={'Accept-Encoding': 'gzip'})) for ruta in vistas
+            }
+
+        # Mismo ETag en otra URL: no se reutiliza el cuerpo comprimido de la primera
+        self.assertEqual(gzip.decompress(cuerpos['/a/'].content), b'<p>A</p> ')
+        self.assertEqual(gzip.decompress(cuerpos['/b/'].content), b'<p>B</p> ')
+        # Las partes se comprimen tal cual: un comentario cortado entre dos partes queda intacto
+        transmitido = gzip.decompress(b''.join(cuerpos['/c/'].streaming_content)).decode()
+        self.assertEqual(transmitido, f'<p>C</p><!-- radiohits:diferido -->  {relleno}')
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class LimitePeticionesTests(TransactionTestCase):
+    """
+    Pruebas del límite de peticiones con cubetas de tokens.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_login_responde_429_al_agotar_la_cubeta(self):
+        datos = {'username': 'nadie', 'password': 'incorrecta'}
+        respuestas = [self.client.post('/accounts/login/', datos) for _ in range(6)]
+        self.assertEqual([r.status_code for r in respuestas[:5]], [200] * 5)
+        self.assertEqual(respuestas[5].status_code, 429)
+        self.assertGreaterEqual(int(respuestas[5]['Retry-After']), 1)
+        # Otra IP tiene su propia cubeta y los GET no gastan tokens
+        self.assertEqual(self.client.post('/accounts/login/', datos, REMOTE_ADDR='10.0.0.2').status_code, 200)
+        self.assertEqual(self.client.get('/accounts/login/').status_code, 200)
+
+    def test_cubeta_con_candado_se_rellena_y_rechaza_si_esta_ocupada(self):
+        # El camino de memcached y la base de datos, sin candado de hilos: solo el de la caché
+        regla = Regla('prueba', capacidad=10, por_minuto=60)
+        ahora = time.time()
+        resultados = []
+        hilos = [
+            threading.Thread(target=lambda: resultados.append(_consumir_con_candado(cache, 'cubeta', regla, ahora)[0]))
+            for _ in range(15)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(resultados.count(True), 10)
+        self.assertTrue(_consumir_con_candado(cache, 'cubeta', regla, ahora + 60)[0])
+        # Candado en manos de otro worker: se rechaza en lugar de dejar pasar
+        cache.add('cubeta:candado', 'otro', 30)
+        with mock.patch('app.limites.time.sleep'):
+            self.assertFalse(_consumir_con_candado(cache, 'cubeta', regla, ahora + 120)[0])
+        # Otra cubeta no espera por la ocupada
+        self.assertTrue(_consumir_con_candado(cache, 'otra', regla, ahora)[0])
+
+    def test_comprobacion_exige_cache_atomica(self):
+        archivos = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp'}}
+        with override_settings(CACHES=archivos):
+            self.assertEqual([error.id for error in limites_con_cache_atomica(None)], ['app.W001'])
+            self.assertEqual([error.id for error in limites_con_cache_atomica_despliegue(None)], ['app.E001'])
+            with override_settings(LIMITES_PETICIONES={}):
+                self.assertEqual(limites_con_cache_atomica_despliegue(None), [])
+        self.assertEqual(limites_con_cache_atomica_despliegue(None), [])  # LocMemCache
+
+    @override_settings(LIMITES_PETICIONES={'serie_indicador': {'capacidad': 5, 'por_minuto': 1}})
+    def test_limite_se_mantiene_con_peticiones_simultaneas(self):
+        middleware = LimitePeticionesMiddleware(lambda request: HttpResponse('ok'))
+        barrera = threading.Barrier(20)
+        estados = []
+
+        def peticion():
+            request = RequestFactory().get('/indicadores/dolar/serie/')
+            barrera.wait()
+            estados.append(middleware(request).status_code)
+
+        hilos = [threading.Thread(target=peticion) for _ in range(20)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(sorted(estados), [200] * 5 + [429] * 15)
+
+    @override_settings(PROXIES_CONFIABLES=['10.0.0.0/8'], LIMITES_PETICIONES={'serie_indicador': {'capacidad': 1, 'por_minuto': 1}})
+    def test_ip_del_cliente_detras_del_proxy(self):
+        middleware = LimitePeticionesMiddleware(lambda request: HttpResponse('ok'))
+
+        def estado(remota, reenviada):
+            request = RequestFactory().get('/indicadores/dolar/serie/', REMOTE_ADDR=remota, HTTP_X_FORWARDED_FOR=reenviada)
+            return middleware(request).status_code
+
+        # Dos visitantes detrás del mismo nginx tienen cubetas distintas
+        self.assertEqual(estado('10.0.0.1', '203.0.113.5'), 200)
+        self.assertEqual(estado('10.0.0.1', '203.0.113.6'), 200)
+        self.assertEqual(estado('10.0.0.1', '203.0.113.5'), 429)
+        # Lo que el cliente agrega a la izquierda no cambia su identidad
+        self.assertEqual(estado('10.0.0.1', '1.2.3.4, 203.0.113.6'), 429)
+        # Sin pasar por un proxy confiable, X-Forwarded-For se ignora
+        self.assertEqual(estado('198.51.100.7', '203.0.113.9'), 200)
+        self.assertEqual(estado('198.51.100.7', '203.0.113.10'), 429)
+
+    def test_comprobacion_es_barata(self):
+        # Con la caché en memoria solo se mide el propio cálculo; el margen cubre máquinas lentas
+        regla = Regla('prueba', capacidad=10 ** 6, por_minuto=60)
+        inicio = time.perf_counter()
+        for numero in range(1000):
+            consumir(regla, f'ip:{numero % 50}')
+        self.assertLess((time.perf_counter() - inicio) / 1000, 0.01)
+
+
+class ArranqueTests(SimpleTestCase):
+    """
+    Pruebas del tiempo de arranque de un worker y de su calentamiento.
+    """
+
+    def test_arranque_dentro_del_presupuesto(self):
+        # PRESUPUESTO_ARRANQUE deja varias veces de margen sobre lo que tarda en una máquina
+        # de desarrollo: la prueba detecta una importación pesada nueva, no unas décimas más
+        codigo = (
+            'import json, sys, time; inicio = time.perf_counter(); import django; django.setup(); '
+            'import core.urls; duracion = time.perf_counter() - inicio; '
+            "print(json.dumps([duracion, [m for m in ('numpy', 'PIL', 'PIL.Image') if m in sys.modules]]))"
+        )
+        salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True).stdout
+        duracion, pesados = json.loads(salida.strip().splitlines()[-1])
+        self.assertEqual(pesados, [])
+        self.assertLess(duracion, PRESUPUESTO_ARRANQUE)
+
+    def test_calentar_resuelve_urls_y_compila_plantillas(self):
+        self.assertGreater(resolver_urls(), 10)
+        compiladas, errores = compilar_plantillas()
+        self.assertGreater(compiladas, 30)
+        self.assertEqual(errores, 0)
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class ModoDegradadoTests(TransactionTestCase):
+    """
+    Pruebas del modo degradado de solo lectura.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client(raise_request_exception=False)
+
+    def test_sirve_la_copia_y_rechaza_escrituras_mientras_la_base_cae(self):
+        normal = self.client.get('/about/')
+        self.assertNotIn('X-Modo-Degradado', normal)
+
+        with mock.patch('app.views.AboutView.get_context_data', side_effect=OperationalError('sin conexión')):
+            degradada = self.client.get('/about/')
+        self.assertEqual(degradada.status_code, 200)
+        self.assertEqual(degradada.content, normal.content)
+        self.assertIn('110', degradada['Warning'])
+        self.assertIn('Age', degradada)
+        self.assertTrue(base_caida())
+
+        # Sin tocar la base: la copia para los GET, 503 para escrituras y páginas sin copia
+        escritura = self.client.post('/add_entrada_blog/', {'titulo': 'x'})
+        self.assertEqual(escritura.status_code, 503)
+        self.assertEqual(escritura['Retry-After'], str(ESPERA_SONDA))
+        self.assertEqual(self.client.get('/eventos/').status_code, 503)
+
+        cache.delete(f'{CLAVE_CAIDA}:sonda')  # Que la siguiente petición compruebe la base
+        recuperada = self.client.get('/eventos/')
+        self.assertEqual(recuperada.status_code, 200)
+        self.assertNotIn('X-Modo-Degradado', recuperada)
+        self.assertFalse(base_caida())
+
+    def test_parametros_desconocidos_no_crean_copias(self):
+        self.client.get('/about/?x=1')
+        self.assertIsNone(cache.get('radiohits:instantanea:/about/?'))
+        self.client.get('/blog/?page=1&x=2')
+        self.client.get('/about/')
+
+        marcar_caida()
+        degradada = self.client.get('/about/?x=3')
+        self.assertEqual(degradada['X-Modo-Degradado'], 'instantanea')
+        self.assertEqual(self.client.get('/blog/?page=1').status_code, 503)
+
+    def test_otros_errores_de_base_de_datos_no_activan_el_modo_degradado(self):
+        self.client.get('/about/')
+        with mock.patch('app.views.AboutView.get_context_data', side_effect=IntegrityError('duplicada')):
+            response = self.client.get('/about/')
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn('X-Modo-Degradado', response)
+        self.assertFalse(base_caida())
+
+    def test_consulta_cacheada_usa_la_ultima_copia(self):
+        self.assertEqual(obtener_con_respaldo('programacion', 'prueba', lambda: ['lunes']), ['lunes'])
+        incrementar_generacion('programacion')
+        with self.assertLogs('app.cache', 'WARNING'):
+            valor = obtener_con_respaldo('programacion', 'prueba', mock.Mock(side_effect=OperationalError('caída')))
+        self.assertEqual(valor, ['lunes'])
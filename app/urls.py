@@ -1,5 +1,5 @@
 from django.urls import path
-from app import views
+from app import views, feeds, indicadores
 from django.urls import path
 from django.contrib.auth.mixins import LoginRequiredMixin 
 from .views import (
@@ -35,8 +35,20 @@ urlpatterns = [
     path('blog/', BlogGeneralView.as_view(), name='blog'),
     path('blog/<int:entrada_id>/', BlogView.as_view(), name='entrada_blog'),
     path('list_entradas_blog/', ListEntradasBlogView.as_view(), name='list_entradas_blog'),
+    path('list_entradas_blog/acciones/', views.acciones_entradas_blog, name='acciones_entradas_blog'),
     path('blog/detail/<int:entrada_id>/', BlogDetailView.as_view(), name='blog_detail'),
     path('latertulia/', LaTertuliaView.as_view(), name='latertulia'),
+
+    # Feeds y sitemaps del blog (XML en streaming con soporte de GET condicional)
+    path('blog/feed/rss/', feeds.feed_rss, name='blog_feed_rss'),
+    path('blog/feed/atom/', feeds.feed_atom, name='blog_feed_atom'),
+    path('sitemap.xml', feeds.sitemap_index, name='sitemap_index'),
+    path('sitemap-paginas.xml', feeds.sitemap_paginas, name='sitemap_paginas'),
+    path('sitemap-blog-<int:numero>.xml', feeds.sitemap_blog, name='sitemap_blog'),
+    path('programacion.ics', feeds.programacion_ics, name='programacion_ics'),
+
+    # Histórico de indicadores económicos en JSON (gráficos del índice)
+    path('indicadores/<str:codigo>/serie/', indicadores.serie_json, name='serie_indicador'),
     
     #------------------------------------------------------------------------------------------------------------------------------
     
@@ -46,6 +58,7 @@ urlpatterns = [
     path('delete_entrada_index/<int:pk>/', delete_entrada_index, name='delete_entrada_index'),
     path('carrusel_index/', CarruselIndexView.as_view(), name='carrusel_index'),
     path('list_entradas_index/', ListEntradasIndexView.as_view(), name='list_entradas_index'),
+    path('list_entradas_index/acciones/', views.acciones_entradas_index, name='acciones_entradas_index'),
 
     #------------------------------------------------------------------------------------------------------------------------------
     
@@ -58,6 +71,11 @@ urlpatterns = [
     path('add_programa_sabado/', AddProgramaSabado.as_view(), name='add_programa_sabado'),
     path('add_programa_domingo/', AddProgramaDomingo.as_view(), name='add_programa_domingo'),
     path('list_programacion/', ListProgramacionSemanal.as_view(), name='list_programacion'),
+    path('list_programacion/acciones/', views.acciones_programacion, name='acciones_programacion'),
+    path('list_programacion/editor/', views.EditorProgramacionView.as_view(), name='editor_programacion'),
+    path('list_programacion/exportar/<str:formato>/', views.exportar_programacion, name='exportar_programacion'),
+    path('list_programacion/importar/', views.importar_programacion, name='importar_programacion'),
+    path('list_programacion/copiar/', views.copiar_programacion, name='copiar_programacion'),
 
 # ----------------------------------------------------------------------------------------------------------------------------------------------------
 # URLs PARA PROGRAMACIÓN SEMANAL - Agregar al final de urlpatterns en urls.py
@@ -1,9 +1,23 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from datetime import datetime
-import requests
-from django.http import HttpResponse
+import asyncio
+import contextvars
+import io
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from requests.exceptions import RequestException
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from django.db import transaction
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import require_GET, require_POST
 from django.views.generic import (
     ListView,
     TemplateView,
@@ -13,19 +27,29 @@ from django.views.generic import (
     DetailView
 )
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 
+from .cache import single_flight, obtener_generacion, ultimo_valor
+from .compresion import marcar_cacheable
+from .externo import cliente_externo
+from .indicadores import registrar_consulta
+
 # Importamos los modelos necesarios
 from .models import (
     EntradaIndex,
     BlogEntrada,
+    EntradaRelacionada,
     Lunes,  # Importa los modelos de los días de la semana
     Martes,
     Miercoles,
     Jueves,
     Viernes,
     Sabado,
-    Domingo
+    Domingo,
+    programacion_semanal,  # Programación de la semana leída desde la caché compartida
+    PROGRAMACION_POR_DIA
 )
 
 # Importar los forms necesarios
@@ -38,86 +62,208 @@ from .forms import (
     JuevesForm,
     ViernesForm,
     SabadoForm,
-    DomingoForm
+    DomingoForm,
+    AccionMasivaEntradasForm,  # Acciones masivas de las listas de administración
+    AccionMasivaProgramasForm,
+    programacion_dia_formset,  # Editor en cuadrícula de la programación
+    ImportarProgramacionForm,  # Importación y copia de la programación (solo personal)
+    CopiarDiaForm
+)
+from .programacion import (
+    LECTORES,
+    ErrorProgramacion,
+    aplicar_cambios,
+    cargar_semana,
+    copiar_dia,
+    filas_csv,
+    importar_semana,
+    lineas_ics,
+    validar_semana,
 )
+from .tendencias import ordenar_por_tendencia, registrar_vista_de, tendencias
 
 # --- VISTAS GENERALES Y DE SECCIONES ESTÁTICAS ---
-# En views.py, modificar la clase IndexView para incluir los programas semanales
+
+# Diccionario de meses en español para formato de fechas
+MESES_ES = {
+    "01": "Enero", "02": "Febrero", "03": "Marzo", "04": "Abril",
+    "05": "Mayo", "06": "Junio", "07": "Julio", "08": "Agosto",
+    "09": "Septiembre", "10": "Octubre", "11": "Noviembre", "12": "Diciembre"
+}
+
+INDICADORES_TIMEOUT = 60 * 15  # Los valores de mindicador.cl cambian como máximo una vez al día
+INDICADORES_CLAVE = 'radiohits:indicadores'
+INDICADORES_ESPERA = 2.0  # Segundos máximos que el índice espera a mindicador.cl antes de usar la caché
+
+# Hilos propios para las llamadas a APIs externas: no dependen del ciclo de vida del event loop,
+# así que una consulta lenta nunca retiene la respuesta (tampoco bajo WSGI)
+EJECUTOR_EXTERNO = ThreadPoolExecutor(max_workers=4, thread_name_prefix='radiohits-externo')
+
+logger = logging.getLogger(__name__)
+
+@single_flight(INDICADORES_CLAVE, timeout=INDICADORES_TIMEOUT)
+def obtener_indicadores():
+    """
+    Consulta los indicadores económicos de mindicador.cl.
+    El resultado se cachea con protección contra estampidas: al expirar, una sola petición
+    vuelve a consultar la API mientras las demás siguen usando el valor anterior.
+    Lanza requests.exceptions.RequestException (o CircuitoAbierto) si la API falla y no hay
+    valor anterior.
+    """
+    response = cliente_externo.get("https://mindicador.cl/api")
+    response.raise_for_status()  # Lanza una excepción para errores HTTP
+    data = response.json()
+    registrar_consulta(data)  # Guarda el valor del día en el histórico local (gráficos)
+
+    # Extraer mes de la fecha de UTM para mostrar en español
+    fecha_utm = data["utm"]["fecha"]
+    mes_utm_num = fecha_utm[5:7]
+
+    return {
+        "dolar": data["dolar"]["valor"],
+        "euro": data["euro"]["valor"],
+        "uf": data["uf"]["valor"],
+        "utm": data["utm"]["valor"],
+        "utm_mes": MESES_ES.get(mes_utm_num, "Mes desconocido"),
+        "instantanea": int(time.time()),  # Versión de esta consulta (clave del fragmento cacheado)
+    }
+
+# Valores mostrados cuando no hay indicadores disponibles (ni en la API ni en la caché)
+INDICADORES_VACIOS = {"dolar": None, "euro": None, "uf": None, "utm": None, "utm_mes": None}
 
 class IndexView(TemplateView):
     """
     Vista principal (Home) del sitio.
     Muestra indicadores económicos, las 3 entradas más recientes
-    del modelo EntradaIndex, los formularios de programación semanal
-    y la programación semanal completa.
-    """
-    template_name = 'index.html'
+    del modelo EntradaIndex y la programación semanal completa.
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-
-        # Diccionario de meses en español para formato de fechas
-        meses_es = {
-            "01": "Enero", "02": "Febrero", "03": "Marzo", "04": "Abril",
-            "05": "Mayo", "06": "Junio", "07": "Julio", "08": "Agosto",
-            "09": "Septiembre", "10": "Octubre", "11": "Noviembre", "12": "Diciembre"
-        }
+    Es una vista asíncrona: bajo ASGI la consulta a mindicador.cl corre en su propio
+    hilo (EJECUTOR_EXTERNO) mientras se hacen las lecturas de la base de datos. Estas
+    usan sync_to_async con thread_sensitive, así que se ejecutan una tras otra en el
+    hilo de la conexión (el de la petición), no en paralelo entre sí.
+    La consulta externa tiene un tiempo límite estricto (INDICADORES_ESPERA); si
+    se supera, se muestran los últimos indicadores cacheados.
 
+    Bajo ASGI la página se envía por partes (StreamingHttpResponse): primero el <head>
+    y la parte visible al cargar (navbar, carrusel, blog...), que el navegador empieza
+    a descargar y pintar, y después los indicadores y la programación, que se siguen
+    calculando mientras tanto (ver index_diferido.html). Bajo WSGI, y para el comando
+    freeze, se responde con la página completa como antes.
+    """
+    template_name = 'index.html'
+    template_diferido = 'secciones/index_diferido.html'
+
+    # Punto de index.html donde se inserta la parte diferida al transmitir
+    MARCADOR_DIFERIDO = mark_safe('<!-- radiohits:diferido -->')
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+
+        # Lanzar ya la parte lenta: la consulta externa avanza en su hilo mientras se leen el carrusel y la programación
+        diferido = asyncio.ensure_future(self.obtener_diferido())
+        context.update(await sync_to_async(self.obtener_contenido)())
+
+        if not isinstance(request, ASGIRequest):
+            self.completar_contexto(context, await diferido)
+            response = self.render_to_response(context)
+            if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+                # Sin sesión la página sale entera de los fragmentos cacheados: se repite entre visitantes
+                marcar_cacheable(response)
+            return response
+
+        response = StreamingHttpResponse(self.transmitir(context, diferido), content_type='text/html; charset=utf-8')
+        response['X-Accel-Buffering'] = 'no'  # Que nginx no acumule la respuesta antes de enviarla
+        return response
+
+    async def transmitir(self, context, diferido):
+        """
+        Partes de la página en orden: todo lo anterior al marcador, la parte diferida
+        cuando está lista y el resto (footer, reproductor y scripts).
+        """
+        renderizar = sync_to_async(render_to_string)
+        pagina = await renderizar(self.template_name, {**context, 'diferido': self.MARCADOR_DIFERIDO}, self.request)
+        cabeza, cola = pagina.split(self.MARCADOR_DIFERIDO, 1)
+        yield cabeza
+        try:
+            self.completar_contexto(context, await diferido)
+            yield await renderizar(self.template_diferido, context, self.request)
+        except Exception:
+            # La cabecera 200 ya se envió: se cierra la página sin la parte diferida
+            logger.exception('No se pudo generar la parte diferida del índice')
+        yield cola
+
+    async def obtener_diferido(self):
+        """
+        Indicadores (con tiempo límite) y programación semanal. La consulta externa corre en
+        paralelo; la lectura de la programación espera su turno en el hilo de la conexión.
+        """
+        indicadores, programacion = await asyncio.gather(
+            self.obtener_indicadores_con_limite(),
+            sync_to_async(self.obtener_programacion)(),
+        )
+        return {'indicadores': indicadores, **programacion}
+
+    def completar_contexto(self, context, diferido):
         # Obtener fecha actual para la consulta de indicadores
         fecha_actual = datetime.now()
         dia_actual = fecha_actual.strftime("%d")
-        mes_actual = meses_es.get(fecha_actual.strftime("%m"), "Mes desconocido")
+        mes_actual = MESES_ES.get(fecha_actual.strftime("%m"), "Mes desconocido")
         año_actual = fecha_actual.strftime("%Y")
+        context["indicadores"] = {
+            **diferido['indicadores'],
+            "fecha_consulta": f"{dia_actual} de {mes_actual.lower()} de {año_actual}",
+        }
 
-        # Intento de obtener datos de indicadores económicos de mindicador.cl
+        # La programación de cada día (desde la caché)
+        for dia, programas in diferido['programacion'].items():
+            context[f'programas_{dia}'] = programas
+
+        # Versiones del contenido de cada fragmento cacheado en index.html
+        # (cada fragmento se invalida por separado cuando cambian sus datos)
+        context['versiones'].update({
+            'programacion': diferido['version_programacion'],
+            'indicadores': context['indicadores'].get('instantanea'),
+        })
+
+    async def obtener_indicadores_con_limite(self):
+        """
+        Indicadores económicos con tiempo límite estricto.
+        La consulta corre en un hilo aparte (EJECUTOR_EXTERNO); si no termina a tiempo
+        o falla, se devuelven los últimos valores cacheados. El hilo sigue en segundo plano y,
+        cuando termina, deja el valor actualizado en la caché para las próximas peticiones.
+
+        Se ejecuta en una copia del contexto de la petición: lo que fije el enrutador de base
+        de datos al guardar el histórico (app/routers.py) no queda en el hilo del ejecutor.
+        """
         try:
-            response = requests.get("https://mindicador.cl/api")
-            response.raise_for_status()  # Lanza una excepción para errores HTTP
-            data = response.json()
-
-            # Extraer mes de la fecha de UTM para mostrar en español
-            fecha_utm = data["utm"]["fecha"]
-            mes_utm_num = fecha_utm[5:7]
-            mes_utm_esp = meses_es.get(mes_utm_num, "Mes desconocido")
-
-            context["indicadores"] = {
-                "dolar": data["dolar"]["valor"],
-                "euro": data["euro"]["valor"],
-                "uf": data["uf"]["valor"],
-                "utm": data["utm"]["valor"],
-                "utm_mes": mes_utm_esp,
-                "fecha_consulta": f"{dia_actual} de {mes_actual.lower()} de {año_actual}",
-            }
-        except requests.exceptions.RequestException:
-            # En caso de error en la petición o JSON inválido
-            context["indicadores"] = {
-                "dolar": None, "euro": None, "uf": None, "utm": None, "utm_mes": None,
-                "fecha_consulta": f"{dia_actual} de {mes_actual.lower()} de {año_actual}",
-            }
-
-        # Obtener las 3 entradas más recientes del modelo EntradaIndex para el carrusel
-        context['entradas'] = EntradaIndex.objects.order_by('-id')[:3]
-
-        # Añadir los formularios de programación semanal al contexto
-        context['form_lunes'] = LunesForm()
-        context['form_martes'] = MartesForm()
-        context['form_miercoles'] = MiercolesForm()
-        context['form_jueves'] = JuevesForm()
-        context['form_viernes'] = ViernesForm()
-        context['form_sabado'] = SabadoForm()
-        context['form_domingo'] = DomingoForm()
-
-        # *** NUEVA SECCIÓN: Añadir programación semanal ***
-        # Obtener todos los programas de cada día ordenados por hora de inicio
-        context['programas_lunes'] = Lunes.objects.all().order_by('hora_inicio')
-        context['programas_martes'] = Martes.objects.all().order_by('hora_inicio')
-        context['programas_miercoles'] = Miercoles.objects.all().order_by('hora_inicio')
-        context['programas_jueves'] = Jueves.objects.all().order_by('hora_inicio')
-        context['programas_viernes'] = Viernes.objects.all().order_by('hora_inicio')
-        context['programas_sabado'] = Sabado.objects.all().order_by('hora_inicio')
-        context['programas_domingo'] = Domingo.objects.all().order_by('hora_inicio')
+            consulta = asyncio.get_running_loop().run_in_executor(
+                EJECUTOR_EXTERNO, contextvars.copy_context().run, obtener_indicadores
+            )
+            return await asyncio.wait_for(consulta, timeout=INDICADORES_ESPERA)
+        except (asyncio.TimeoutError, RequestException, KeyError, ValueError):
+            # En caso de demora, error en la petición o JSON inválido
+            return await sync_to_async(ultimo_valor)(INDICADORES_CLAVE, INDICADORES_VACIOS)
+
+    def obtener_contenido(self):
+        """
+        Lecturas de la base de datos de la parte visible al cargar (carrusel y tendencias
+        del blog) junto con la versión del carrusel. Se ejecuta en el hilo de la conexión
+        a la base de datos mediante sync_to_async.
+        """
+        return {
+            'entradas': EntradaIndex.objects.recientes(3),
+            'tendencias': tendencias(3), # Entradas del blog en tendencia
+            'versiones': {'carrusel': obtener_generacion('carrusel')},
+        }
 
-        return context
+    def obtener_programacion(self):
+        """
+        Programación semanal (desde la caché compartida) y la versión de su fragmento.
+        """
+        return {
+            'programacion': programacion_semanal(),
+            'version_programacion': obtener_generacion('programacion'),
+        }
 #------------------------------------------------------------------------------------------------------------------------
 
 class EventosView(TemplateView):
@@ -217,8 +363,8 @@ class CarruselIndexView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Obtiene las 3 entradas más recientes ordenadas por ID descendente
-        context['entradas'] = EntradaIndex.objects.order_by('-id')[:3]
+        # Obtiene las 3 entradas más recientes ordenadas por ID descendente (comparte caché con IndexView)
+        context['entradas'] = EntradaIndex.objects.recientes(3)
         return context
 
 class EntradaIndexDetailView(TemplateView):
@@ -395,14 +541,22 @@ def delete_entrada_blog(request, pk):
 class BlogGeneralView(ListView):
     """
     Vista general del blog, que muestra todas las entradas paginadas.
-    Las entradas se ordenan por fecha de publicación descendente.
+    Las entradas se ordenan por fecha de publicación descendente, o por tendencia
+    (vistas recientes, ver app/tendencias.py) con ?orden=tendencias.
     """
     model = BlogEntrada
     template_name = 'secciones/blog.html'
     context_object_name = 'blog_entradas' # Nombre de la variable en el contexto para las entradas
     paginate_by = 6 # Número de entradas por página
+    ordenes = ('recientes', 'tendencias')
+
+    def get_orden(self):
+        orden = self.request.GET.get('orden')
+        return orden if orden in self.ordenes else self.ordenes[0]
 
     def get_queryset(self):
+        if self.get_orden() == 'tendencias':
+            return ordenar_por_tendencia()
         # Ordenar las entradas por fecha de publicación de forma descendente
         return BlogEntrada.objects.all().order_by('-fecha_publicacion')
 
@@ -415,6 +569,10 @@ class BlogGeneralView(ListView):
             context['total_entries'] = paginator.count
             context['entries_per_page'] = self.paginate_by
 
+        # Orden elegido, para los enlaces de orden y de paginación
+        context['orden'] = self.get_orden()
+        context['parametros_orden'] = '' if context['orden'] == self.ordenes[0] else f"&orden={context['orden']}"
+
         return context
 
 class BlogView(TemplateView):
@@ -423,11 +581,15 @@ class BlogView(TemplateView):
     Esta vista es funcional y usa un método 'get' para manejar la solicitud.
     """
     def get(self, request, entrada_id):
-        try:
-            entrada = BlogEntrada.objects.get(id=entrada_id) # Intenta obtener la entrada por ID
-            return render(request, 'secciones/entrada_blog.html', {'entrada': entrada}) # Renderiza la plantilla con la entrada
-        except BlogEntrada.DoesNotExist:
+        entrada = BlogEntrada.objects.publicada(entrada_id) # Obtiene la entrada desde la caché
+        if entrada is None:
             return HttpResponse("Entrada no encontrada", status=404) # Devuelve un 404 si no encuentra la entrada
+        response = render(request, 'secciones/entrada_blog.html', {
+            'entrada': entrada,
+            'relacionadas': EntradaRelacionada.objects.de(entrada.id), # Calculadas de antemano (app/relacionadas.py)
+        })
+        registrar_vista_de(request, entrada.id) # Suma la vista al puntaje de tendencias, ya renderizada la página
+        return response
 
 class BlogDetailView(TemplateView):
     """
@@ -435,11 +597,13 @@ class BlogDetailView(TemplateView):
     Similar a BlogView, pero con una plantilla diferente ('detail_blog.html').
     """
     def get(self, request, entrada_id):
-        try:
-            entrada = BlogEntrada.objects.get(id=entrada_id) # Intenta obtener la entrada por ID
-            return render(request, 'secciones/detail_blog.html', {'entrada': entrada}) # Renderiza la plantilla con la entrada
-        except BlogEntrada.DoesNotExist:
+        entrada = BlogEntrada.objects.publicada(entrada_id) # Obtiene la entrada desde la caché
+        if entrada is None:
             return HttpResponse("Entrada no encontrada", status=404) # Devuelve un 404 si no encuentra la entrada
+        return render(request, 'secciones/detail_blog.html', {
+            'entrada': entrada,
+            'relacionadas': EntradaRelacionada.objects.de(entrada.id), # Calculadas de antemano (app/relacionadas.py)
+        })
 
 class ListEntradasBlogView(LoginRequiredMixin, ListView):
     """
@@ -720,15 +884,8 @@ class ListProgramacionSemanal(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
 
         # Diccionario para almacenar los programas de cada día
-        programas_por_dia = {
-            'lunes': Lunes.objects.all().order_by('hora_inicio'),
-            'martes': Martes.objects.all().order_by('hora_inicio'),
-            'miercoles': Miercoles.objects.all().order_by('hora_inicio'),
-            'jueves': Jueves.objects.all().order_by('hora_inicio'),
-            'viernes': Viernes.objects.all().order_by('hora_inicio'),
-            'sabado': Sabado.objects.all().order_by('hora_inicio'),
-            'domingo': Domingo.objects.all().order_by('hora_inicio'),
-        }
+        # (misma caché que la programación del índice, invalidada al guardar cualquier programa)
+        programas_por_dia = programacion_semanal()
         context['programas_por_dia'] = programas_por_dia
 
         # Lista de días de la semana para el filtro
@@ -756,9 +913,66 @@ class ListProgramacionSemanal(LoginRequiredMixin, TemplateView):
         else:
             context['programas_activos'] = {selected_day: programas_por_dia.get(selected_day, [])}
 
+        # Solapamientos y huecos de toda la semana (en memoria, sobre los datos ya cargados)
+        context['validacion'] = validar_semana(programas_por_dia)
 
         return context
-    
+
+
+# ----------------------------------------------------------------------------------------------------------------------------------------------------
+# EDITOR EN CUADRÍCULA DE LA PROGRAMACIÓN (un día o la semana completa en un solo envío)
+
+class EditorProgramacionView(LoginRequiredMixin, TemplateView):
+    """
+    Edita todos los programas de un día (?dia=lunes) o de la semana (?dia=todos) a la vez.
+    Se validan todas las filas juntas (incluidos los solapamientos con toda la semana) y,
+    si no hay errores, los cambios se aplican en una
+    transacción con bulk_create/bulk_update y una sola invalidación de la caché.
+    """
+    template_name = 'programacion_semanal/editor_programacion.html'
+
+    def dia_seleccionado(self):
+        dia = self.request.GET.get('dia', 'lunes')
+        return dia if dia in PROGRAMACION_POR_DIA or dia == 'todos' else 'lunes'
+
+    def get_formsets(self, data=None):
+        dia = self.dia_seleccionado()
+        dias = PROGRAMACION_POR_DIA if dia == 'todos' else [dia]
+        return {d: programacion_dia_formset(d, data) for d in dias}
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.setdefault('formsets', self.get_formsets())
+        context['dia_seleccionado'] = self.dia_seleccionado()
+        context['dias_semana'] = list(PROGRAMACION_POR_DIA)
+        return context
+
+    def post(self, request, *args, **kwargs):
+        formsets = self.get_formsets(request.POST)
+        # Todas las filas de todos los días se validan antes de escribir nada
+        valido = all([formset.is_valid() for formset in formsets.values()])
+        if valido:
+            # Solapamientos con la semana completa: días editados tal como quedarían + el resto desde la BD
+            semana = cargar_semana(excluir=formsets)
+            semana.update({dia: formset.programas() for dia, formset in formsets.items()})
+            resultado = validar_semana(semana)
+            for dia, formset in formsets.items():
+                for programa in formset.programas():
+                    for error in resultado.errores_de(programa):
+                        if error not in formset.non_form_errors():
+                            formset.agregar_error(error)
+                            valido = False
+        if not valido:
+            messages.error(request, 'Revisa los errores marcados; no se guardó ningún cambio.')
+            return self.render_to_response(self.get_context_data(formsets=formsets))
+
+        totales = aplicar_cambios({dia: formset.cambios() for dia, formset in formsets.items()})
+        messages.success(
+            request,
+            f"Programación guardada: {totales['creados']} nuevo(s), "
+            f"{totales['actualizados']} modificado(s), {totales['eliminados']} eliminado(s)."
+        )
+        return redirect(f"{reverse_lazy('list_programacion')}?day={self.dia_seleccionado()}")
 
 
 #--------------------------------------------------------------------------------------------------------------------------------------
@@ -1047,3 +1261,201 @@ def delete_programa_domingo(request, pk):
     else:
         # Redirigir a "todos los días" si no quedan registros
         return redirect('list_programacion')
+
+# ----------------------------------------------------------------------------------------------------------------------------------------------------
+# ACCIONES MASIVAS DE LAS LISTAS DE ADMINISTRACIÓN
+# Cada acción se aplica a todas las filas seleccionadas con una consulta sobre el conjunto
+# (DELETE/UPDATE ... WHERE id IN (...)) dentro de una transacción, y la caché del grupo
+# se invalida una sola vez al confirmarla (ver invalidar en app/cache.py).
+
+def _volver_a_lista(request, nombre_url):
+    """
+    Redirige a la lista de origen conservando sus filtros y página (campo oculto 'volver').
+    """
+    volver = request.POST.get('volver', '')
+    if volver and url_has_allowed_host_and_scheme(volver, allowed_hosts={request.get_host()}):
+        return redirect(volver)
+    return redirect(nombre_url)
+
+
+def _errores_formulario(request, form):
+    for errores in form.errors.values():
+        for error in errores:
+            messages.error(request, error)
+
+
+def _acciones_entradas(request, modelo, campo_fecha, nombre_url):
+    """
+    Elimina o cambia la fecha de varias entradas del usuario en una sola consulta.
+    """
+    form = AccionMasivaEntradasForm(request.POST)
+    if not form.is_valid():
+        _errores_formulario(request, form)
+        return _volver_a_lista(request, nombre_url)
+
+    ids = form.cleaned_data['ids']
+    # Igual que en las vistas individuales, solo se modifican las entradas propias
+    seleccion = modelo.objects.filter(id__in=ids, autor=request.user)
+    with transaction.atomic():
+        if form.cleaned_data['accion'] == 'eliminar':
+            _, por_modelo = seleccion.delete()
+            filas = por_modelo.get(modelo._meta.label, 0)
+            messages.success(request, f'{filas} entrada(s) eliminada(s) correctamente.')
+        else:
+            filas = seleccion.update(**{campo_fecha: form.cleaned_data['fecha']})
+            messages.success(request, f'Fecha actualizada en {filas} entrada(s).')
+
+    if filas < len(ids):
+        messages.warning(request, f'{len(ids) - filas} entrada(s) no se modificaron (no existen o no son tuyas).')
+    return _volver_a_lista(request, nombre_url)
+
+
+@login_required
+@require_POST
+def acciones_entradas_blog(request):
+    """
+    Acciones masivas de la lista de entradas del blog (eliminar, cambiar fecha de publicación).
+    """
+    return _acciones_entradas(request, BlogEntrada, 'fecha_publicacion', 'list_entradas_blog')
+
+
+@login_required
+@require_POST
+def acciones_entradas_index(request):
+    """
+    Acciones masivas de la lista de entradas del índice (eliminar, cambiar fecha de creación).
+    """
+    return _acciones_entradas(request, EntradaIndex, 'fecha_creacion', 'list_entradas_index')
+
+
+@login_required
+@require_POST
+def acciones_programacion(request):
+    """
+    Acciones masivas de la programación semanal: eliminar programas o moverlos a otro día.
+    Se ejecuta una consulta por día involucrado (como máximo siete), no una por programa.
+    """
+    form = AccionMasivaProgramasForm(request.POST)
+    if not form.is_valid():
+        _errores_formulario(request, form)
+        return _volver_a_lista(request, 'list_programacion')
+
+    por_dia = form.cleaned_data['ids']
+    dia_destino = form.cleaned_data['dia_destino']
+    filas = 0
+    with transaction.atomic():
+        if form.cleaned_data['accion'] == 'eliminar':
+            for dia, ids in por_dia.items():
+                filas += PROGRAMACION_POR_DIA[dia].objects.filter(pk__in=ids).delete()[0]
+            messages.success(request, f'{filas} programa(s) eliminado(s) correctamente.')
+        else:
+            # La semana tal como quedaría tras mover los programas no puede tener solapamientos
+            semana = cargar_semana()
+            movidos = [
+                programa for dia, ids in por_dia.items() if dia != dia_destino
+                for programa in semana[dia] if programa.pk in ids
+            ]
+            for dia, ids in por_dia.items():
+                if dia != dia_destino:
+                    semana[dia] = [programa for programa in semana[dia] if programa.pk not in ids]
+            semana[dia_destino] = semana[dia_destino] + movidos
+            resultado = validar_semana(semana)
+            errores = [error for programa in movidos for error in resultado.errores_de(programa)]
+            if errores:
+                for error in dict.fromkeys(errores):
+                    messages.error(request, error)
+                return _volver_a_lista(request, 'list_programacion')
+
+            destino = PROGRAMACION_POR_DIA[dia_destino]
+            for dia, ids in por_dia.items():
+                if dia == dia_destino:
+                    continue
+                origen = PROGRAMACION_POR_DIA[dia].objects.filter(pk__in=ids)
+                programas = list(origen.values('hora_inicio', 'hora_fin', 'nombre_programa'))
+                destino.objects.bulk_create([destino(**programa) for programa in programas])
+                origen.delete()
+                filas += len(programas)
+            messages.success(request, f'{filas} programa(s) movido(s) al {dia_destino}.')
+            # Mostrar el día de destino con los programas recién movidos
+            return redirect(f"{reverse_lazy('list_programacion')}?day={dia_destino}")
+
+    return _volver_a_lista(request, 'list_programacion')
+
+
+# ----------------------------------------------------------------------------------------------------------------------------------------------------
+# IMPORTACIÓN, EXPORTACIÓN Y COPIA DE LA PROGRAMACIÓN (solo personal)
+# Los archivos se leen en streaming, se validan completos (incluidos los solapamientos de la
+# semana) y se guardan en una sola transacción. Los mismos procesos están disponibles como
+# comandos: importar_programacion, exportar_programacion y copiar_programacion.
+
+TIPOS_EXPORTACION = {
+    'csv': ('text/csv; charset=utf-8', filas_csv),
+    'ics': ('text/calendar; charset=utf-8', lineas_ics),
+}
+
+
+@staff_member_required
+@require_GET
+def exportar_programacion(request, formato):
+    """
+    Descarga la programación de la semana como CSV o iCalendar.
+    """
+    if formato not in TIPOS_EXPORTACION:
+        raise Http404('Formato desconocido')
+    content_type, generar = TIPOS_EXPORTACION[formato]
+    response = StreamingHttpResponse(generar(programacion_semanal()), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="programacion.{formato}"'
+    return response
+
+
+@staff_member_required
+@require_POST
+def importar_programacion(request):
+    """
+    Reemplaza (o complementa) la programación de la semana con un archivo .csv o .ics.
+    """
+    form = ImportarProgramacionForm(request.POST, request.FILES)
+    if not form.is_valid():
+        _errores_formulario(request, form)
+        return redirect('list_programacion')
+
+    archivo = form.cleaned_data['archivo']
+    errores = []
+    lineas = io.TextIOWrapper(archivo.file, encoding='utf-8-sig', newline='')
+    try:
+        importada = importar_semana(
+            LECTORES[archivo.formato](lineas, errores), errores, combinar=form.cleaned_data['combinar']
+        )
+    except UnicodeDecodeError:
+        messages.error(request, 'El archivo debe estar codificado en UTF-8.')
+    except ErrorProgramacion as error:
+        for mensaje in error.errores[:20]:
+            messages.error(request, mensaje)
+        if len(error.errores) > 20:
+            messages.error(request, f'... y {len(error.errores) - 20} error(es) más. No se importó nada.')
+    else:
+        total = sum(len(programas) for programas in importada.values())
+        messages.success(request, f'{total} programa(s) importado(s) desde {archivo.name}.')
+    return redirect(f"{reverse_lazy('list_programacion')}?day=todos")
+
+
+@staff_member_required
+@require_POST
+def copiar_programacion(request):
+    """
+    Copia la programación de un día a otros días (por ejemplo, lunes a viernes).
+    """
+    form = CopiarDiaForm(request.POST)
+    if not form.is_valid():
+        _errores_formulario(request, form)
+        return _volver_a_lista(request, 'list_programacion')
+
+    datos = form.cleaned_data
+    try:
+        creados = copiar_dia(datos['origen'], datos['destinos'], combinar=datos['combinar'])
+    except ErrorProgramacion as error:
+        for mensaje in error.errores:
+            messages.error(request, mensaje)
+    else:
+        messages.success(request, f'{creados} programa(s) copiado(s) desde el {datos["origen"]}.')
+    return _volver_a_lista(request, 'list_programacion')
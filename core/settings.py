@@ -57,10 +57,15 @@ CRISPY_TEMPLATE_PACK = "tailwind"
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'app.middleware.CompresionMiddleware', # HTML minificado y Brotli/gzip, con caché de cuerpos comprimidos
+    'app.middleware.ModoDegradadoMiddleware', # Copias de las páginas públicas si la base de datos cae
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'app.middleware.EnlacesAnticipadosMiddleware', # Cabecera Link con preconnect/preload (103 Early Hints)
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'app.middleware.LimitePeticionesMiddleware', # Cubetas de tokens por ruta (ver LIMITES_PETICIONES)
+    'app.middleware.PrimarioTrasEscrituraMiddleware', # Lecturas del primario tras escribir (réplicas)
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "django_browser_reload.middleware.BrowserReloadMiddleware",
@@ -98,7 +103,12 @@ DATABASES = {
     }
 }
 
-# Configuración de caché
+# Réplicas de solo lectura (alias de DATABASES); sin réplicas todo se lee de 'default'
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['app.routers.ReplicaRouter']
+
+# Configuración de caché (en archivos, solo para desarrollo: el límite de peticiones
+# necesita Redis o memcached con varios workers; ver core/settings_produccion.py)
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
@@ -158,3 +168,51 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Definimos la carpeta Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# Las imágenes subidas se guardan una sola vez por contenido (ver app/almacenamiento.py)
+STORAGES = {
+    "default": {"BACKEND": "app.almacenamiento.AlmacenamientoPorContenido"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+# URL pública del sitio para las direcciones absolutas de los feeds y sitemaps (app/feeds.py);
+# no se toma del Host de cada petición porque ALLOWED_HOSTS acepta cualquiera
+SITIO_URL = os.environ.get("SITIO_URL", "http://localhost:8000")
+
+# Exportación estática de las páginas públicas (python manage.py freeze)
+FREEZE_ROOT = os.path.join(BASE_DIR, "freeze")
+FREEZE_BASE_URL = os.environ.get("FREEZE_BASE_URL", SITIO_URL)
+
+# Recursos de base.html que el navegador puede pedir antes de leer el <head>
+# (cabecera Link de cada página HTML, ver app/middleware.py)
+ENLACES_ANTICIPADOS = [
+    "<https://cdn.jsdelivr.net>; rel=preconnect",
+    "<https://cdn.tailwindcss.com>; rel=preconnect",
+    "<https://cdn.jsdelivr.net/npm/tailwindcss@2.2.19/dist/tailwind.min.css>; rel=preload; as=style",
+    "<https://cdn.tailwindcss.com>; rel=preload; as=script",
+    "<https://cdn.jsdelivr.net/npm/sweetalert2@11>; rel=preload; as=script",
+]
+
+# Política de las llamadas a APIs externas por host (ver app/externo.py)
+HTTP_EXTERNO = {
+    "mindicador.cl": {"timeout": (1.5, 4), "reintentos": 2, "fallos_para_abrir": 3, "espera_circuito": 60},
+}
+
+# Límite de peticiones por nombre de ruta (admite comodines, gana el primer patrón que
+# coincide; ver app/limites.py). Cada visitante tiene `capacidad` peticiones seguidas y
+# recupera `por_minuto` por minuto; `clave` es "ip" o "usuario" y `metodos` restringe
+# la regla a esos métodos HTTP.
+# Proxies inversos (IPs o redes) de los que se acepta X-Forwarded-For para conocer la
+# dirección del visitante (límite de peticiones y vistas del blog, ver app/limites.py)
+PROXIES_CONFIABLES = []
+
+LIMITES_PETICIONES = {
+    "login": {"capacidad": 5, "por_minuto": 5, "clave": "ip", "metodos": ["POST"]},
+    "add_*": {"capacidad": 20, "por_minuto": 30, "clave": "usuario", "metodos": ["POST"]},
+    "update_*": {"capacidad": 20, "por_minuto": 30, "clave": "usuario", "metodos": ["POST"]},
+    "delete_*": {"capacidad": 10, "por_minuto": 20, "clave": "usuario"},
+    "acciones_*": {"capacidad": 10, "por_minuto": 20, "clave": "usuario", "metodos": ["POST"]},
+    "importar_programacion": {"capacidad": 5, "por_minuto": 5, "clave": "usuario", "metodos": ["POST"]},
+    "copiar_programacion": {"capacidad": 10, "por_minuto": 10, "clave": "usuario", "metodos": ["POST"]},
+    "serie_indicador": {"capacidad": 30, "por_minuto": 60, "clave": "ip"},
+}
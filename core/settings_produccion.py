@@ -0,0 +1,86 @@
+"""
+Configuración de producción de Radio Hits.
+
+Parte de core/settings.py y cambia solo lo que afecta al servidor real. Se selecciona
+con la variable de entorno DJANGO_SETTINGS_MODULE:
+
+    DJANGO_SETTINGS_MODULE=core.settings_produccion gunicorn core.wsgi
+    DJANGO_SETTINGS_MODULE=core.settings_produccion uvicorn core.asgi:application
+
+Diferencias con desarrollo:
+  - DEBUG desactivado y SECRET_KEY / ALLOWED_HOSTS / base de datos desde variables de entorno.
+  - Sin django_browser_reload (ni su app, ni su middleware, ni la ruta __reload__/).
+  - Plantillas compiladas una sola vez por proceso (cached.Loader explícito).
+  - Conexiones persistentes a MySQL (CONN_MAX_AGE) verificadas antes de reutilizarse
+    (CONN_HEALTH_CHECKS), en lugar de abrir una conexión nueva en cada petición.
+  - Caché compartida en Redis (REDIS_URL): el límite de peticiones necesita un add()
+    atómico entre workers, que la caché en archivos de desarrollo no tiene (ver app/limites.py).
+  - Réplicas de lectura opcionales: DB_REPLICA_HOSTS="10.0.0.2,10.0.0.3" crea los alias
+    replica_1, replica_2... con las mismas credenciales (ver app/routers.py).
+
+Para medir la diferencia:
+    python manage.py benchmark --perfiles core.settings core.settings_produccion
+"""
+
+import copy
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, INSTALLED_APPS, MIDDLEWARE, SECRET_KEY, TEMPLATES, BASE_DIR, os
+
+DEBUG = os.environ.get("DJANGO_DEBUG", "") == "1"
+
+SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", SECRET_KEY)
+
+ALLOWED_HOSTS = [host for host in os.environ.get("DJANGO_ALLOWED_HOSTS", "*").split(",") if host]
+
+# Apps y middleware que solo tienen sentido en desarrollo
+APPS_DESARROLLO = ["django_browser_reload"]
+MIDDLEWARE_DESARROLLO = ["django_browser_reload.middleware.BrowserReloadMiddleware"]
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in APPS_DESARROLLO]
+MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware not in MIDDLEWARE_DESARROLLO]
+
+# Plantillas: cada plantilla se lee y compila una vez por proceso y queda en memoria
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]["APP_DIRS"] = False  # Incompatible con 'loaders'; app_directories se incluye abajo
+TEMPLATES[0]["OPTIONS"]["loaders"] = [
+    ("django.template.loaders.cached.Loader", [
+        "django.template.loaders.filesystem.Loader",
+        "django.template.loaders.app_directories.Loader",
+    ]),
+]
+
+# Base de datos: conexiones persistentes con verificación de salud antes de reutilizarlas
+DATABASES = copy.deepcopy(DATABASES)
+DATABASES["default"].update({
+    "NAME": os.environ.get("DB_NAME", DATABASES["default"]["NAME"]),
+    "USER": os.environ.get("DB_USER", DATABASES["default"]["USER"]),
+    "PASSWORD": os.environ.get("DB_PASSWORD", DATABASES["default"]["PASSWORD"]),
+    "HOST": os.environ.get("DB_HOST", ""),
+    "PORT": os.environ.get("DB_PORT", ""),
+    "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 300)),  # Debe ser menor que wait_timeout de MySQL
+    "CONN_HEALTH_CHECKS": True,
+    # Una base que no responde debe fallar rápido para pasar al modo degradado (ver app/degradado.py)
+    "OPTIONS": {"connect_timeout": 3, "read_timeout": 10, "write_timeout": 10},
+})
+
+# Caché compartida por todos los workers (consultas, instantáneas, límite de peticiones)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/1"),
+    }
+}
+
+# nginx delante de Django: su dirección (y la de cualquier balanceador) escribe X-Forwarded-For
+PROXIES_CONFIABLES = [ip.strip() for ip in os.environ.get("TRUSTED_PROXIES", "127.0.0.1,::1").split(",") if ip.strip()]
+
+# Réplicas de lectura: mismas credenciales y conexiones persistentes que el primario
+DATABASE_REPLICAS = []
+for numero, host in enumerate(filter(None, os.environ.get("DB_REPLICA_HOSTS", "").split(",")), start=1):
+    alias = f"replica_{numero}"
+    DATABASES[alias] = {**DATABASES["default"], "HOST": host.strip()}
+    DATABASE_REPLICAS.append(alias)
+
+# Archivos estáticos reunidos con collectstatic para servirlos desde nginx
+STATIC_ROOT = os.environ.get("DJANGO_STATIC_ROOT", os.path.join(BASE_DIR, "staticfiles"))
@@ -21,14 +21,19 @@ from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path("__reload__/", include("django_browser_reload.urls")), # RECARGA LA PAGINA EN TIEMPO REAL CUANDO SE REALIZAN CAMBIOS
     path("accounts/", include("django.contrib.auth.urls")), # RUTAS DE AUTENTICACIÓN
     path('', include('app.urls')),
     path('i18n/', include('django.conf.urls.i18n')),
 ]
 
+# Recarga la página en tiempo real cuando se realizan cambios (solo en desarrollo)
+if 'django_browser_reload' in settings.INSTALLED_APPS:
+    urlpatterns.insert(1, path("__reload__/", include("django_browser_reload.urls")))
+
 # Configuración para servir archivos de medios en entornos de desarrollo
 if settings.DEBUG:
     from django.conf.urls.static import static
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    from app.almacenamiento import servir_contenido
+    # Los archivos nombrados por contenido se sirven con caché permanente
+    urlpatterns += static(settings.MEDIA_URL, view=servir_contenido, document_root=settings.MEDIA_ROOT)
 
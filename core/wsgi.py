@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Cada worker resuelve las URLs y compila las plantillas antes de recibir su primera
+# petición (ver app/calentamiento.py); en desarrollo se omite para no retrasar el autoreload
+from django.conf import settings  # noqa: E402
+
+if not settings.DEBUG:
+    from app.calentamiento import calentar_proceso  # noqa: E402
+
+    calentar_proceso()